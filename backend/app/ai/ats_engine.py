@@ -1,5 +1,7 @@
 from typing import Dict, List, Set, Optional
+from app.ai import skill_registry
 from app.ai.skill_engine import extract_skills
+from app.ai.role_matrix import RoleSkillMatrix
 from app.utils.role_normalizer import normalize_role
 
 # Role → expected skills
@@ -27,40 +29,58 @@ ROLE_REQUIRED_SKILLS = {
 }
 
 
+# Role requirements as skill registry bitsets (strict: every skill must be registered)
+ROLE_REQUIRED_BITS = {
+    role: skill_registry.to_bits(skills, strict=True)
+    for role, skills in ROLE_REQUIRED_SKILLS.items()
+}
+
+DEFAULT_ROLE_BITS = skill_registry.to_bits({
+    "python", "javascript", "html", "css", "sql",
+    "git", "rest api", "docker", "problem solving"
+}, strict=True)
+
+
+ATS_ROLE_MATRIX = RoleSkillMatrix(ROLE_REQUIRED_SKILLS)
+
+
+# Sort skills by relevance (longer/more specific skills first)
+def _skill_sort_key(skill):
+    return (-len(skill.split()), skill.lower())
+
+
 def normalize_skill(skill: str) -> str:
     """
     Normalizes equivalent skills to ATS-safe forms.
     """
     skill = skill.lower().strip()
 
-    SQL_ALIASES = {
-        "structured query language",
-        "mysql",
-        "postgresql",
-        "postgres",
-        "sqlite",
-        "mssql"
-    }
-
-    if skill in SQL_ALIASES:
-        return "sql"
-
-    if skill in {"node", "nodejs"}:
-        return "node.js"
+    entry = skill_registry.lookup(skill)
+    if entry is None:
+        return skill
 
-    if skill in {"reactjs"}:
-        return "react"
+    # e.g. mysql / postgres -> sql, nodejs -> node.js
+    if entry.implies:
+        return entry.implies[0]
+    return entry.name
 
-    return skill
 
-
-def ats_score(resume_text: str, role: str) -> dict:
+def ats_score(
+    resume_text: str,
+    role: str,
+    resume_skills: Optional[List[str]] = None,
+    resume_bits: Optional[int] = None
+) -> dict:
     """
     Role-aware ATS scoring engine.
     
     Args:
         resume_text: Normalized resume text (NOT raw PDF text)
         role: Target job role (will be normalized)
+        resume_skills: Skills already extracted from resume_text; extracted
+            here when omitted
+        resume_bits: Skill registry bitset already extracted from resume_text
+            (e.g. ParsedResume.ats_skill_bits); takes precedence over resume_skills
         
     Returns:
         Dict containing ATS score and skill analysis
@@ -68,52 +88,77 @@ def ats_score(resume_text: str, role: str) -> dict:
     # Normalize the role first
     normalized_role = normalize_role(role)
     
-    # Convert resume text to lowercase for case-insensitive matching
-    resume_text = resume_text.lower()
-    
     # Log role normalization for debugging
     if role != normalized_role:
         print(f"Normalized role: '{role}' -> '{normalized_role}'")
 
-    # Extract and normalize resume skills
-    extracted = extract_skills(resume_text)
-    resume_skills = {normalize_skill(s) for s in extracted}
+    # Extract resume skills as a bitset, including ATS equivalents (mysql -> sql)
+    if resume_bits is None:
+        extracted = resume_skills if resume_skills is not None else extract_skills(resume_text.lower())
+        resume_bits = skill_registry.to_bits(normalize_skill(s) for s in extracted)
+    resume_bits = skill_registry.expand_ats(resume_bits)
 
     # Get skills for the normalized role
-    role_skills = ROLE_REQUIRED_SKILLS.get(normalized_role, set())
+    role_bits = ROLE_REQUIRED_BITS.get(normalized_role, 0)
     
     # If no specific skills for this role, try to find a matching role pattern
-    if not role_skills:
+    if not role_bits:
         # Try to find a role that starts with the normalized role
-        for r, skills in ROLE_REQUIRED_SKILLS.items():
+        for r, bits in ROLE_REQUIRED_BITS.items():
             if normalized_role.lower() in r.lower() or r.lower() in normalized_role.lower():
-                role_skills = skills
+                role_bits = bits
                 print(f"Using skills from similar role: {r}")
                 break
     
     # If still no skills, use a default set
-    if not role_skills:
+    if not role_bits:
         print(f"No specific skills found for role: {normalized_role}, using default set")
-        role_skills = {
-            "python", "javascript", "html", "css", "sql", 
-            "git", "rest api", "docker", "problem solving"
-        }
+        role_bits = DEFAULT_ROLE_BITS
 
-    matched = resume_skills & role_skills
-    missing = role_skills - matched
+    matched_bits = resume_bits & role_bits
+    missing_bits = role_bits & ~matched_bits
 
-    match_ratio = len(matched) / len(role_skills)
+    match_ratio = matched_bits.bit_count() / role_bits.bit_count()
     score = round(match_ratio * 100)
 
-    # Sort skills by relevance (longer/more specific skills first)
-    def sort_key(skill):
-        return (-len(skill.split()), skill.lower())
-    
+    matched = skill_registry.names(matched_bits)
+    missing = skill_registry.names(missing_bits)
+    role_skills = skill_registry.names(role_bits)
+
     return {
         "score": score,
         "role": normalized_role,  # Return the normalized role
         "original_role": role,    # Keep original for reference
-        "matched_skills": sorted(matched, key=sort_key),
-        "missing_skills": sorted(missing, key=sort_key),
-        "role_skills": sorted(role_skills, key=sort_key)
+        "matched_skills": sorted(matched, key=_skill_sort_key),
+        "missing_skills": sorted(missing, key=_skill_sort_key),
+        "role_skills": sorted(role_skills, key=_skill_sort_key)
     }
+
+
+def rank_roles(resume_bits: int) -> List[dict]:
+    """
+    Score a resume against every role in ROLE_REQUIRED_SKILLS with a single
+    matrix-vector product. The ranking is stored with the analysis so that
+    switching the target role does not need a recomputation.
+    
+    Args:
+        resume_bits: Skill registry bitset of the resume (ATS text)
+        
+    Returns:
+        Ranked list of ats_score-shaped dicts plus matched/missing counts
+    """
+    ranking = ATS_ROLE_MATRIX.rank(skill_registry.expand_ats(resume_bits))
+    for entry in ranking:
+        for key in ("matched_skills", "missing_skills", "role_skills"):
+            entry[key] = sorted(entry[key], key=_skill_sort_key)
+    return ranking
+
+
+def role_fit_for(role_fit: Optional[List[dict]], role: str) -> Optional[dict]:
+    """Stored rank_roles entry for a role, shaped like ats_score output."""
+    normalized_role = normalize_role(role)
+    for entry in role_fit or []:
+        if entry.get("role") == normalized_role:
+            return {**entry, "original_role": role}
+    return None
+
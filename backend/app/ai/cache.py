@@ -1,5 +1,8 @@
+import os
 import hashlib
 
+from app.core.redis_cache import RedisLRUCache
+
 def make_cache_key(text: str, role: str) -> str:
     """
     Generate a stable cache key for resume + role combination.
@@ -21,3 +24,41 @@ def make_cache_key(text: str, role: str) -> str:
     # Include both original and normalized role in cache key for debugging
     raw = f"{VERSION}::{text}::{role}::{normalized_role}"
     return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# Bump to invalidate cached extractions when extract_text / fix_broken_headers change
+EXTRACTION_CACHE_VERSION = "v2"
+EXTRACTION_CACHE_TTL = int(os.getenv("EXTRACTION_CACHE_TTL", str(7 * 24 * 3600)))
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "20000"))
+
+extraction_cache = RedisLRUCache(
+    namespace=f"extract:{EXTRACTION_CACHE_VERSION}",
+    ttl_seconds=EXTRACTION_CACHE_TTL,
+    max_entries=EXTRACTION_CACHE_MAX_ENTRIES
+)
+
+
+# Persistent tier of the embedding cache (float16 vectors, see app.ai.embedding_cache)
+EMBEDDING_CACHE_VERSION = "v1"
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", str(30 * 24 * 3600)))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+
+def make_embedding_cache(model_name: str) -> RedisLRUCache:
+    return RedisLRUCache(
+        namespace=f"embed:{EMBEDDING_CACHE_VERSION}:{model_name}",
+        ttl_seconds=EMBEDDING_CACHE_TTL,
+        max_entries=EMBEDDING_CACHE_MAX_ENTRIES
+    )
+
+
+# LLM response cache (see app.ai.llm_client.chat_json); bump to drop every cached response
+LLM_CACHE_VERSION = "v1"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+
+llm_response_cache = RedisLRUCache(
+    namespace=f"llm:{LLM_CACHE_VERSION}",
+    ttl_seconds=LLM_CACHE_TTL,
+    max_entries=LLM_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,205 @@
+"""
+Two-Tier Embedding Cache
+
+Wraps an embedding engine so identical text (the same resume re-analysed,
+the same JD matched again) is never embedded twice:
+
+    1. an in-process LRU bounded by bytes (float32 vectors)
+    2. a persistent Redis tier of float16 vectors shared by all processes
+
+Entries are keyed by the SHA-256 of the normalized text. Hit/miss counters
+per tier are kept per process (stats()) and added to a Redis hash shared by
+all processes every EMBEDDING_STATS_FLUSH_SECONDS, with a log line per
+flush; GET /status/embeddings reports both (see embedding_stats()).
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+EMBEDDING_MEMORY_CACHE_BYTES = int(os.getenv("EMBEDDING_MEMORY_CACHE_BYTES", str(64 * 1024 * 1024)))
+EMBEDDING_STATS_FLUSH_SECONDS = float(os.getenv("EMBEDDING_STATS_FLUSH_SECONDS", "30"))
+
+STATS_KEY = "embed:stats"
+_COUNTERS = ("memory_hits", "persistent_hits", "misses")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_embedding_text(text: str) -> str:
+    """Unicode + whitespace normalization that does not change what the model sees."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def embedding_key(text: str) -> str:
+    return hashlib.sha256(normalize_embedding_text(text).encode("utf-8")).hexdigest()
+
+
+class ByteBoundedLRU:
+    """Thread-safe LRU of numpy vectors, bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+            return vector
+
+    def set(self, key: str, vector: np.ndarray) -> None:
+        if vector.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size_bytes -= old.nbytes
+            self._entries[key] = vector
+            self.size_bytes += vector.nbytes
+            while self.size_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= evicted.nbytes
+
+
+class CachedEmbeddingEngine:
+    """
+    Drop-in embedding engine that checks the memory tier, then the persistent
+    tier, and only runs the wrapped engine for texts that missed both.
+    """
+
+    def __init__(self, engine, persistent=None, max_bytes: int = EMBEDDING_MEMORY_CACHE_BYTES):
+        self.engine = engine
+        self.memory = ByteBoundedLRU(max_bytes)
+        self.persistent = persistent
+        self._lock = threading.Lock()
+        self.counters = {name: 0 for name in _COUNTERS}
+        # Counted since the last flush to Redis
+        self._unflushed = {name: 0 for name in _COUNTERS}
+        self._flushed_at = time.time()
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        if amount:
+            with self._lock:
+                self.counters[name] += amount
+                self._unflushed[name] += amount
+
+    def stats(self) -> Dict:
+        """Hit/miss counters per tier plus memory-tier occupancy."""
+        with self._lock:
+            counters = dict(self.counters)
+        counters["hit_rate"] = _hit_rate(counters)
+        counters["memory_entries"] = len(self.memory)
+        counters["memory_bytes"] = self.memory.size_bytes
+        return counters
+
+    def _maybe_flush(self) -> None:
+        """Add this process's recent counts to the shared Redis hash and log them."""
+        with self._lock:
+            if time.time() - self._flushed_at < EMBEDDING_STATS_FLUSH_SECONDS:
+                return
+            unflushed, self._unflushed = self._unflushed, {name: 0 for name in _COUNTERS}
+            self._flushed_at = time.time()
+        if not any(unflushed.values()):
+            return
+
+        print(
+            f"Embedding cache: {unflushed['memory_hits']} memory hits, "
+            f"{unflushed['persistent_hits']} Redis hits, {unflushed['misses']} misses "
+            f"(hit rate {_hit_rate(unflushed):.0%}) in the last {EMBEDDING_STATS_FLUSH_SECONDS:.0f}s"
+        )
+        from redis.exceptions import RedisError
+        from app.core.redis_cache import get_redis
+
+        try:
+            pipe = get_redis().pipeline()
+            for name, amount in unflushed.items():
+                if amount:
+                    pipe.hincrby(STATS_KEY, name, amount)
+            pipe.execute()
+        except RedisError as e:
+            print(f"Embedding cache stats flush failed: {str(e)}")
+
+    def encode_many(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed several texts, reusing cached vectors.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            np.ndarray: One L2-normalized float32 row per input text, in order
+        """
+        keys = [embedding_key(text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        for key in set(keys):
+            vector = self.memory.get(key)
+            if vector is not None:
+                found[key] = vector
+        memory_hits = sum(1 for key in keys if key in found)
+
+        pending = [key for key in dict.fromkeys(keys) if key not in found]
+        if pending and self.persistent is not None:
+            for key, value in self.persistent.get_many(pending).items():
+                vector = np.frombuffer(value, dtype=np.float16).astype(np.float32)
+                self.memory.set(key, vector)
+                found[key] = vector
+        persistent_hits = sum(1 for key in keys if key in found) - memory_hits
+
+        # Embed each distinct missing text once
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = np.asarray(self.engine.encode_many(list(missing.values())), dtype=np.float32)
+            for key, vector in zip(missing, vectors):
+                self.memory.set(key, vector)
+                found[key] = vector
+                if self.persistent is not None:
+                    self.persistent.set(key, vector.astype(np.float16).tobytes())
+
+        self._count("memory_hits", memory_hits)
+        self._count("persistent_hits", persistent_hits)
+        self._count("misses", len(keys) - memory_hits - persistent_hits)
+        self._maybe_flush()
+        return np.stack([found[key] for key in keys]) if keys else np.empty((0, 0), dtype=np.float32)
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.encode_many([text])[0]
+
+
+def _hit_rate(counters: Dict) -> float:
+    lookups = sum(counters.get(name, 0) for name in _COUNTERS)
+    return round((lookups - counters.get("misses", 0)) / lookups, 4) if lookups else 0.0
+
+
+def embedding_stats() -> Dict:
+    """
+    Cache counters across all processes (from Redis) and for this process,
+    without loading the embedding model.
+    """
+    from redis.exceptions import RedisError
+    from app.ai import embedding_engine
+    from app.core.redis_cache import get_redis
+
+    try:
+        raw = get_redis().hgetall(STATS_KEY)
+        fleet = {name: int(raw.get(name.encode("utf-8"), 0)) for name in _COUNTERS}
+        fleet["hit_rate"] = _hit_rate(fleet)
+    except RedisError as e:
+        fleet = {"error": str(e)}
+
+    engine = embedding_engine._engine
+    process = engine.stats() if isinstance(engine, CachedEmbeddingEngine) else None
+    return {"all_processes": fleet, "this_process": process}
@@ -1,9 +1,65 @@
-from sentence_transformers import SentenceTransformer
+import os
+from typing import List
 import numpy as np
 
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# In-process backend: torch (SentenceTransformer), onnx (fp32) or onnx-int8 (see app.ml.onnx_embedding)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Unix socket of the shared embedding server (app.ml.embedding_server); unset = load the model in-process
+EMBEDDING_SERVER_SOCKET = os.getenv("EMBEDDING_SERVER_SOCKET")
+
+# Two-tier (memory + Redis) embedding cache in front of the engine (app.ai.embedding_cache)
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+
+_engine = None
+
 class EmbeddingEngine:
     def __init__(self):
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(MODEL_NAME)
 
     def encode(self, text: str) -> np.ndarray:
         return self.model.encode(text, normalize_embeddings=True)
+
+    def encode_many(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, normalize_embeddings=True)
+
+
+def create_embedding_engine(backend: str = None):
+    """Load an in-process embedding model with the given (or configured) backend."""
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "torch":
+        return EmbeddingEngine()
+    if backend in ("onnx", "onnx-int8"):
+        from app.ml.onnx_embedding import OnnxEmbeddingEngine
+
+        return OnnxEmbeddingEngine(quantized=backend == "onnx-int8")
+    raise ValueError(f"Unknown embedding backend '{backend}', expected one of {', '.join(EMBEDDING_BACKENDS)}")
+
+
+def get_embedding_engine():
+    """
+    Shared embedding engine for this process: a client of the embedding
+    server when EMBEDDING_SERVER_SOCKET is set, otherwise an in-process model
+    on EMBEDDING_BACKEND, behind the embedding cache unless it is disabled.
+    """
+    global _engine
+    if _engine is None:
+        if EMBEDDING_SERVER_SOCKET:
+            from app.ml.embedding_server import RemoteEmbeddingEngine
+
+            engine = RemoteEmbeddingEngine(EMBEDDING_SERVER_SOCKET)
+        else:
+            engine = create_embedding_engine()
+
+        if EMBEDDING_CACHE_ENABLED:
+            from app.ai.cache import make_embedding_cache
+            from app.ai.embedding_cache import CachedEmbeddingEngine
+
+            engine = CachedEmbeddingEngine(engine, persistent=make_embedding_cache(MODEL_NAME))
+        _engine = engine
+    return _engine
@@ -15,7 +15,8 @@ from typing import Dict, List, Optional, Tuple, Set, Any
 from dataclasses import dataclass
 from enum import Enum
 
-from .section_parser import SectionType, ResumeParser
+from .section_parser import SectionType
+from .parsed_resume import ParsedResume, get_parser
 from .skill_utils import (
     extract_skills_from_text, 
     merge_skills, 
@@ -85,11 +86,14 @@ class EnhancedResumeAnalyzer:
     for resumes with support for various sections and data types.
     """
     
-    def __init__(self, resume_text: str):
-        """Initialize the analyzer with resume text."""
+    def __init__(self, resume_text: str, parsed: Optional[ParsedResume] = None):
+        """Initialize the analyzer with resume text (and its ParsedResume, if already built)."""
+        if parsed is None:
+            parsed = ParsedResume.from_text(resume_text)
         self.resume_text = resume_text
-        self.parser = ResumeParser()
-        self.sections = self.parser.parse_sections(resume_text)
+        self.parsed = parsed
+        self.parser = get_parser()
+        self.sections = parsed.sections
         self.skills = []
         self.experiences = []
         self.projects = []
@@ -482,15 +486,16 @@ class EnhancedResumeAnalyzer:
             return 2
         return 1
 
-def analyze_resume(resume_text: str) -> Dict[str, Any]:
+def analyze_resume(resume_text: str, parsed: Optional[ParsedResume] = None) -> Dict[str, Any]:
     """
     Convenience function to analyze a resume with default settings.
     
     Args:
         resume_text: The raw text content of the resume
+        parsed: Optional ParsedResume already built for this text
         
     Returns:
         Dict containing the analysis results
     """
-    analyzer = EnhancedResumeAnalyzer(resume_text)
+    analyzer = EnhancedResumeAnalyzer(resume_text, parsed)
     return analyzer.analyze()
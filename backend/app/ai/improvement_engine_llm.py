@@ -1,13 +1,22 @@
 import os
-import json
-from dotenv import load_dotenv
-from openai import OpenAI
-from typing import Dict, Any
-from app.utils.openai_rate_limiter import wait_for_slot
+from typing import Dict, Any, Optional
+from app.ai.llm_client import chat_json
+from app.ai import model_router
+from app.ai.parsed_resume import ParsedResume
+from app.ai.prompt_builder import build_messages, fit_resume
+from app.ai.section_parser import SectionType
 
-load_dotenv()
+# Bump when MASTER_SYSTEM_PROMPT or the user prompt template changes (LLM response cache key)
+PROMPT_VERSION = "improvements-v2"
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Resume tokens sent to the LLM; lowest-priority sections are trimmed first
+IMPROVEMENTS_RESUME_TOKEN_BUDGET = int(os.getenv("IMPROVEMENTS_RESUME_TOKEN_BUDGET", "3000"))
+IMPROVEMENTS_SECTION_PRIORITY = (
+    SectionType.SUMMARY, SectionType.SKILLS, SectionType.EXPERIENCE,
+    SectionType.PROJECTS, SectionType.EDUCATION, SectionType.CERTIFICATIONS,
+    SectionType.AWARDS, SectionType.CONTACT, SectionType.PUBLICATIONS,
+    SectionType.LANGUAGES, SectionType.VOLUNTEER
+)
 
 # 🚀 ResumeIQ – Enterprise Resume Intelligence MASTER PROMPT
 MASTER_SYSTEM_PROMPT = """You are an Enterprise Resume Intelligence Engine used by a professional ATS and career-coaching platform.
@@ -36,19 +45,9 @@ IMPORTANT RULES:
 - Use industry terminology
 - Keep recommendations realistic for the candidate's current level"""
 
-
-def generate_improvements_llm(
-    *,
-    resume_text: str,
-    role: str,
-    ats: Dict[str, Any]
-) -> Dict[str, Any]:
-    """
-    Enterprise-grade resume analysis using comprehensive master prompt
-    """
-    wait_for_slot()
-
-    user_prompt = f"""Analyze the following resume text in depth.
+# Static task instructions: sent before the per-resume content, identical on
+# every call so provider-side prompt caching can reuse the prefix
+IMPROVEMENTS_INSTRUCTIONS = """Analyze the following resume text in depth.
 
 OBJECTIVES:
 1. Scan the ENTIRE resume including:
@@ -117,88 +116,79 @@ OBJECTIVES:
 
 10. Output must be structured for FRONTEND UI rendering.
 
-Current Role Focus: {role}
-ATS Analysis:
-- ATS Score: {ats.get("score", 0)}
-- Matched Skills: {', '.join(ats.get("matched_skills", [])[:10])}
-- Missing Skills: {', '.join(ats.get("missing_skills", [])[:10])}
-
-Resume Text:
-\"\"\"{resume_text}\"\"\"
-
 Return ONLY valid JSON with this EXACT structure:
-{{
+{
   "role_analysis": [
-    {{
+    {
       "role": "Full Stack Developer",
       "ats_score": 75,
       "role_confidence": 60,
       "fit_reason": "Strong frontend + backend basics",
       "missing_skills": ["docker", "rest api"],
       "recommended_next_steps": ["Learn Docker", "Build REST API project"]
-    }}
+    }
   ],
-  "overall_metrics": {{
+  "overall_metrics": {
     "overall_ats_score": 78,
     "resume_quality_score": 82,
-    "resume_strength": {{
+    "resume_strength": {
       "score": 80,
       "label": "Strong",
       "color": "green"
-    }}
-  }},
+    }
+  },
   "section_analysis": [
-    {{
+    {
       "section": "summary",
       "strengths": ["Clear objective"],
       "issues": ["Needs role-specific focus"],
       "improvements": ["Add target role", "Include key achievements"]
-    }},
-    {{
+    },
+    {
       "section": "skills",
       "strengths": ["python", "react"],
       "issues": ["Missing DevOps tools"],
       "improvements": ["Add Docker", "Include CI/CD tools"]
-    }},
-    {{
+    },
+    {
       "section": "experience",
       "strengths": ["Relevant projects"],
       "issues": ["Lack of metrics"],
       "improvements": ["Add quantified impact", "Use action verbs"]
-    }},
-    {{
+    },
+    {
       "section": "projects",
       "strengths": ["Good tech stack"],
       "issues": ["Missing deployment details"],
       "improvements": ["Add live links", "Mention scalability"]
-    }}
+    }
   ],
   "project_recommendations": [
-    {{
+    {
       "role": "Full Stack Developer",
       "projects": [
-        {{
+        {
           "title": "Scalable Resume Analyzer",
           "description": "Build a resume parsing and scoring platform using AI",
           "tech_stack": ["Python", "FastAPI", "MongoDB", "Docker"],
           "impact_metrics": ["Designed REST APIs", "Improved ATS matching accuracy"],
           "interview_talking_points": ["Architecture decisions", "Scalability challenges"]
-        }}
+        }
       ]
-    }}
+    }
   ],
-  "interview_preparation": {{
+  "interview_preparation": {
     "technical_topics": ["Data Structures", "REST API design", "Database indexing"],
     "coding_topics": ["arrays", "strings", "hashmaps"],
     "system_design_level": "Basic",
     "behavioral_questions": ["Tell me about a challenge you solved"],
     "resume_based_questions": ["Explain your AgriSmart project architecture"]
-  }},
-  "career_roadmap": {{
+  },
+  "career_roadmap": {
     "30_days": ["Learn Docker basics", "Build one REST API project"],
     "60_days": ["Add CI/CD to projects", "Practice system design basics"],
     "90_days": ["Deploy projects to cloud", "Complete one certification"]
-  }},
+  },
   "formatting_and_ats_tips": [
     "Keep contact details concise",
     "Use strong action verbs",
@@ -215,31 +205,57 @@ Return ONLY valid JSON with this EXACT structure:
   "skills_to_add": ["docker", "rest api"],
   "experience_bullets": ["Implemented backend features", "Collaborated with team"],
   "project_suggestions": [
-    {{
+    {
       "title": "Project Title",
       "description": "Description",
       "tech_stack": ["tech1"],
       "impact_bullets": ["impact1"]
-    }}
+    }
   ],
   "formatting_tips": ["tip1", "tip2"],
   "action_items": ["item1", "item2"]
-}}
+}
 
 IMPORTANT: Return ONLY the JSON object, no markdown, no code blocks, no explanations."""
 
+
+def generate_improvements_llm(
+    *,
+    resume_text: str,
+    role: str,
+    ats: Dict[str, Any],
+    use_cache: bool = True,
+    plan: str = "free",
+    parsed: Optional[ParsedResume] = None
+) -> Dict[str, Any]:
+    """
+    Enterprise-grade resume analysis using comprehensive master prompt
+
+    use_cache=False bypasses the LLM response cache; plan picks the model tier;
+    parsed (the ParsedResume of resume_text) avoids parsing it again.
+    """
+    resume_excerpt = fit_resume(
+        resume_text, IMPROVEMENTS_RESUME_TOKEN_BUDGET, IMPROVEMENTS_SECTION_PRIORITY, parsed=parsed
+    )
+    request_content = f"""Current Role Focus: {role}
+ATS Analysis:
+- ATS Score: {ats.get("score", 0)}
+- Matched Skills: {', '.join(ats.get("matched_skills", [])[:10])}
+- Missing Skills: {', '.join(ats.get("missing_skills", [])[:10])}
+
+Resume Text:
+\"\"\"{resume_excerpt}\"\"\""""
+
+    messages = build_messages(MASTER_SYSTEM_PROMPT, IMPROVEMENTS_INSTRUCTIONS, request_content)
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Updated to gpt-4o-mini
-            messages=[
-                {"role": "system", "content": MASTER_SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt}
-            ],
+        # Rate-limited JSON-mode call (shared token bucket)
+        result = chat_json(
+            messages,
+            route=model_router.route_messages("improvements", messages, plan),
             temperature=0.4,
-            response_format={"type": "json_object"}  # Force JSON output
+            prompt_version=PROMPT_VERSION,
+            use_cache=use_cache
         )
-
-        result = json.loads(response.choices[0].message.content)
         
         # Validate result doesn't contain error
         if isinstance(result, dict) and "error" in result:
@@ -2,79 +2,31 @@
 JD vs Resume Matching Engine - Industry-level ATS Simulation
 Compares resume with job description and calculates match score
 """
+import asyncio
 import os
-import json
-from dotenv import load_dotenv
-from openai import OpenAI
 from typing import Dict, Any, List, Set, Optional
-from app.utils.openai_rate_limiter import wait_for_slot
+from app.ai.llm_client import chat_json, chat_json_async
+from app.ai import model_router
+from app.ai.prompt_builder import build_messages, fit_resume, truncate_to_tokens
+from app.ai.section_parser import SectionType
 from app.utils.role_normalizer import normalize_role
+from app.ai.ats_engine import ROLE_REQUIRED_SKILLS
+from app.ai.skill_matcher import SkillMatcher
+from app.ai.skill_registry import SKILL_SET
+from app.ai import skill_registry
 import re
 from collections import Counter
 
-# Master list of valid technical skills
-SKILL_SET = {
-    # Programming Languages
-    "python", "javascript", "typescript", "java", "c++", "c#", "go", "rust", "kotlin", "swift",
-    "php", "ruby", "scala", "r", "dart", "perl", "haskell", "elixir", "clojure", "bash", "powershell",
-    
-    # Web Development
-    "html", "css", "sass", "less", "bootstrap", "tailwind", "react", "angular", "vue", "next.js",
-    "nuxt.js", "svelte", "node.js", "express", "django", "flask", "spring", "laravel", "ruby on rails", 
-    "asp.net", "graphql", "rest api", "webpack", "babel", "vite", "npm", "yarn", "jquery", "redux",
-    "mobx", "jest", "mocha", "cypress", "storybook", "styled components", "material ui", "chakra ui",
-    
-    # Mobile Development
-    "react native", "flutter", "ios", "android", "xamarin", "ionic", "swiftui", "jetpack compose",
-    "kotlin multiplatform", "kmm", "flutter", "react native",
-    
-    # Databases
-    "sql", "mysql", "postgresql", "mongodb", "redis", "oracle", "sqlite", "mariadb", "cassandra", 
-    "dynamodb", "firebase", "cosmosdb", "neo4j", "elasticsearch", "bigquery", "snowflake",
-    "firestore", "realm", "couchbase", "microsoft sql server", "sql server", "postgres",
-    
-    # DevOps & Cloud
-    "docker", "kubernetes", "aws", "azure", "gcp", "terraform", "ansible", "jenkins", "github actions",
-    "gitlab ci", "circleci", "argocd", "helm", "prometheus", "grafana", "istio", "linux", "nginx",
-    "apache", "cloudformation", "serverless", "aws lambda", "aws ec2", "aws s3", "aws rds",
-    "aws dynamodb", "aws ecs", "aws eks", "aws cloudfront", "aws api gateway", "aws iam", "aws vpc",
-    "azure devops", "azure functions", "google cloud functions", "google kubernetes engine",
-    
-    # Data Science & AI/ML
-    "pandas", "numpy", "pytorch", "tensorflow", "scikit-learn", "opencv", "nltk", "spacy", "huggingface",
-    "mlflow", "kubeflow", "apache spark", "hadoop", "kafka", "airflow", "tableau", "power bi", "looker",
-    "matplotlib", "seaborn", "plotly", "d3.js", "tensorboard", "keras", "fastai", "xgboost", "lightgbm",
-    "catboost", "pytorch lightning", "transformers", "computer vision", "nlp", "natural language processing",
-    "machine learning", "deep learning", "reinforcement learning", "time series", "data analysis",
-    
-    # Other Tools & Platforms
-    "git", "github", "gitlab", "bitbucket", "jira", "confluence", "slack", "docker-compose", "kafka",
-    "rabbitmq", "redis", "nginx", "apache", "graphql", "grpc", "oauth", "jwt", "oauth2", "openid",
-    "oauth2.0", "openid connect", "jwt tokens", "restful api", "soap", "graphql api", "grpc", "protobuf",
-    "web sockets", "socket.io", "websocket", "web rtc", "webrtc", "web sockets", "webassembly", "wasm",
-    "electron", "pwa", "progressive web apps", "serverless", "microservices", "monorepo", "lerna",
-    "yarn workspaces", "pnpm", "lerna", "nx", "turborepo", "vite", "snowpack", "esbuild", "swc", "bun"
-}
+# Compiled once: finds every SKILL_SET mention in a single pass
+SKILL_MATCHER = SkillMatcher(SKILL_SET)
 
 def extract_keywords(text: str) -> Set[str]:
     """Extract potential keywords from text using the predefined skill set"""
     if not text or not isinstance(text, str):
         return set()
-        
-    # Convert to lowercase for case-insensitive matching
-    text_lower = text.lower()
     
-    # Find all skills mentioned in the text
-    found_skills = set()
-    
-    # Check for multi-word skills first (to avoid partial matches)
-    for skill in sorted(SKILL_SET, key=len, reverse=True):
-        if skill in text_lower:
-            found_skills.add(skill)
-            # Remove the matched text to avoid double-counting
-            text_lower = text_lower.replace(skill, " ")
-    
-    return found_skills
+    # Word-boundary matches; multi-word skills win over their parts
+    return SKILL_MATCHER.find_all(text)
 
 def is_valid_skill(skill: str) -> bool:
     """
@@ -93,7 +45,12 @@ def is_valid_skill(skill: str) -> bool:
 
     return skill.replace(" ", "").replace(".", "").isalpha()
 
-def rule_based_jd_match(resume_text: str, jd_text: str, target_role: Optional[str] = None) -> Dict[str, Any]:
+def rule_based_jd_match(
+    resume_text: str,
+    jd_text: str,
+    target_role: Optional[str] = None,
+    jd_keywords: Optional[Set[str]] = None
+) -> Dict[str, Any]:
     """
     Fallback rule-based JD matcher when LLM fails
     
@@ -101,6 +58,7 @@ def rule_based_jd_match(resume_text: str, jd_text: str, target_role: Optional[st
         resume_text: The resume text
         jd_text: The job description text
         target_role: Optional target role for context
+        jd_keywords: extract_keywords(jd_text), if the caller already has it
         
     Returns:
         Dict with match analysis
@@ -108,25 +66,20 @@ def rule_based_jd_match(resume_text: str, jd_text: str, target_role: Optional[st
     # Normalize the role if provided
     normalized_role = normalize_role(target_role) if target_role else None
     
-    # Extract skills using our predefined skill set
-    resume_skills = extract_keywords(resume_text)
-    jd_skills = extract_keywords(jd_text)
+    # Extract skills using our predefined skill set, as registry bitsets
+    resume_bits = skill_registry.to_bits(extract_keywords(resume_text))
+    if jd_keywords is None:
+        jd_keywords = extract_keywords(jd_text)
+    jd_bits = skill_registry.to_bits(jd_keywords)
     
     # Get role-specific skills if role is provided
     role_skills = set()
     if normalized_role and normalized_role in ROLE_REQUIRED_SKILLS:
         role_skills = ROLE_REQUIRED_SKILLS[normalized_role]
     
-    # Calculate matches and missing skills
-    matched_skills = [
-        skill for skill in SKILL_SET
-        if skill in resume_skills and skill in jd_skills
-    ]
-    
-    missing_skills = [
-        skill for skill in SKILL_SET
-        if skill in jd_skills and skill not in resume_skills
-    ]
+    # Calculate matches and missing skills (integer set operations)
+    matched_skills = skill_registry.names(resume_bits & jd_bits)
+    missing_skills = skill_registry.names(jd_bits & ~resume_bits)
     
     # If we have role-specific skills, prioritize them
     if role_skills:
@@ -140,7 +93,7 @@ def rule_based_jd_match(resume_text: str, jd_text: str, target_role: Optional[st
         )
     
     # Calculate match score (0-100)
-    total_required = len(set(jd_skills) & SKILL_SET)
+    total_required = jd_bits.bit_count()
     if total_required > 0:
         match_score = min(100, int((len(matched_skills) / total_required) * 100))
     else:
@@ -221,9 +174,82 @@ def rule_based_jd_match(resume_text: str, jd_text: str, target_role: Optional[st
         "fallback_used": True
     }
 
-load_dotenv()
+# Local pre-scoring before the LLM: pairs scoring below the threshold get the
+# rule-based answer immediately (no rate-limit wait, no quota used)
+JD_PREFILTER_ENABLED = os.getenv("JD_PREFILTER_ENABLED", "true").lower() == "true"
+JD_PREFILTER_THRESHOLD = float(os.getenv("JD_PREFILTER_THRESHOLD", "0.3"))
+# Optional upper bound: clear matches above it also skip the LLM (> 1 disables)
+JD_PREFILTER_HIGH_THRESHOLD = float(os.getenv("JD_PREFILTER_HIGH_THRESHOLD", "1.01"))
+# Weight of the rule-based skill overlap vs embedding cosine in the pre-score
+JD_PREFILTER_SKILL_WEIGHT = float(os.getenv("JD_PREFILTER_SKILL_WEIGHT", "0.5"))
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+def prefilter_jd_match(
+    resume_text: str,
+    job_description: str,
+    target_role: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Fast local pre-score of a resume/JD pair.
+    
+    Blends embedding cosine similarity with the rule-based skill overlap.
+    If either signal is unavailable (embedding model not loaded yet, or no
+    known skills in the JD) the other is used alone; with neither, the pair
+    goes to the LLM. The model is never loaded on the request path: while it
+    is cold, a background warm-up is started and only skill overlap is used.
+    
+    Returns:
+        Dict with the pre-score components, the decision ("rule_based" or
+        "llm") and the rule-based result, reusable as the fallback answer
+    """
+    from app.ai import semantic_role_engine
+
+    jd_keywords = extract_keywords(job_description)
+    rule_result = rule_based_jd_match(resume_text, job_description, target_role, jd_keywords)
+    skill_overlap = rule_result["ats_match_score"] / 100 if jd_keywords else None
+    
+    similarity = None
+    if semantic_role_engine.is_ready():
+        try:
+            from app.ai.embedding_engine import get_embedding_engine
+            
+            resume_vec, jd_vec = get_embedding_engine().encode_many([resume_text, job_description])
+            similarity = max(0.0, float(resume_vec @ jd_vec))
+        except Exception as e:
+            print(f"JD pre-filter embeddings unavailable, using skill overlap only: {str(e)}")
+    else:
+        semantic_role_engine.warm_up()
+    
+    if similarity is None:
+        score = skill_overlap
+    elif skill_overlap is None:
+        score = similarity
+    else:
+        score = JD_PREFILTER_SKILL_WEIGHT * skill_overlap + (1 - JD_PREFILTER_SKILL_WEIGHT) * similarity
+    
+    decision = "llm"
+    if score is not None and (score < JD_PREFILTER_THRESHOLD or score >= JD_PREFILTER_HIGH_THRESHOLD):
+        decision = "rule_based"
+    
+    return {
+        "score": round(score, 4) if score is not None else None,
+        "similarity": round(similarity, 4) if similarity is not None else None,
+        "skill_overlap": round(skill_overlap, 4) if skill_overlap is not None else None,
+        "decision": decision,
+        "rule_result": rule_result
+    }
+
+# Bump when JD_MATCH_SYSTEM_PROMPT or the user prompt template changes (LLM response cache key)
+PROMPT_VERSION = "jd-match-v2"
+
+# Token budgets for the resume excerpt and the JD in the LLM prompt
+JD_MATCH_RESUME_TOKEN_BUDGET = int(os.getenv("JD_MATCH_RESUME_TOKEN_BUDGET", "2000"))
+JD_MATCH_JD_TOKEN_BUDGET = int(os.getenv("JD_MATCH_JD_TOKEN_BUDGET", "1500"))
+# Resume sections that matter for JD matching, most valuable first
+JD_MATCH_SECTION_PRIORITY = (
+    SectionType.SKILLS, SectionType.EXPERIENCE, SectionType.PROJECTS,
+    SectionType.SUMMARY, SectionType.CERTIFICATIONS, SectionType.EDUCATION
+)
 
 JD_MATCH_SYSTEM_PROMPT = """You are an ATS (Applicant Tracking System) used by large software companies.
 
@@ -241,24 +267,9 @@ Rules:
 • Think like an enterprise ATS"""
 
 
-def compare_resume_with_jd(
-    resume_text: str,
-    job_description: str,
-    target_role: Optional[str] = None
-) -> Dict[str, Any]:
-    """
-    Compares resume with job description and calculates ATS match score
-    
-    Args:
-        resume_text: Full resume text
-        job_description: Job description text
-    
-    Returns:
-        Dict with match analysis
-    """
-    wait_for_slot()
-
-    user_prompt = f"""Compare the following resume with the given Job Description.
+# Static task instructions: sent before the resume and JD, identical on every
+# call so provider-side prompt caching can reuse the prefix
+JD_MATCH_INSTRUCTIONS = """Compare the resume with the Job Description given below.
 
 Instructions:
 1. Calculate ATS match percentage (0–100)
@@ -268,60 +279,143 @@ Instructions:
 5. Determine role fit (Strong / Moderate / Weak)
 6. Suggest exact improvements to increase ATS score
 
-Resume:
-\"\"\"{resume_text}\"\"\"
-
-Job Description:
-\"\"\"{job_description}\"\"\"
-
 Return ONLY structured JSON with this exact format:
-{{
+{
   "ats_match_score": 78,
   "role_fit": "Moderate",
   "matched_skills": ["python", "react", "node.js"],
   "missing_skills": ["docker", "aws"],
   "matched_responsibilities": ["Built REST APIs", "Frontend-backend integration"],
   "missing_responsibilities": ["CI/CD pipelines", "Cloud deployment"],
-  "keyword_gap_analysis": {{
+  "keyword_gap_analysis": {
     "present_keywords": ["api", "database", "frontend"],
     "missing_keywords": ["microservices", "cloud"]
-  }},
+  },
   "ats_improvement_suggestions": [
     "Add Docker usage in projects",
     "Mention cloud deployment experience",
     "Include CI/CD tools if applicable"
   ]
-}}"""
+}"""
+
+
+def _jd_match_messages(resume_text: str, job_description: str) -> List[Dict[str, str]]:
+    resume_excerpt = fit_resume(resume_text, JD_MATCH_RESUME_TOKEN_BUDGET, JD_MATCH_SECTION_PRIORITY)
+    jd_excerpt = truncate_to_tokens(job_description, JD_MATCH_JD_TOKEN_BUDGET)
+    request_content = f"""Resume:
+\"\"\"{resume_excerpt}\"\"\"
+
+Job Description:
+\"\"\"{jd_excerpt}\"\"\""""
+
+    return build_messages(JD_MATCH_SYSTEM_PROMPT, JD_MATCH_INSTRUCTIONS, request_content)
+
+
+def _finalize_llm_match(result: Any, prefilter: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Post-process the LLM result to ensure it matches our expected format."""
+    if not isinstance(result, dict):
+        raise ValueError("Invalid response format from LLM")
+
+    # Ensure all required fields are present
+    result.setdefault("ats_match_score", 0)
+    result.setdefault("role_fit", "Unknown")
+    result.setdefault("matched_skills", [])
+    result.setdefault("missing_skills", [])
+    result.setdefault("ats_improvement_suggestions", [])
+    result["fallback_used"] = False
+    if prefilter:
+        result["prefilter"] = {k: v for k, v in prefilter.items() if k != "rule_result"}
+    return result
+
+
+def _prefilter_result(prefilter: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The local answer for a clear-cut pair, or None if the LLM should decide."""
+    if prefilter["decision"] != "rule_based":
+        return None
+    result = prefilter["rule_result"]
+    result["prefilter"] = {k: v for k, v in prefilter.items() if k != "rule_result"}
+    return result
+
+
+def compare_resume_with_jd(
+    resume_text: str,
+    job_description: str,
+    target_role: Optional[str] = None,
+    use_cache: bool = True,
+    plan: str = "free"
+) -> Dict[str, Any]:
+    """
+    Compares resume with job description and calculates ATS match score
+    
+    Args:
+        resume_text: Full resume text
+        job_description: Job description text
+        use_cache: False bypasses the LLM response cache
+        plan: The user's plan, for model routing
+    
+    Returns:
+        Dict with match analysis
+    """
+    prefilter = None
+    if JD_PREFILTER_ENABLED:
+        prefilter = prefilter_jd_match(resume_text, job_description, target_role)
+        local_result = _prefilter_result(prefilter)
+        if local_result is not None:
+            # Clear-cut pair: answer locally without waiting for an LLM slot
+            return local_result
 
+    messages = _jd_match_messages(resume_text, job_description)
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        # Rate-limited JSON-mode call (shared token bucket)
+        result = chat_json(
+            messages,
+            route=model_router.route_messages("jd_match", messages, plan),
             temperature=0.2,
-            messages=[
-                {"role": "system", "content": JD_MATCH_SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt}
-            ],
-            response_format={"type": "json_object"}
+            prompt_version=PROMPT_VERSION,
+            use_cache=use_cache
         )
-
-        result = json.loads(response.choices[0].message.content)
-        
-        # Post-process the result to ensure it matches our expected format
-        if not isinstance(result, dict):
-            raise ValueError("Invalid response format from LLM")
-            
-        # Ensure all required fields are present
-        result.setdefault("ats_match_score", 0)
-        result.setdefault("role_fit", "Unknown")
-        result.setdefault("matched_skills", [])
-        result.setdefault("missing_skills", [])
-        result.setdefault("ats_improvement_suggestions", [])
-        result["fallback_used"] = False
-        
-        return result
+        return _finalize_llm_match(result, prefilter)
         
     except Exception as e:
         print(f"Error in LLM-based JD matching: {str(e)}")
         # Fall back to rule-based matching with the target role
+        if prefilter:
+            return prefilter["rule_result"]
         return rule_based_jd_match(resume_text, job_description, target_role)
 
+
+async def compare_resume_with_jd_async(
+    resume_text: str,
+    job_description: str,
+    target_role: Optional[str] = None,
+    use_cache: bool = True,
+    plan: str = "free"
+) -> Dict[str, Any]:
+    """
+    compare_resume_with_jd for async routes: the pre-filter (embeddings) runs
+    in a worker thread and the LLM call is awaited, so the event loop keeps
+    serving other requests meanwhile.
+    """
+    prefilter = None
+    if JD_PREFILTER_ENABLED:
+        prefilter = await asyncio.to_thread(prefilter_jd_match, resume_text, job_description, target_role)
+        local_result = _prefilter_result(prefilter)
+        if local_result is not None:
+            return local_result
+
+    messages = _jd_match_messages(resume_text, job_description)
+    try:
+        result = await chat_json_async(
+            messages,
+            route=await asyncio.to_thread(model_router.route_messages, "jd_match", messages, plan),
+            temperature=0.2,
+            prompt_version=PROMPT_VERSION,
+            use_cache=use_cache
+        )
+        return _finalize_llm_match(result, prefilter)
+
+    except Exception as e:
+        print(f"Error in LLM-based JD matching: {str(e)}")
+        if prefilter:
+            return prefilter["rule_result"]
+        return rule_based_jd_match(resume_text, job_description, target_role)
@@ -0,0 +1,145 @@
+"""
+Incremental JSON Section Parser
+
+Parses a JSON object as it streams in from the LLM and reports each piece
+the moment it is complete, without waiting for the closing brace:
+
+    {"event": "item", "section": "rewritten_experience", "index": 0, "value": "..."}
+        an element of a top-level array (a bullet, a project) has closed
+    {"event": "section", "section": "rewritten_summary", "value": "..."}
+        a top-level value has closed
+
+Only the top-level object is tracked; nested values are sliced out of the
+buffer once they close and decoded with json.loads.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+_INVALID = object()
+
+
+class IncrementalJSONParser:
+    """Feed text chunks of one JSON object; get completed sections back."""
+
+    def __init__(self):
+        self.text = ""
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = True
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._value_is_array = False
+        self._item_start: Optional[int] = None
+        self._item_index = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Append a chunk and scan it.
+
+        Args:
+            chunk: The next piece of streamed text
+
+        Returns:
+            List[Dict]: item/section events completed by this chunk, in order
+        """
+        self.text += chunk
+        events: List[Dict[str, Any]] = []
+        text = self.text
+
+        while self._pos < len(text) and not self.done:
+            i = self._pos
+            c = text[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._close_string(i, events)
+                continue
+
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key_start = i
+                else:
+                    self._start_value(i)
+            elif c in "{[":
+                if self._depth == 1 and self._value_start is None:
+                    self._value_is_array = c == "["
+                    self._item_index = 0
+                self._start_value(i)
+                self._depth += 1
+            elif c in "}]":
+                # A pending primitive item or value ends at the closing bracket
+                if self._depth == 2 and self._value_is_array and self._item_start is not None:
+                    self._emit_item(text[self._item_start:i], events)
+                if self._depth == 1 and self._value_start is not None:
+                    self._emit_section(text[self._value_start:i], events)
+                self._depth -= 1
+                if self._depth == 2 and self._value_is_array and self._item_start is not None:
+                    self._emit_item(text[self._item_start:i + 1], events)
+                elif self._depth == 1 and self._value_start is not None:
+                    self._emit_section(text[self._value_start:i + 1], events)
+                elif self._depth == 0:
+                    self.done = True
+            elif c == ":" and self._depth == 1:
+                self._expect_key = False
+            elif c == ",":
+                if self._depth == 1:
+                    if self._value_start is not None:
+                        self._emit_section(text[self._value_start:i], events)
+                    self._expect_key = True
+                elif self._depth == 2 and self._value_is_array and self._item_start is not None:
+                    self._emit_item(text[self._item_start:i], events)
+            elif not c.isspace():
+                self._start_value(i)
+
+        return events
+
+    def result(self) -> Dict[str, Any]:
+        """The whole object, once the stream has finished."""
+        return json.loads(self.text)
+
+    def _start_value(self, i: int) -> None:
+        if self._depth == 1 and not self._expect_key and self._value_start is None:
+            self._value_start = i
+        elif self._depth == 2 and self._value_is_array and self._value_start is not None and self._item_start is None:
+            self._item_start = i
+
+    def _close_string(self, i: int, events: List[Dict[str, Any]]) -> None:
+        if self._depth == 1 and self._key_start is not None:
+            self._key = json.loads(self.text[self._key_start:i + 1])
+            self._key_start = None
+        elif self._depth == 1 and self._value_start is not None:
+            self._emit_section(self.text[self._value_start:i + 1], events)
+        elif self._depth == 2 and self._value_is_array and self._item_start is not None:
+            self._emit_item(self.text[self._item_start:i + 1], events)
+
+    def _emit_item(self, fragment: str, events: List[Dict[str, Any]]) -> None:
+        self._item_start = None
+        value = _loads(fragment)
+        if value is not _INVALID:
+            events.append({"event": "item", "section": self._key, "index": self._item_index, "value": value})
+        self._item_index += 1
+
+    def _emit_section(self, fragment: str, events: List[Dict[str, Any]]) -> None:
+        self._value_start = None
+        self._value_is_array = False
+        value = _loads(fragment)
+        if value is not _INVALID:
+            events.append({"event": "section", "section": self._key, "value": value})
+
+
+def _loads(fragment: str) -> Any:
+    try:
+        return json.loads(fragment)
+    except ValueError:
+        return _INVALID
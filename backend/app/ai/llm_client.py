@@ -0,0 +1,548 @@
+"""
+Shared OpenAI Client
+
+One place where the AI engines call the chat completions API, so rate
+limiting is applied consistently: capacity is reserved from the distributed
+token bucket before each call, the bucket adapts to the x-ratelimit-*
+headers of every response, and the reserved token estimate is reconciled
+with the actual usage.
+
+Responses are cached by model, prompt template version and a hash of the
+normalized messages, so byte-identical (or whitespace-only different)
+requests are answered from Redis without touching the rate limiter.
+
+chat_json_async is the same call for FastAPI handlers: it uses AsyncOpenAI
+and waits for rate-limit capacity with asyncio.sleep, so a request waiting
+on OpenAI does not block the event loop; its Redis bookkeeping (cache,
+breaker, limiter, latency and routing stats) runs in worker threads.
+stream_chat_json_async yields the completion text as it is generated (see
+app.ai.json_stream).
+
+All three go through a shared circuit breaker (app.utils.circuit_breaker):
+while OpenAI is failing (quota, auth, outage) they raise CircuitOpenError
+immediately, before waiting on the rate limiter, so callers fall back to
+the rule-based engines without dead time.
+
+Every call has a deadline (LLM_TIMEOUT, or the timeout argument). With
+hedging on, a call that has not answered by the recent p95 latency for its
+model and prompt version gets a duplicate request, if the rate limiter has
+capacity for it right now; the first answer wins, and the loser's token
+reservation is given back. Latencies and hedge outcomes are recorded in
+app.utils.llm_latency.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from dotenv import load_dotenv
+from openai import (
+    APIConnectionError,
+    AsyncOpenAI,
+    AuthenticationError,
+    InternalServerError,
+    OpenAI,
+    PermissionDeniedError,
+    RateLimitError,
+)
+
+from app.utils import openai_rate_limiter
+from app.utils import llm_latency
+from app.ai import model_router
+from app.utils.circuit_breaker import CircuitBreaker
+
+load_dotenv()
+
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+openai_breaker = CircuitBreaker("openai")
+# Errors that say OpenAI is unusable right now (as opposed to a bad request)
+OUTAGE_ERRORS = (
+    RateLimitError,
+    APIConnectionError,  # includes timeouts
+    InternalServerError,
+    AuthenticationError,
+    PermissionDeniedError,
+)
+
+DEFAULT_MODEL = openai_rate_limiter.DEFAULT_MODEL
+# Completion size reserved from the TPM bucket when max_tokens is not given
+DEFAULT_EXPECTED_OUTPUT_TOKENS = int(os.getenv("OPENAI_EXPECTED_OUTPUT_TOKENS", "1500"))
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+
+# Per-call deadline (seconds) unless the caller passes its own
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+# Hedged requests: duplicate a call still pending at the p95 latency
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "2"))
+# Used until there are enough latency samples for the percentile
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "10"))
+
+class CompletionTruncated(ValueError):
+    """The completion hit max_tokens (finish_reason "length"), so its JSON is cut off."""
+
+
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def make_llm_cache_key(
+    messages: List[Dict[str, str]],
+    model: str,
+    prompt_version: str,
+    temperature: float,
+    max_tokens: Optional[int] = None
+) -> str:
+    """model + prompt template version + hash of the normalized request."""
+    normalized = json.dumps(
+        {
+            "messages": [
+                {"role": m.get("role"), "content": _WHITESPACE.sub(" ", m.get("content", "")).strip()}
+                for m in messages
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        },
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    return f"{model}:{prompt_version}:{digest}"
+
+
+def estimate_request_tokens(messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> int:
+    """Prompt estimate plus the completion budget, as reserved from the TPM bucket."""
+    prompt = sum(openai_rate_limiter.estimate_tokens(m.get("content", "")) for m in messages)
+    return prompt + (max_tokens or DEFAULT_EXPECTED_OUTPUT_TOKENS)
+
+
+def chat_json(
+    messages: List[Dict[str, str]],
+    *,
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.2,
+    max_tokens: Optional[int] = None,
+    prompt_version: str = "v1",
+    use_cache: bool = True,
+    timeout: Optional[float] = None,
+    hedge: Optional[bool] = None,
+    route: Optional[model_router.RouteDecision] = None
+) -> Dict[str, Any]:
+    """
+    Rate-limited, cached chat completion in JSON mode.
+
+    Args:
+        messages: Chat messages (system + user)
+        model: OpenAI model name
+        temperature: Sampling temperature
+        max_tokens: Optional completion cap (also used for the TPM reservation)
+        prompt_version: The caller's prompt template version; bump it when
+            the template changes so stale responses are not served
+        use_cache: False skips the cache lookup (the fresh response is still stored)
+        timeout: Deadline for each attempt in seconds (default LLM_TIMEOUT)
+        hedge: Send a duplicate request at the p95 deadline (default LLM_HEDGE_ENABLED)
+        route: A model_router decision; overrides model (and max_tokens, if the
+            decision carries one), and the call's latency and token usage are
+            recorded against it (failures and cache hits too, see
+            model_router.record_outcome)
+
+    Returns:
+        Dict: The parsed JSON object returned by the model
+
+    Raises:
+        RateLimitTimeout: No capacity within OPENAI_ACQUIRE_TIMEOUT
+        CompletionTruncated: The completion was cut off at max_tokens
+        openai.OpenAIError / ValueError: API or JSON errors (callers fall back)
+    """
+    started = time.time()
+    if route is not None:
+        model = route.model
+        max_tokens = route.max_tokens if route.max_tokens is not None else max_tokens
+    cache_key = make_llm_cache_key(messages, model, prompt_version, temperature, max_tokens)
+    if use_cache:
+        cached = _cached_response(cache_key)
+        if cached is not None:
+            if route is not None:
+                model_router.record_outcome(route, time.time() - started, None, outcome="cache")
+            return cached
+
+    try:
+        return _complete(
+            messages, model, temperature, max_tokens, prompt_version, timeout, hedge, route, cache_key, started
+        )
+    except Exception:
+        if route is not None:
+            model_router.record_outcome(route, time.time() - started, None, outcome="error")
+        raise
+
+
+async def chat_json_async(
+    messages: List[Dict[str, str]],
+    *,
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.2,
+    max_tokens: Optional[int] = None,
+    prompt_version: str = "v1",
+    use_cache: bool = True,
+    timeout: Optional[float] = None,
+    hedge: Optional[bool] = None,
+    route: Optional[model_router.RouteDecision] = None
+) -> Dict[str, Any]:
+    """
+    chat_json for async callers: same cache, limiter, deadline, hedging and
+    error behaviour, but the capacity wait and the HTTP call never block the
+    event loop. A losing hedge attempt is cancelled.
+    """
+    started = time.time()
+    if route is not None:
+        model = route.model
+        max_tokens = route.max_tokens if route.max_tokens is not None else max_tokens
+    cache_key = make_llm_cache_key(messages, model, prompt_version, temperature, max_tokens)
+    if use_cache:
+        cached = await asyncio.to_thread(_cached_response, cache_key)
+        if cached is not None:
+            if route is not None:
+                await asyncio.to_thread(
+                    model_router.record_outcome, route, time.time() - started, None, outcome="cache"
+                )
+            return cached
+
+    try:
+        return await _complete_async(
+            messages, model, temperature, max_tokens, prompt_version, timeout, hedge, route, cache_key, started
+        )
+    except Exception:
+        if route is not None:
+            await asyncio.to_thread(
+                model_router.record_outcome, route, time.time() - started, None, outcome="error"
+            )
+        raise
+
+
+async def stream_chat_json_async(
+    messages: List[Dict[str, str]],
+    *,
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.2,
+    max_tokens: Optional[int] = None,
+    prompt_version: str = "v1",
+    use_cache: bool = True,
+    timeout: Optional[float] = None,
+    route: Optional[model_router.RouteDecision] = None
+) -> AsyncIterator[str]:
+    """
+    Streaming chat_json_async: yields JSON text chunks as the model emits them.
+
+    A cached response is yielded as a single chunk. The complete text is
+    cached once the stream ends, if it parses as a JSON object.
+    """
+    started = time.time()
+    if route is not None:
+        model = route.model
+        max_tokens = route.max_tokens if route.max_tokens is not None else max_tokens
+    cache_key = make_llm_cache_key(messages, model, prompt_version, temperature, max_tokens)
+    if use_cache and LLM_CACHE_ENABLED:
+        from app.ai.cache import llm_response_cache
+
+        cached = await asyncio.to_thread(llm_response_cache.get, cache_key)
+        if cached is not None:
+            if route is not None:
+                await asyncio.to_thread(
+                    model_router.record_outcome, route, time.time() - started, None, outcome="cache"
+                )
+            yield cached.decode("utf-8")
+            return
+
+    try:
+        await asyncio.to_thread(openai_breaker.check)
+        reserved = estimate_request_tokens(messages, max_tokens)
+        await openai_rate_limiter.acquire_async(reserved, model)
+
+        params = _request_params(messages, model, temperature, max_tokens, timeout)
+        params["stream"] = True
+        params["stream_options"] = {"include_usage": True}
+        try:
+            raw = await async_client.chat.completions.with_raw_response.create(**params)
+        except OUTAGE_ERRORS as e:
+            await asyncio.to_thread(_record_outage, e, model)
+            raise
+
+        await asyncio.to_thread(openai_rate_limiter.update_from_headers, raw.headers, model)
+        parts = []
+        total_tokens = None
+        try:
+            async for chunk in raw.parse():
+                if chunk.usage is not None:
+                    total_tokens = chunk.usage.total_tokens
+                    await asyncio.to_thread(openai_rate_limiter.record_usage, reserved, total_tokens, model)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        except OUTAGE_ERRORS as e:
+            await asyncio.to_thread(_record_outage, e, model)
+            raise
+    except Exception:
+        if route is not None:
+            await asyncio.to_thread(
+                model_router.record_outcome, route, time.time() - started, None, outcome="error"
+            )
+        raise
+    await asyncio.to_thread(openai_breaker.record_success)
+    if route is not None:
+        await asyncio.to_thread(model_router.record_outcome, route, time.time() - started, total_tokens)
+
+    content = "".join(parts)
+    if LLM_CACHE_ENABLED:
+        try:
+            result = json.loads(content)
+        except ValueError:
+            return
+        if isinstance(result, dict) and "error" not in result:
+            from app.ai.cache import llm_response_cache
+
+            await asyncio.to_thread(llm_response_cache.set, cache_key, content.encode("utf-8"))
+
+
+def _complete(
+    messages: List[Dict[str, str]],
+    model: str,
+    temperature: float,
+    max_tokens: Optional[int],
+    prompt_version: str,
+    timeout: Optional[float],
+    hedge: Optional[bool],
+    route: Optional[model_router.RouteDecision],
+    cache_key: str,
+    started: float
+) -> Dict[str, Any]:
+    """chat_json after a cache miss: breaker, limiter, the call(s) and bookkeeping."""
+    openai_breaker.check()
+    reserved = estimate_request_tokens(messages, max_tokens)
+    openai_rate_limiter.acquire(reserved, model)
+
+    params = _request_params(messages, model, temperature, max_tokens, timeout)
+    if not (LLM_HEDGE_ENABLED if hedge is None else hedge):
+        raw = _create(params, prompt_version)
+        return _handle_response(raw, reserved, model, cache_key, route, started)
+
+    primary = _hedge_executor.submit(_create, params, prompt_version)
+    try:
+        raw = primary.result(timeout=hedge_delay(model, prompt_version))
+        llm_latency.record_hedge(model, prompt_version, hedged=False, winner="primary")
+        return _handle_response(raw, reserved, model, cache_key, route, started)
+    except FutureTimeout:
+        pass
+
+    if not openai_rate_limiter.try_acquire(reserved, model):
+        raw = primary.result()
+        llm_latency.record_hedge(model, prompt_version, hedged=False, winner="primary")
+        return _handle_response(raw, reserved, model, cache_key, route, started)
+
+    attempts = {primary: "primary", _hedge_executor.submit(_create, params, prompt_version): "hedge"}
+    prompt_tokens = reserved - (max_tokens or DEFAULT_EXPECTED_OUTPUT_TOKENS)
+    pending = set(attempts)
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                raw = future.result()
+            except Exception as e:
+                error = e
+                continue
+            # The loser keeps running in its thread; its latency is still
+            # recorded, and its reservation is settled once it finishes
+            for loser in attempts:
+                if loser is not future:
+                    loser.add_done_callback(
+                        lambda f: _settle_hedge_loser(
+                            None if f.cancelled() or f.exception() else f.result(),
+                            reserved, prompt_tokens, model
+                        )
+                    )
+            llm_latency.record_hedge(model, prompt_version, hedged=True, winner=attempts[future])
+            return _handle_response(raw, reserved, model, cache_key, route, started)
+    raise error
+
+
+async def _complete_async(
+    messages: List[Dict[str, str]],
+    model: str,
+    temperature: float,
+    max_tokens: Optional[int],
+    prompt_version: str,
+    timeout: Optional[float],
+    hedge: Optional[bool],
+    route: Optional[model_router.RouteDecision],
+    cache_key: str,
+    started: float
+) -> Dict[str, Any]:
+    await asyncio.to_thread(openai_breaker.check)
+    reserved = estimate_request_tokens(messages, max_tokens)
+    await openai_rate_limiter.acquire_async(reserved, model)
+
+    params = _request_params(messages, model, temperature, max_tokens, timeout)
+    if not (LLM_HEDGE_ENABLED if hedge is None else hedge):
+        raw = await _create_async(params, prompt_version)
+        return await asyncio.to_thread(_handle_response, raw, reserved, model, cache_key, route, started)
+
+    primary = asyncio.ensure_future(_create_async(params, prompt_version))
+    delay = await asyncio.to_thread(hedge_delay, model, prompt_version)
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done or not await asyncio.to_thread(openai_rate_limiter.try_acquire, reserved, model):
+        raw = await primary
+        await asyncio.to_thread(llm_latency.record_hedge, model, prompt_version, hedged=False, winner="primary")
+        return await asyncio.to_thread(_handle_response, raw, reserved, model, cache_key, route, started)
+
+    attempts = {primary: "primary", asyncio.ensure_future(_create_async(params, prompt_version)): "hedge"}
+    prompt_tokens = reserved - (max_tokens or DEFAULT_EXPECTED_OUTPUT_TOKENS)
+    pending = set(attempts)
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                # Cancel the loser and give back what it had reserved
+                for loser in attempts:
+                    if loser is not task:
+                        loser_raw = loser.result() if loser.done() and loser.exception() is None else None
+                        loser.cancel()
+                        await asyncio.to_thread(_settle_hedge_loser, loser_raw, reserved, prompt_tokens, model)
+                await asyncio.to_thread(
+                    llm_latency.record_hedge, model, prompt_version, hedged=True, winner=attempts[task]
+                )
+                return await asyncio.to_thread(
+                    _handle_response, task.result(), reserved, model, cache_key, route, started
+                )
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def hedge_delay(model: str, prompt_version: str) -> float:
+    """Seconds to wait before hedging: the recent latency percentile, floored."""
+    delay = llm_latency.latency_percentile(model, prompt_version, LLM_HEDGE_PERCENTILE)
+    return max(LLM_HEDGE_MIN_DELAY, delay if delay is not None else LLM_HEDGE_DEFAULT_DELAY)
+
+
+def _settle_hedge_loser(raw, reserved: int, prompt_tokens: int, model: str) -> None:
+    """
+    Reconcile the losing attempt's reservation: its actual usage if it
+    finished, else only the prompt (a cancelled or failed request generated
+    no completion).
+    """
+    used = prompt_tokens
+    if raw is not None:
+        try:
+            usage = raw.parse().usage
+            if usage is not None:
+                used = usage.total_tokens
+        except Exception:
+            pass
+    openai_rate_limiter.record_usage(reserved, used, model)
+
+
+def _create(params: Dict[str, Any], prompt_version: str):
+    """One attempt: the raw response, with breaker and latency bookkeeping."""
+    start = time.time()
+    try:
+        raw = client.chat.completions.with_raw_response.create(**params)
+    except OUTAGE_ERRORS as e:
+        _record_outage(e, params["model"])
+        raise
+    _record_attempt(params["model"], prompt_version, time.time() - start)
+    return raw
+
+
+async def _create_async(params: Dict[str, Any], prompt_version: str):
+    start = time.time()
+    try:
+        raw = await async_client.chat.completions.with_raw_response.create(**params)
+    except OUTAGE_ERRORS as e:
+        await asyncio.to_thread(_record_outage, e, params["model"])
+        raise
+    await asyncio.to_thread(_record_attempt, params["model"], prompt_version, time.time() - start)
+    return raw
+
+
+def _record_attempt(model: str, prompt_version: str, latency: float) -> None:
+    openai_breaker.record_success()
+    llm_latency.record_latency(model, prompt_version, latency)
+
+
+def _record_outage(error: Exception, model: str) -> None:
+    if isinstance(error, RateLimitError):
+        # Make every process back off until the provider's reset
+        openai_rate_limiter.penalize(error.response.headers, model)
+    openai_breaker.record_failure(error)
+
+
+def _request_params(
+    messages: List[Dict[str, str]],
+    model: str,
+    temperature: float,
+    max_tokens: Optional[int],
+    timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    params = {
+        "model": model,
+        "temperature": temperature,
+        "messages": messages,
+        "response_format": {"type": "json_object"},
+        "timeout": timeout or LLM_TIMEOUT,
+    }
+    if max_tokens:
+        params["max_tokens"] = max_tokens
+    return params
+
+
+def _cached_response(cache_key: str) -> Optional[Dict[str, Any]]:
+    if not LLM_CACHE_ENABLED:
+        return None
+    from app.ai.cache import llm_response_cache
+
+    cached = llm_response_cache.get(cache_key)
+    return json.loads(cached) if cached is not None else None
+
+
+def _handle_response(
+    raw,
+    reserved: int,
+    model: str,
+    cache_key: str,
+    route: Optional[model_router.RouteDecision] = None,
+    started: Optional[float] = None
+) -> Dict[str, Any]:
+    """Feed headers and usage back to the limiter, parse, and cache the answer."""
+    openai_rate_limiter.update_from_headers(raw.headers, model)
+    response = raw.parse()
+    if response.usage is not None:
+        openai_rate_limiter.record_usage(reserved, response.usage.total_tokens, model)
+
+    choice = response.choices[0]
+    if choice.finish_reason == "length":
+        raise CompletionTruncated("Completion was cut off at max_tokens")
+    content = choice.message.content
+    result = json.loads(content)
+    # Failures (including the two above) are recorded by the caller
+    if route is not None:
+        model_router.record_outcome(
+            route, time.time() - started, response.usage.total_tokens if response.usage else None
+        )
+    if LLM_CACHE_ENABLED and isinstance(result, dict) and "error" not in result:
+        from app.ai.cache import llm_response_cache
+
+        llm_response_cache.set(cache_key, content.encode("utf-8"))
+    return result
@@ -0,0 +1,219 @@
+"""
+LLM Model Router
+
+Chooses the model for each LLM call from the prompt's token count, the
+calling endpoint's latency target (SLO) and the user's plan (the "plan"
+field of the user record, set by the Stripe checkout webhook):
+
+- free plans always get the fast tier
+- paid plans get the quality tier when its predicted latency for this
+  input fits the endpoint's SLO, otherwise the fast tier
+- very large inputs go to the fast tier regardless of plan
+
+Predicted latency is the recorded p95 for the model, endpoint and input
+size bucket (see app.utils.llm_latency) once there is enough history, and a
+throughput estimate before that. Completion length is left to the caller:
+max_tokens is only passed through, never imposed.
+
+Every routed call is logged with its latency and token usage, and counted
+per endpoint and model (calls, SLO hits, errors, tokens) for GET /status/llm,
+so the fast tier can be shown to meet the SLO. Failed and timed-out calls
+count as SLO misses; answers from the response cache are counted apart.
+"""
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from redis.exceptions import RedisError
+
+from app.ai.prompt_builder import count_tokens
+from app.core.redis_cache import get_redis
+from app.utils import llm_latency
+
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+QUALITY_MODEL = os.getenv("LLM_QUALITY_MODEL", "gpt-4o")
+
+# Inputs above this many tokens always use the fast tier
+LARGE_INPUT_TOKENS = int(os.getenv("LLM_ROUTER_LARGE_INPUT_TOKENS", "8000"))
+
+FREE_PLANS = ("free", "", None)
+
+# endpoint -> (latency SLO in seconds, largest expected completion, typical completion)
+# in tokens. Both only feed the latency prediction; completions are not capped
+# unless the caller passes max_tokens.
+ENDPOINTS = {
+    "improvements": (float(os.getenv("LLM_SLO_IMPROVEMENTS", "45")), 4000, 2500),
+    "jd_match": (float(os.getenv("LLM_SLO_JD_MATCH", "10")), 1000, 400),
+    "rewrite": (float(os.getenv("LLM_SLO_REWRITE", "20")), 2500, 1200),
+    "rewrite_section": (float(os.getenv("LLM_SLO_REWRITE_SECTION", "8")), 900, 300),
+}
+
+# Rough throughput used before there is latency history:
+# model -> (fixed overhead s, prompt tokens/s, completion tokens/s)
+_THROUGHPUT = {
+    FAST_MODEL: (0.5, 8000.0, 140.0),
+    QUALITY_MODEL: (0.8, 4000.0, 80.0),
+}
+
+_KEY_PREFIX = "llm:routing"
+
+# Upper bounds (input tokens) of the latency history buckets; the last bucket is open
+INPUT_TOKEN_BUCKETS = (500, 1000, 2000, 4000, 8000)
+
+
+@dataclass
+class RouteDecision:
+    endpoint: str
+    model: str
+    max_tokens: Optional[int]  # None: uncapped
+    tier: str
+    reason: str
+    input_tokens: int
+    plan: str
+    slo_seconds: float
+    predicted_seconds: float
+
+
+def predict_latency(model: str, endpoint: str, input_tokens: int, max_tokens: Optional[int] = None) -> float:
+    """Recorded p95 for this model, endpoint and input size, or a throughput estimate."""
+    recorded = llm_latency.latency_percentile(model, _latency_name(endpoint, input_tokens), 0.95)
+    if recorded is not None:
+        return recorded
+    overhead, prompt_rate, completion_rate = _THROUGHPUT.get(model, _THROUGHPUT[FAST_MODEL])
+    _, expected_max, typical = ENDPOINTS[endpoint]
+    output_tokens = min(max_tokens or expected_max, typical)
+    return overhead + input_tokens / prompt_rate + output_tokens / completion_rate
+
+
+def _latency_name(endpoint: str, input_tokens: int) -> str:
+    # End-to-end latency per endpoint and input size bucket, next to the
+    # per-prompt-version samples, so a long prompt is not predicted from short ones
+    bucket = next((f"le{b}" for b in INPUT_TOKEN_BUCKETS if input_tokens <= b), f"gt{INPUT_TOKEN_BUCKETS[-1]}")
+    return f"route:{endpoint}:{bucket}"
+
+
+def route(endpoint: str, input_tokens: int, plan: Optional[str] = "free", max_tokens: Optional[int] = None) -> RouteDecision:
+    """
+    Pick the model for one call.
+
+    Args:
+        endpoint: Key of ENDPOINTS (the caller's latency target)
+        input_tokens: Prompt size (see app.ai.prompt_builder.count_tokens)
+        plan: The user's plan ("free" unless they pay; see the users "plan" field)
+        max_tokens: The caller's completion cap, passed through unchanged
+            (None leaves the completion uncapped)
+
+    Returns:
+        RouteDecision
+    """
+    slo = ENDPOINTS[endpoint][0]
+    plan = (plan or "free").lower()
+
+    if plan in FREE_PLANS:
+        model, tier, reason = FAST_MODEL, "fast", "free plan"
+    elif input_tokens > LARGE_INPUT_TOKENS:
+        model, tier, reason = FAST_MODEL, "fast", f"input over {LARGE_INPUT_TOKENS} tokens"
+    else:
+        predicted = predict_latency(QUALITY_MODEL, endpoint, input_tokens, max_tokens)
+        if predicted <= slo:
+            model, tier, reason = QUALITY_MODEL, "quality", "quality tier fits SLO"
+        else:
+            model, tier, reason = FAST_MODEL, "fast", f"quality tier predicted {predicted:.1f}s > SLO"
+
+    return RouteDecision(
+        endpoint=endpoint,
+        model=model,
+        max_tokens=max_tokens,
+        tier=tier,
+        reason=reason,
+        input_tokens=input_tokens,
+        plan=plan,
+        slo_seconds=slo,
+        predicted_seconds=round(predict_latency(model, endpoint, input_tokens, max_tokens), 2),
+    )
+
+
+def route_messages(
+    endpoint: str,
+    messages: List[Dict[str, str]],
+    plan: Optional[str] = "free",
+    max_tokens: Optional[int] = None
+) -> RouteDecision:
+    """route() for a built prompt: counts its tokens first."""
+    input_tokens = sum(count_tokens(m.get("content", ""), FAST_MODEL) for m in messages)
+    return route(endpoint, input_tokens, plan, max_tokens)
+
+
+def record_outcome(
+    decision: RouteDecision,
+    latency: float,
+    total_tokens: Optional[int],
+    outcome: str = "ok"
+) -> None:
+    """
+    Log one routed call and add it to the per-endpoint/model counters.
+
+    Args:
+        decision: The call's route
+        latency: Seconds from the call's start to its answer or failure
+        total_tokens: Usage reported by the API, if any
+        outcome: "ok"; "error" for a failed or timed-out call (an SLO miss,
+            and a latency sample only if it ran past the SLO); or "cache" for
+            an answer from the response cache (only counted as a cache hit)
+    """
+    key = f"{_KEY_PREFIX}:{decision.endpoint}:{decision.model}"
+    if outcome == "cache":
+        try:
+            pipe = get_redis().pipeline()
+            pipe.hincrby(key, "cache_hits", 1)
+            pipe.sadd(f"{_KEY_PREFIX}:index", key)
+            pipe.execute()
+        except RedisError as e:
+            print(f"LLM routing record failed: {str(e)}")
+        return
+
+    met_slo = outcome == "ok" and latency <= decision.slo_seconds
+    if outcome == "ok" or latency > decision.slo_seconds:
+        llm_latency.record_latency(
+            decision.model, _latency_name(decision.endpoint, decision.input_tokens), latency
+        )
+    print(
+        f"LLM route endpoint={decision.endpoint} plan={decision.plan} model={decision.model} "
+        f"tier={decision.tier} reason='{decision.reason}' input_tokens={decision.input_tokens} "
+        f"max_tokens={decision.max_tokens} total_tokens={total_tokens} latency={latency:.2f}s "
+        f"slo={decision.slo_seconds:.0f}s met={met_slo} outcome={outcome}"
+    )
+    try:
+        pipe = get_redis().pipeline()
+        pipe.hincrby(key, "calls", 1)
+        pipe.hincrby(key, "slo_met", int(met_slo))
+        pipe.hincrby(key, "errors", int(outcome == "error"))
+        pipe.hincrbyfloat(key, "latency_total", round(latency, 3))
+        pipe.hincrby(key, "tokens_total", total_tokens or 0)
+        pipe.hset(key, "last_at", time.time())
+        pipe.sadd(f"{_KEY_PREFIX}:index", key)
+        pipe.execute()
+    except RedisError as e:
+        print(f"LLM routing record failed: {str(e)}")
+
+
+def routing_stats() -> Dict[str, Any]:
+    """Calls, SLO hit rate, errors, mean latency, tokens and cache hits per endpoint:model."""
+    try:
+        redis = get_redis()
+        stats = {}
+        for key in sorted(k.decode("utf-8") for k in redis.smembers(f"{_KEY_PREFIX}:index")):
+            raw = {k.decode("utf-8"): float(v) for k, v in redis.hgetall(key).items()}
+            calls = int(raw.get("calls", 0))
+            stats[key[len(_KEY_PREFIX) + 1:]] = {
+                "calls": calls,
+                "slo_met_rate": round(raw.get("slo_met", 0) / calls, 3) if calls else None,
+                "errors": int(raw.get("errors", 0)),
+                "mean_latency": round(raw.get("latency_total", 0) / calls, 2) if calls else None,
+                "tokens_total": int(raw.get("tokens_total", 0)),
+                "cache_hits": int(raw.get("cache_hits", 0)),
+            }
+        return stats
+    except RedisError as e:
+        return {"error": str(e)}
@@ -0,0 +1,94 @@
+"""
+Parsed Resume Artifact
+
+Parses a resume once and shares the result (lines, sections and extracted
+skills) across role prediction, ATS scoring, quality scoring and improvements,
+instead of every stage re-running ResumeParser on the raw text.
+"""
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, List
+
+from app.ai.section_parser import ResumeParser, Section, SectionType
+from app.ai.skill_engine import extract_skills, extract_skill_bits
+
+# One parser per process: its compiled patterns are reused for every resume
+_PARSER = ResumeParser()
+
+# Sections trusted for role prediction
+ROLE_SECTIONS = (SectionType.SKILLS, SectionType.EXPERIENCE, SectionType.PROJECTS)
+
+# Sections included in the normalized text used for ATS scoring
+ATS_SECTIONS = (
+    SectionType.SKILLS, SectionType.EXPERIENCE,
+    SectionType.PROJECTS, SectionType.EDUCATION
+)
+
+
+def get_parser() -> ResumeParser:
+    """Shared ResumeParser instance."""
+    return _PARSER
+
+
+@dataclass
+class ParsedResume:
+    raw_text: str
+    lines: List[str]
+    sections: Dict[SectionType, Section]
+
+    @classmethod
+    def from_text(cls, text: str) -> "ParsedResume":
+        """Parse resume text once into a shareable artifact."""
+        lines = ResumeParser.split_lines(text)
+        return cls(raw_text=text, lines=lines, sections=_PARSER.parse_lines(lines))
+
+    @cached_property
+    def sections_dict(self) -> Dict[str, str]:
+        """Section name -> content, as stored in Mongo and used for quality scoring."""
+        return {
+            section_type.value: section.content
+            for section_type, section in self.sections.items()
+            if hasattr(section, "content")
+        }
+
+    def section_content(self, section_type: SectionType) -> str:
+        section = self.sections.get(section_type)
+        return section.content if section else ""
+
+    @cached_property
+    def role_text(self) -> str:
+        """Skills, experience and projects text used for role prediction."""
+        return " ".join(self.section_content(t) for t in ROLE_SECTIONS)
+
+    @cached_property
+    def normalized_text(self) -> str:
+        """
+        Relevant sections joined for ATS scoring, falling back to the raw
+        text for edge-case PDFs where no sections were detected.
+        """
+        text = " ".join(
+            section.content
+            for section_type, section in self.sections.items()
+            if section_type in ATS_SECTIONS
+        )
+        return text if text.strip() else self.raw_text
+
+    @cached_property
+    def skills(self) -> List[str]:
+        """Skills found in the role-prediction sections."""
+        return extract_skills(self.role_text)
+
+    @cached_property
+    def ats_skills(self) -> List[str]:
+        """Skills found in the ATS-scoring text."""
+        return extract_skills(self.normalized_text)
+
+    @cached_property
+    def skill_bits(self) -> int:
+        """Skill registry bitset of the role-prediction skills."""
+        return extract_skill_bits(self.role_text)
+
+    @cached_property
+    def ats_skill_bits(self) -> int:
+        """Skill registry bitset of the ATS-scoring skills."""
+        return extract_skill_bits(self.normalized_text)
@@ -1,18 +1,306 @@
 import os
 import re
+import time
+import multiprocessing
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
 from PyPDF2 import PdfReader
 
-def extract_text(file_path: str) -> str:
+# Extraction budget: a single oversized upload must not hold a worker forever
+MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+MAX_SECONDS = float(os.getenv("PDF_MAX_SECONDS", "20"))
+
+# Page-parallel extraction only pays off once the PDF is long enough
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_pool = None
+# Set when the pool could not be started here; extraction stays serial
+_pool_broken = False
+
+
+def _get_pool():
+    """
+    Lazily create the shared page-extraction pool (one per process).
+
+    Celery prefork children are daemonic, and the standard library refuses to
+    let daemonic processes start children; Celery's own multiprocessing fork,
+    billiard, allows it, so it is used there.
+    """
+    global _pool
+    if _pool is None:
+        if multiprocessing.current_process().daemon:
+            from billiard.pool import Pool
+        else:
+            from multiprocessing.pool import Pool
+        _pool = Pool(processes=PDF_WORKERS)
+    return _pool
+
+
+def _can_fork_workers() -> bool:
+    return PDF_WORKERS > 1 and not _pool_broken
+
+
+def check_parallel_extraction(timeout: float = 10.0) -> bool:
+    """
+    Start the page-extraction pool and run one job on it, so a worker finds
+    out at startup (not on its first long PDF) whether page-parallel
+    extraction works in this process. On failure extraction stays serial.
+    """
+    global _pool_broken
+    if PDF_WORKERS <= 1:
+        return False
+    try:
+        worker_pid = _get_pool().apply_async(os.getpid).get(timeout=timeout)
+    except Exception as e:
+        _pool_broken = True
+        print(f"Page-parallel PDF extraction unavailable in process {os.getpid()}, using serial: {str(e)}")
+        return False
+    print(f"Page-parallel PDF extraction ready in process {os.getpid()} ({PDF_WORKERS} workers, e.g. {worker_pid})")
+    return True
+
+
+def _extract_page_range(file_path: str, start: int, stop: int, deadline: float) -> List[str]:
+    """Extract pages [start, stop) in order, stopping early past the deadline."""
+    reader = PdfReader(file_path)
+    pages = []
+    for index in range(start, stop):
+        if time.time() > deadline:
+            break
+        pages.append(reader.pages[index].extract_text() or "")
+    return pages
+
+
+def _extract_pdf_parallel(file_path: str, page_count: int, deadline: float) -> List[str]:
+    """
+    Split the page range into contiguous chunks, extract them across the
+    process pool and join the results back in page order.
+    """
+    chunk_size = -(-page_count // PDF_WORKERS)  # ceil division
+    ranges = [
+        (start, min(start + chunk_size, page_count))
+        for start in range(0, page_count, chunk_size)
+    ]
+
+    pool = _get_pool()
+    results = [
+        pool.apply_async(_extract_page_range, (file_path, start, stop, deadline))
+        for start, stop in ranges
+    ]
+
+    pages = []
+    for (start, stop), result in zip(ranges, results):
+        # Keep the text contiguous: stop at the first chunk that did not finish.
+        # Unfinished chunks stop on their own at the deadline.
+        try:
+            chunk = result.get(timeout=max(0.0, deadline - time.time()) + 1.0)
+        except Exception as e:
+            print(f"PDF page chunk {start}-{stop} not extracted: {str(e) or type(e).__name__}")
+            break
+        pages.extend(chunk)
+        if len(chunk) < stop - start:
+            break
+    return pages
+
+
+class Extraction(NamedTuple):
+    text: str
+    # True when the page or time budget stopped extraction before the end
+    truncated: bool = False
+
+
+# Extractor registry: file extension -> {backend name: extractor}
+# Every extractor takes (file_path, max_pages, max_seconds, **options) and
+# returns an Extraction.
+EXTRACTORS: Dict[str, Dict[str, Callable[..., Extraction]]] = {}
+
+# Default backend per format; run benchmarks/bench_extractors.py to pick these
+DEFAULT_EXTRACTORS = {
+    ".pdf": os.getenv("PDF_EXTRACTOR", "pypdf2"),
+    ".docx": os.getenv("DOCX_EXTRACTOR", "python-docx"),
+}
+
+
+def register_extractor(extension: str, name: str):
+    """Register an extraction backend for a file extension (e.g. ".pdf")."""
+    def decorator(func: Callable[..., Extraction]) -> Callable[..., Extraction]:
+        EXTRACTORS.setdefault(extension, {})[name] = func
+        return func
+    return decorator
+
+
+@register_extractor(".pdf", "pypdf2")
+def _extract_pdf_pypdf2(
+    file_path: str,
+    max_pages: int,
+    max_seconds: float,
+    parallel: Optional[bool] = None,
+    **_
+) -> Extraction:
+    deadline = time.time() + max_seconds
+
+    reader = PdfReader(file_path)
+    page_count = min(len(reader.pages), max_pages)
+    over_page_budget = len(reader.pages) > max_pages
+
+    if parallel is None:
+        parallel = page_count >= PARALLEL_MIN_PAGES and _can_fork_workers()
+
+    if parallel and page_count > 1:
+        try:
+            pages = _extract_pdf_parallel(file_path, page_count, deadline)
+        except Exception as e:
+            print(f"Parallel PDF extraction failed, falling back to serial: {str(e)}")
+            pages = None
+        if pages is not None:
+            return Extraction("\n".join(pages), over_page_budget or len(pages) < page_count)
+
+    pages = []
+    for index in range(page_count):
+        if time.time() > deadline:
+            print(f"PDF extraction budget exhausted after {index} of {page_count} pages")
+            break
+        pages.append(reader.pages[index].extract_text() or "")
+    return Extraction("\n".join(pages), over_page_budget or len(pages) < page_count)
+
+
+@register_extractor(".pdf", "pdfplumber")
+def _extract_pdf_pdfplumber(file_path: str, max_pages: int, max_seconds: float, **_) -> Extraction:
+    import pdfplumber
+
+    deadline = time.time() + max_seconds
+    pages = []
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages[:max_pages]:
+            if time.time() > deadline:
+                break
+            pages.append(page.extract_text() or "")
+            # Release the parsed page objects as we go to keep memory flat
+            page.flush_cache()
+        truncated = len(pages) < len(pdf.pages)
+    return Extraction("\n".join(pages), truncated)
+
+
+@register_extractor(".pdf", "pypdfium2")
+def _extract_pdf_pypdfium2(file_path: str, max_pages: int, max_seconds: float, **_) -> Extraction:
+    import pypdfium2 as pdfium
+
+    deadline = time.time() + max_seconds
+    pages = []
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        page_count = len(pdf)
+        for index in range(min(page_count, max_pages)):
+            if time.time() > deadline:
+                break
+            page = pdf[index]
+            textpage = page.get_textpage()
+            pages.append(textpage.get_text_range() or "")
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+    return Extraction("\n".join(pages), len(pages) < page_count)
+
+
+def _iter_docx_blocks(document) -> Iterator[str]:
+    """
+    Yield paragraph and table-cell text in document order, straight from the
+    body XML, without converting the document to another format.
+    """
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+
+    for child in document.element.body.iterchildren():
+        tag = child.tag.rsplit("}", 1)[-1]
+        if tag == "p":
+            yield Paragraph(child, document).text
+        elif tag == "tbl":
+            for row in Table(child, document).rows:
+                cells = []
+                for cell in row.cells:
+                    # Merged cells repeat across the row; keep one copy
+                    if cell.text and cell.text not in cells:
+                        cells.append(cell.text)
+                yield " | ".join(cells)
+
+
+@register_extractor(".docx", "python-docx")
+def _extract_docx(file_path: str, max_pages: int, max_seconds: float, **_) -> Extraction:
+    from docx import Document
+
+    deadline = time.time() + max_seconds
+    lines = []
+    truncated = False
+    for text in _iter_docx_blocks(Document(file_path)):
+        if time.time() > deadline:
+            truncated = True
+            break
+        lines.append(text)
+    return Extraction("\n".join(lines), truncated)
+
+
+def resolve_extractor(file_path: str, backend: Optional[str] = None) -> str:
+    """
+    The extractor name that will handle this file.
+
+    Raises:
+        ValueError: unsupported file type or unknown backend
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    backends = EXTRACTORS.get(extension)
+    if not backends:
+        raise ValueError(f"Unsupported file type: {extension or 'unknown'}")
+
+    name = backend or DEFAULT_EXTRACTORS.get(extension) or next(iter(backends))
+    if name not in backends:
+        raise ValueError(f"Unknown extractor '{name}' for {extension} files")
+    return name
+
+
+def extract(
+    file_path: str,
+    max_pages: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    parallel: Optional[bool] = None,
+    backend: Optional[str] = None
+) -> Extraction:
+    """
+    extract_text, also reporting whether the page or time budget cut the text short.
+    """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    if file_path.lower().endswith(".pdf"):
-        reader = PdfReader(file_path)
-        return "\n".join(
-            page.extract_text() or "" for page in reader.pages
-        )
+    name = resolve_extractor(file_path, backend)
+    extension = os.path.splitext(file_path)[1].lower()
+    return EXTRACTORS[extension][name](
+        file_path,
+        MAX_PAGES if max_pages is None else max_pages,
+        MAX_SECONDS if max_seconds is None else max_seconds,
+        parallel=parallel
+    )
+
+
+def extract_text(
+    file_path: str,
+    max_pages: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    parallel: Optional[bool] = None,
+    backend: Optional[str] = None
+) -> str:
+    """
+    Extract text from a resume file using the registered backend for its type.
+
+    Args:
+        file_path: Path to the uploaded file
+        max_pages: Maximum number of pages to read (defaults to PDF_MAX_PAGES)
+        max_seconds: Time budget for extraction (defaults to PDF_MAX_SECONDS)
+        parallel: Force page-parallel PyPDF2 extraction on/off; None picks automatically
+        backend: Extractor name (e.g. "pdfplumber"); defaults to DEFAULT_EXTRACTORS
 
-    raise ValueError("Unsupported file type")
+    Returns:
+        str: Extracted text, pages joined in order
+    """
+    return extract(file_path, max_pages, max_seconds, parallel, backend).text
 
 
 def fix_broken_headers(text: str) -> str:
@@ -56,3 +344,34 @@ def fix_broken_headers(text: str) -> str:
             fixed_lines.append(line)
 
     return "\n".join(fixed_lines)
+
+
+def extract_resume_text(file_path: str) -> str:
+    """
+    Extract and header-fix resume text, reusing the cached result for files
+    that were uploaded before (keyed by extractor backend and the SHA-256 of
+    the file bytes). Text cut short by the page or time budget is not
+    cached, so a slow run does not pin a truncated result for the TTL.
+
+    Args:
+        file_path: Path to the uploaded file
+
+    Returns:
+        str: Text after fix_broken_headers, ready for parsing and scoring
+    """
+    from app.ai.cache import extraction_cache
+    from app.utils.resume_hash import generate_file_hash
+
+    cache_key = f"{resolve_extractor(file_path)}:{generate_file_hash(file_path)}"
+
+    cached = extraction_cache.get(cache_key)
+    if cached is not None:
+        return cached.decode("utf-8")
+
+    extraction = extract(file_path)
+    text = fix_broken_headers(extraction.text)
+    if extraction.truncated:
+        print(f"Extraction of {os.path.basename(file_path)} hit its budget; not caching")
+    else:
+        extraction_cache.set(cache_key, text.encode("utf-8"))
+    return text
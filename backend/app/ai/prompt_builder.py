@@ -0,0 +1,153 @@
+"""
+Token-Budgeted Prompt Builder
+
+Builds LLM messages whose variable content fits a token budget:
+
+- Tokens are counted locally with tiktoken when it is installed, otherwise
+  estimated at ~4 characters per token (the rate limiter's estimate).
+- Resume text is cut down to the parsed sections relevant to the prompt,
+  in priority order; when over budget the lowest-priority sections are
+  trimmed (then dropped) first.
+- Static instructions always come first and are byte-identical between
+  calls, with the per-request content appended last, so provider-side
+  prompt caching can reuse the shared prefix.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.ai.parsed_resume import ParsedResume, get_parser
+from app.ai.section_parser import SectionType
+
+# A section that would get fewer tokens than this is dropped instead of truncated
+MIN_SECTION_TOKENS = 24
+# The lines above the first section header (name, contact, links) are always
+# kept, up to this many tokens
+PREAMBLE_MAX_TOKENS = 120
+
+TRUNCATION_MARKER = "[...]"
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Token count for the model (tiktoken), or a ~4 chars/token estimate."""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o-mini") -> str:
+    """
+    Keep the leading whole lines of text that fit in max_tokens (the first
+    line is cut by characters if even it does not fit).
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    budget = max_tokens - count_tokens(TRUNCATION_MARKER, model) - 1
+    kept: List[str] = []
+    used = 0
+    for line in text.splitlines():
+        cost = count_tokens(line + "\n", model)
+        if used + cost > budget:
+            if not kept:
+                kept.append(line[:max(0, budget) * 4])
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept + [TRUNCATION_MARKER])
+
+
+def fit_resume(
+    resume_text: str,
+    max_tokens: int,
+    priority: Sequence[SectionType],
+    model: str = "gpt-4o-mini",
+    parsed: Optional[ParsedResume] = None
+) -> str:
+    """
+    The relevant part of a resume within a token budget.
+
+    Args:
+        resume_text: Full resume text
+        max_tokens: Budget for the returned text
+        priority: Section types to include, most valuable first; others are left out
+        model: Model whose tokenizer counts the budget
+        parsed: Already-built ParsedResume of resume_text, to avoid parsing again
+
+    Returns:
+        str: The header lines plus the kept sections (in resume order), or
+        the truncated raw text when no sections were detected
+    """
+    if count_tokens(resume_text, model) <= max_tokens:
+        return resume_text
+
+    if parsed is None:
+        parsed = ParsedResume.from_text(resume_text)
+    sections = parsed.sections
+    relevant = [(t, sections[t]) for t in priority if t in sections and sections[t].content.strip()]
+    if not relevant:
+        return truncate_to_tokens(resume_text, max_tokens, model)
+
+    kept: List[Tuple[int, str]] = []
+    remaining = max_tokens
+    preamble = _preamble(parsed.lines)
+    if preamble:
+        preamble = truncate_to_tokens(preamble, min(PREAMBLE_MAX_TOKENS, max_tokens // 4), model)
+        kept.append((-1, preamble))
+        remaining -= count_tokens(preamble, model) + 1
+
+    # Budget goes to sections in priority order, so the least valuable ones
+    # are the ones trimmed or dropped
+    for section_type, section in relevant:
+        block = f"{section_type.value.upper()}:\n{section.content.strip()}"
+        cost = count_tokens(block, model) + 1
+        if cost <= remaining:
+            kept.append((section.end_line, block))
+            remaining -= cost
+        elif remaining >= MIN_SECTION_TOKENS:
+            kept.append((section.end_line, truncate_to_tokens(block, remaining, model)))
+            remaining = 0
+    return "\n\n".join(block for _, block in sorted(kept))
+
+
+def _preamble(lines: List[str]) -> str:
+    """Lines before the first section header."""
+    parser = get_parser()
+    preamble = []
+    for line in lines:
+        if parser.is_section_header(line):
+            break
+        preamble.append(line)
+    return "\n".join(preamble)
+
+
+def build_messages(system_prompt: str, instructions: str, request_content: str) -> List[Dict[str, str]]:
+    """
+    System + user messages with every static part first.
+
+    Args:
+        system_prompt: Static system prompt
+        instructions: Static task instructions and output format
+        request_content: Per-request content (resume, JD, scores), appended last
+
+    Returns:
+        List[Dict]: Chat messages whose prefix is identical across requests
+    """
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"{instructions}\n\n{request_content}"}
+    ]
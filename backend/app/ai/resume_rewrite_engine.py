@@ -2,16 +2,21 @@
 Resume Rewrite Engine - Industry-Grade Resume Rewriter
 Rewrites resume content while keeping facts 100% truthful
 """
+from typing import AsyncIterator, Dict, List, Any, Optional, Set, Tuple
+import asyncio
+import dataclasses
 import os
-import json
-from dotenv import load_dotenv
-from openai import OpenAI
-from typing import Dict, List, Any, Optional, Set, Tuple
 import re
 import random
+from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict
 from app.utils.role_normalizer import normalize_role
-from app.utils.openai_rate_limiter import wait_for_slot
+from app.ai.llm_client import CompletionTruncated, chat_json, chat_json_async, stream_chat_json_async
+from app.ai.parsed_resume import ParsedResume
+from app.ai.prompt_builder import build_messages, count_tokens, fit_resume
+from app.ai.section_parser import SectionType
+from app.ai.json_stream import IncrementalJSONParser
+from app.ai import model_router
 import re
 
 def extract_skills(text: str) -> List[str]:
@@ -20,25 +25,13 @@ def extract_skills(text: str) -> List[str]:
     This is a fallback and should not be used when ATS data is available.
     """
     # Import here to avoid circular imports
-    from app.ai.jd_match_engine import SKILL_SET
+    from app.ai.jd_match_engine import SKILL_MATCHER
     
     if not text or not isinstance(text, str):
         return []
-        
-    # Convert to lowercase for case-insensitive matching
-    text_lower = text.lower()
-    
-    # Find all skills mentioned in the text
-    found_skills = set()
     
-    # Check for multi-word skills first (to avoid partial matches)
-    for skill in sorted(SKILL_SET, key=len, reverse=True):
-        if skill in text_lower:
-            found_skills.add(skill)
-            # Remove the matched text to avoid double-counting
-            text_lower = text_lower.replace(skill, " ")
-    
-    return list(found_skills)[:15]  # Return up to 15 skills
+    # Single pass over the text; multi-word skills win over their parts
+    return SKILL_MATCHER.find_ordered(text)[:15]  # Return up to 15 skills
 
 def rewrite_with_rules(
     resume_text: str, 
@@ -57,27 +50,7 @@ def rewrite_with_rules(
         ats_data: ATS analysis data containing matched and missing skills
         original_role: Original role before normalization (for reference)
     """
-    # Normalize the role if not already done
-    normalized_role = normalize_role(role)
-    
-    # Ensure we have valid ATS data
-    if ats_data is None:
-        ats_data = {
-            "matched_skills": [],
-            "missing_skills": [],
-            "role": normalized_role,
-            "original_role": original_role or role
-        }
-    
-    # Extract skills from ATS data
-    matched_skills = ats_data.get("matched_skills", [])
-    missing_skills = ats_data.get("missing_skills", [])
-    role_skills = ats_data.get("role_skills", matched_skills + missing_skills)
-    
-    # Ensure we have lists, not other iterables
-    matched_skills = list(matched_skills) if matched_skills else []
-    missing_skills = list(missing_skills) if missing_skills else []
-    role_skills = list(role_skills) if role_skills else []
+    normalized_role, matched_skills, missing_skills, role_skills = _rule_inputs(role, ats_data, original_role)
     
     # Generate experience bullets based on matched skills
     experience_bullets = _generate_experience_bullets(matched_skills, normalized_role, level)
@@ -102,9 +75,38 @@ def rewrite_with_rules(
         "original_role": original_role or role
     }
 
-load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def _rule_inputs(
+    role: str,
+    ats_data: Optional[Dict],
+    original_role: Optional[str] = None
+) -> Tuple[str, List[str], List[str], List[str]]:
+    """Normalized role plus matched, missing and role skills for the rule-based helpers."""
+    # Normalize the role if not already done
+    normalized_role = normalize_role(role)
+    
+    # Ensure we have valid ATS data
+    if ats_data is None:
+        ats_data = {
+            "matched_skills": [],
+            "missing_skills": [],
+            "role": normalized_role,
+            "original_role": original_role or role
+        }
+    
+    # Extract skills from ATS data
+    matched_skills = ats_data.get("matched_skills", [])
+    missing_skills = ats_data.get("missing_skills", [])
+    role_skills = ats_data.get("role_skills", matched_skills + missing_skills)
+    
+    # Ensure we have lists, not other iterables
+    matched_skills = list(matched_skills) if matched_skills else []
+    missing_skills = list(missing_skills) if missing_skills else []
+    role_skills = list(role_skills) if role_skills else []
+    return normalized_role, matched_skills, missing_skills, role_skills
+
+# Bump when RESUME_REWRITE_SYSTEM_PROMPT or the user prompt template changes (LLM response cache key)
+PROMPT_VERSION = "rewrite-v2"
 
 RESUME_REWRITE_SYSTEM_PROMPT = """You are a Senior Technical Recruiter and ATS Optimization Expert.
 
@@ -247,28 +249,10 @@ def _generate_skills_section(matched: List[str], missing: List[str], role_skills
     return categories
 
 
-def generate_resume_rewrite(
-    resume_text: str,
-    target_role: str,
-    candidate_level: str = "Mid",
-    ats_data: Optional[Dict] = None,
-    original_role: Optional[str] = None
-) -> Dict[str, Any]:
-    """
-    Rewrites resume content for ATS optimization and role-specific targeting
-    
-    Args:
-        resume_text: Full resume text
-        target_role: Target job role (e.g., "Full Stack Developer")
-        candidate_level: Fresher | Junior | Mid | Senior
-        ats_data: Optional ATS analysis data containing matched and missing skills
-        original_role: Original role before normalization (for reference)
-    """
-    wait_for_slot()
+# Static rewrite instructions: sent before the role, level and resume,
+# identical on every call so provider-side prompt caching can reuse the prefix
+RESUME_REWRITE_INSTRUCTIONS = """Rewrite the resume content given after these instructions for the stated target role and candidate level.
 
-    user_prompt = f"""Rewrite the resume content below for the target role: {target_role}
-
-Candidate level: {candidate_level}
 Do NOT add fake experience.
 
 Instructions:
@@ -281,43 +265,343 @@ Instructions:
 4. Rewrite Skills section grouped by categories
 5. Keep language professional, concise, and recruiter-friendly
 
-Resume Text:
-{resume_text}
-
 Return ONLY structured JSON with this exact format:
-{{
+{
   "rewritten_summary": "string",
   "rewritten_experience": ["bullet 1", "bullet 2"],
   "rewritten_projects": [
-    {{
+    {
       "title": "string",
       "description": "string",
       "tech_stack": ["string"],
       "impact": ["string"]
-    }}
+    }
   ],
-  "rewritten_skills": {{
+  "rewritten_skills": {
     "languages": ["string"],
     "frameworks": ["string"],
     "databases": ["string"],
     "tools": ["string"],
     "other": ["string"]
-  }},
+  },
   "ats_keywords_added": ["string"]
-}}"""
+}"""
+
+# Token budget for the resume in a rewrite prompt
+REWRITE_RESUME_TOKEN_BUDGET = int(os.getenv("REWRITE_RESUME_TOKEN_BUDGET", "3000"))
+# Resume sections a full rewrite uses, most valuable first
+REWRITE_SECTION_PRIORITY = (
+    SectionType.EXPERIENCE, SectionType.PROJECTS, SectionType.SKILLS,
+    SectionType.SUMMARY, SectionType.CERTIFICATIONS, SectionType.EDUCATION
+)
+
+
+def _rewrite_request_content(
+    resume_text: str,
+    target_role: str,
+    candidate_level: str,
+    priority: Tuple[SectionType, ...],
+    parsed: Optional[ParsedResume] = None
+) -> str:
+    """The per-request part of a rewrite prompt: role, level and the budgeted resume."""
+    resume_excerpt = fit_resume(resume_text, REWRITE_RESUME_TOKEN_BUDGET, priority, parsed=parsed)
+    return f"""Target role: {target_role}
+Candidate level: {candidate_level}
+
+Resume Text:
+\"\"\"{resume_excerpt}\"\"\""""
+
+
+def _rewrite_messages(
+    resume_text: str,
+    target_role: str,
+    candidate_level: str,
+    parsed: Optional[ParsedResume] = None
+) -> List[Dict[str, str]]:
+    request_content = _rewrite_request_content(
+        resume_text, target_role, candidate_level, REWRITE_SECTION_PRIORITY, parsed
+    )
+    return build_messages(RESUME_REWRITE_SYSTEM_PROMPT, RESUME_REWRITE_INSTRUCTIONS, request_content)
+
+
+# Rewrite modes: one completion for the whole rewrite, or one smaller
+# completion per section issued concurrently (wall clock ~ slowest section)
+REWRITE_MODES = ("single", "parallel")
+RESUME_REWRITE_MODE = os.getenv("RESUME_REWRITE_MODE", "single")
+
+SECTION_PROMPT_VERSION = "rewrite-sections-v2"
+
+# section -> (instruction, JSON format, minimum completion cap)
+REWRITE_SECTIONS = {
+    "summary": (
+        "Rewrite the Professional Summary to be role-focused and ATS-friendly (3-4 sentences).",
+        '{"rewritten_summary": "string"}',
+        300,
+    ),
+    "experience": (
+        "Rewrite the Experience bullets (do not invent experience). Use action verbs and quantified impact when stated.",
+        '{"rewritten_experience": ["bullet 1", "bullet 2"]}',
+        900,
+    ),
+    "projects": (
+        "Rewrite the Project descriptions with a clear problem, technologies used and impact / learning outcomes.",
+        '{"rewritten_projects": [{"title": "string", "description": "string", "tech_stack": ["string"], "impact": ["string"]}]}',
+        900,
+    ),
+    "skills": (
+        "Rewrite the Skills section grouped by categories and list the ATS keywords you added.",
+        '{"rewritten_skills": {"languages": ["string"], "frameworks": ["string"], "databases": ["string"], '
+        '"tools": ["string"], "other": ["string"]}, "ats_keywords_added": ["string"]}',
+        400,
+    ),
+}
+
+# Resume section each rewrite is sized from
+_SECTION_SOURCES = {
+    "summary": SectionType.SUMMARY,
+    "experience": SectionType.EXPERIENCE,
+    "projects": SectionType.PROJECTS,
+    "skills": SectionType.SKILLS,
+}
+# Completion cap per section: its input tokens times this ratio (rewrites can
+# run longer than the source, plus JSON syntax), between the section's minimum
+# cap and REWRITE_SECTION_MAX_TOKENS
+REWRITE_SECTION_OUTPUT_RATIO = float(os.getenv("REWRITE_SECTION_OUTPUT_RATIO", "1.5"))
+REWRITE_SECTION_MAX_TOKENS = int(os.getenv("REWRITE_SECTION_MAX_TOKENS", "4000"))
+
+# Field each section's response must contain, and its type
+_SECTION_FIELDS = {
+    "summary": ("rewritten_summary", str),
+    "experience": ("rewritten_experience", list),
+    "projects": ("rewritten_projects", list),
+    "skills": ("rewritten_skills", dict),
+}
+
+_section_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rewrite-section")
 
+
+def _section_instructions(instruction: str, response_format: str) -> str:
+    return f"""Rewrite one section of the resume given after these instructions for the stated target role and candidate level.
+
+Do NOT add fake experience.
+
+Task: {instruction}
+Keep language professional, concise, and recruiter-friendly.
+
+Return ONLY structured JSON with this exact format:
+{response_format}"""
+
+
+# Static per-section instructions (see RESUME_REWRITE_INSTRUCTIONS)
+SECTION_INSTRUCTIONS = {
+    section: _section_instructions(instruction, response_format)
+    for section, (instruction, response_format, _) in REWRITE_SECTIONS.items()
+}
+
+# Resume sections each section rewrite uses, most valuable first
+SECTION_PRIORITIES = {
+    "summary": (SectionType.SUMMARY, SectionType.EXPERIENCE, SectionType.SKILLS, SectionType.PROJECTS),
+    "experience": (SectionType.EXPERIENCE, SectionType.SKILLS),
+    "projects": (SectionType.PROJECTS, SectionType.SKILLS),
+    "skills": (SectionType.SKILLS, SectionType.EXPERIENCE, SectionType.PROJECTS),
+}
+
+
+def _section_messages(
+    section: str,
+    resume_text: str,
+    target_role: str,
+    candidate_level: str,
+    parsed: Optional[ParsedResume] = None
+) -> List[Dict[str, str]]:
+    request_content = _rewrite_request_content(
+        resume_text, target_role, candidate_level, SECTION_PRIORITIES[section], parsed
+    )
+    return build_messages(RESUME_REWRITE_SYSTEM_PROMPT, SECTION_INSTRUCTIONS[section], request_content)
+
+
+def _section_requests(
+    resume_text: str,
+    target_role: str,
+    candidate_level: str,
+    use_cache: bool,
+    plan: str
+) -> Dict[str, Tuple[List[Dict[str, str]], Dict[str, Any]]]:
+    """section -> (messages, chat_json keyword arguments)"""
+    parsed = ParsedResume.from_text(resume_text)
+    requests = {}
+    for section in REWRITE_SECTIONS:
+        messages = _section_messages(section, resume_text, target_role, candidate_level, parsed)
+        max_tokens = _section_max_tokens(section, parsed)
+        requests[section] = (messages, {
+            "route": model_router.route_messages("rewrite_section", messages, plan, max_tokens),
+            "temperature": 0.25,
+            "prompt_version": SECTION_PROMPT_VERSION,
+            "use_cache": use_cache,
+        })
+    return requests
+
+
+def _section_max_tokens(section: str, parsed: ParsedResume) -> int:
+    """Completion cap for one section, sized from the section's own input."""
+    minimum = REWRITE_SECTIONS[section][2]
+    source = parsed.sections.get(_SECTION_SOURCES[section])
+    input_tokens = count_tokens(source.content) if source is not None else 0
+    return min(REWRITE_SECTION_MAX_TOKENS, max(minimum, int(input_tokens * REWRITE_SECTION_OUTPUT_RATIO)))
+
+
+def _uncapped(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Section call arguments with the completion cap removed, for the retry."""
+    return {**kwargs, "route": dataclasses.replace(kwargs["route"], max_tokens=None)}
+
+
+def _rewrite_section(section: str, messages: List[Dict[str, str]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """One section call; a completion cut off at its cap is retried once uncapped."""
+    try:
+        return chat_json(messages, **kwargs)
+    except CompletionTruncated:
+        print(f"Rewrite section '{section}' hit its {kwargs['route'].max_tokens}-token cap, retrying uncapped")
+        return chat_json(messages, **_uncapped(kwargs))
+
+
+async def _rewrite_section_async(section: str, messages: List[Dict[str, str]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return await chat_json_async(messages, **kwargs)
+    except CompletionTruncated:
+        print(f"Rewrite section '{section}' hit its {kwargs['route'].max_tokens}-token cap, retrying uncapped")
+        return await chat_json_async(messages, **_uncapped(kwargs))
+
+
+def _rule_section(section: str, target_role: str, candidate_level: str, ats_data: Optional[Dict]) -> Dict[str, Any]:
+    """Rule-based replacement for one failed section."""
+    role, matched, missing, role_skills = _rule_inputs(target_role, ats_data)
+    if section == "summary":
+        return {"rewritten_summary": _generate_summary(role, matched, candidate_level)}
+    if section == "experience":
+        return {"rewritten_experience": _generate_experience_bullets(matched, role, candidate_level)}
+    if section == "projects":
+        return {"rewritten_projects": _generate_projects(missing, role, candidate_level)}
+    return {
+        "rewritten_skills": _generate_skills_section(matched, missing, role_skills),
+        "ats_keywords_added": missing,
+    }
+
+
+def _merge_sections(
+    responses: Dict[str, Any],
+    target_role: str,
+    candidate_level: str,
+    ats_data: Optional[Dict]
+) -> Dict[str, Any]:
+    """
+    Merge per-section responses (dicts, or the exception a call raised);
+    invalid or failed sections are filled in by the rule-based helpers.
+    """
+    merged: Dict[str, Any] = {}
+    fallback_sections = []
+    for section in REWRITE_SECTIONS:
+        response = responses.get(section)
+        field, expected = _SECTION_FIELDS[section]
+        if isinstance(response, dict) and isinstance(response.get(field), expected):
+            merged.update(response)
+        else:
+            if isinstance(response, Exception):
+                print(f"Rewrite section '{section}' failed, using rule-based fallback: {str(response)}")
+            fallback_sections.append(section)
+            merged.update(_rule_section(section, target_role, candidate_level, ats_data))
+
+    merged.setdefault("ats_keywords_added", [])
+    merged["fallback_used"] = len(fallback_sections) == len(REWRITE_SECTIONS)
+    merged["fallback_sections"] = fallback_sections
+    return merged
+
+
+def generate_resume_rewrite_parallel(
+    resume_text: str,
+    target_role: str,
+    candidate_level: str = "Mid",
+    ats_data: Optional[Dict] = None,
+    use_cache: bool = True,
+    plan: str = "free"
+) -> Dict[str, Any]:
+    """
+    Rewrite each section with its own smaller completion, concurrently.
+
+    Every call still goes through the shared rate limiter. A section that
+    fails (API error, rate-limit timeout, bad JSON) falls back to its
+    rule-based helper; the others keep their LLM output. The result lists
+    the replaced sections under "fallback_sections".
+    """
+    requests = _section_requests(resume_text, target_role, candidate_level, use_cache, plan)
+    futures = {
+        section: _section_executor.submit(_rewrite_section, section, messages, kwargs)
+        for section, (messages, kwargs) in requests.items()
+    }
+    responses = {}
+    for section, future in futures.items():
+        try:
+            responses[section] = future.result()
+        except Exception as e:
+            responses[section] = e
+    return _merge_sections(responses, target_role, candidate_level, ats_data)
+
+
+async def generate_resume_rewrite_parallel_async(
+    resume_text: str,
+    target_role: str,
+    candidate_level: str = "Mid",
+    ats_data: Optional[Dict] = None,
+    use_cache: bool = True,
+    plan: str = "free"
+) -> Dict[str, Any]:
+    """generate_resume_rewrite_parallel for async routes (asyncio.gather instead of threads)."""
+    # Routing reads latency stats from Redis; keep it off the event loop
+    requests = await asyncio.to_thread(
+        _section_requests, resume_text, target_role, candidate_level, use_cache, plan
+    )
+    results = await asyncio.gather(
+        *[_rewrite_section_async(section, messages, kwargs) for section, (messages, kwargs) in requests.items()],
+        return_exceptions=True
+    )
+    return _merge_sections(dict(zip(REWRITE_SECTIONS, results)), target_role, candidate_level, ats_data)
+
+
+def generate_resume_rewrite(
+    resume_text: str,
+    target_role: str,
+    candidate_level: str = "Mid",
+    ats_data: Optional[Dict] = None,
+    original_role: Optional[str] = None,
+    use_cache: bool = True,
+    mode: Optional[str] = None,
+    plan: str = "free"
+) -> Dict[str, Any]:
+    """
+    Rewrites resume content for ATS optimization and role-specific targeting
+    
+    Args:
+        resume_text: Full resume text
+        target_role: Target job role (e.g., "Full Stack Developer")
+        candidate_level: Fresher | Junior | Mid | Senior
+        ats_data: Optional ATS analysis data containing matched and missing skills
+        original_role: Original role before normalization (for reference)
+        use_cache: False bypasses the LLM response cache
+        mode: "single" or "parallel" (per-section fan-out); defaults to RESUME_REWRITE_MODE
+        plan: The user's plan, for model routing
+    """
+    if (mode or RESUME_REWRITE_MODE) == "parallel":
+        return generate_resume_rewrite_parallel(resume_text, target_role, candidate_level, ats_data, use_cache, plan)
+
+    messages = _rewrite_messages(resume_text, target_role, candidate_level)
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        # Rate-limited JSON-mode call (shared token bucket)
+        result = chat_json(
+            messages,
+            route=model_router.route_messages("rewrite", messages, plan),
             temperature=0.25,
-            messages=[
-                {"role": "system", "content": RESUME_REWRITE_SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt}
-            ],
-            response_format={"type": "json_object"}
+            prompt_version=PROMPT_VERSION,
+            use_cache=use_cache
         )
-
-        result = json.loads(response.choices[0].message.content)
         return result
     except Exception:
         return rewrite_with_rules(
@@ -327,3 +611,96 @@ Return ONLY structured JSON with this exact format:
             ats_data,
             original_role=original_role
         )
+
+
+async def generate_resume_rewrite_async(
+    resume_text: str,
+    target_role: str,
+    candidate_level: str = "Mid",
+    ats_data: Optional[Dict] = None,
+    original_role: Optional[str] = None,
+    use_cache: bool = True,
+    mode: Optional[str] = None,
+    plan: str = "free"
+) -> Dict[str, Any]:
+    """generate_resume_rewrite for async routes: the LLM call is awaited instead of blocking the event loop."""
+    if (mode or RESUME_REWRITE_MODE) == "parallel":
+        return await generate_resume_rewrite_parallel_async(
+            resume_text, target_role, candidate_level, ats_data, use_cache, plan
+        )
+
+    messages = _rewrite_messages(resume_text, target_role, candidate_level)
+    try:
+        return await chat_json_async(
+            messages,
+            route=await asyncio.to_thread(model_router.route_messages, "rewrite", messages, plan),
+            temperature=0.25,
+            prompt_version=PROMPT_VERSION,
+            use_cache=use_cache
+        )
+    except Exception:
+        return rewrite_with_rules(
+            resume_text,
+            target_role,
+            candidate_level,
+            ats_data,
+            original_role=original_role
+        )
+
+
+async def stream_resume_rewrite(
+    resume_text: str,
+    target_role: str,
+    candidate_level: str = "Mid",
+    ats_data: Optional[Dict] = None,
+    original_role: Optional[str] = None,
+    use_cache: bool = True,
+    plan: str = "free"
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming generate_resume_rewrite.
+
+    Yields json_stream events as soon as each part of the rewrite closes:
+    "item" for every experience bullet / project / keyword, "section" for
+    every finished top-level field. The last event is always
+    {"event": "done", "rewritten": <full result>}.
+
+    If the LLM call fails, an {"event": "error", "discard_partial": bool}
+    event comes first: discard_partial is True when items or sections were
+    already sent, since the rule-based rewrite in "done" (fallback_used=True)
+    replaces them rather than continuing them.
+    """
+    parser = IncrementalJSONParser()
+    messages = _rewrite_messages(resume_text, target_role, candidate_level)
+    emitted = False
+    try:
+        route = await asyncio.to_thread(model_router.route_messages, "rewrite", messages, plan)
+        async for chunk in stream_chat_json_async(
+            messages,
+            route=route,
+            temperature=0.25,
+            prompt_version=PROMPT_VERSION,
+            use_cache=use_cache
+        ):
+            for event in parser.feed(chunk):
+                emitted = True
+                yield event
+        result = parser.result()
+        if not isinstance(result, dict):
+            raise ValueError("Invalid response format from LLM")
+        result["fallback_used"] = False
+    except Exception as e:
+        print(f"Streaming rewrite failed, using rule-based rewrite: {str(e)}")
+        yield {
+            "event": "error",
+            "detail": "AI rewrite failed; sending the rule-based rewrite instead",
+            "discard_partial": emitted
+        }
+        result = rewrite_with_rules(
+            resume_text,
+            target_role,
+            candidate_level,
+            ats_data,
+            original_role=original_role
+        )
+    yield {"event": "done", "rewritten": result}
@@ -1,5 +1,6 @@
-from app.ai.section_parser import ResumeParser
-from app.ai.skill_engine import extract_skills
+from typing import Optional
+from app.ai.role_matrix import RoleSkillMatrix
+from app.ai.parsed_resume import ParsedResume
 
 # Role → required skills mapping
 ROLE_SKILL_MAP = {
@@ -32,45 +33,31 @@ ROLE_SKILL_MAP = {
     }
 }
 
-def predict_role_advanced(resume_text: str) -> dict:
+# Role x skill matrix: one product scores every role
+ROLE_MATRIX = RoleSkillMatrix(ROLE_SKILL_MAP)
+
+def predict_role_advanced(resume_text: str, parsed: Optional[ParsedResume] = None) -> dict:
     """
     Predict best job role using skills + experience.
     Deterministic, stable, non-LLM.
-    """
-    from app.ai.section_parser import SectionType
     
-    # Parse the resume text into sections
-    sections = ResumeParser().parse_sections(resume_text)
-    
-    # Convert Section objects to their content strings
-    section_content = {}
-    for section_type, section in sections.items():
-        section_content[section_type.value] = section.content
+    Pass the already-built ParsedResume to avoid parsing the text again.
+    """
+    if parsed is None:
+        parsed = ParsedResume.from_text(resume_text)
     
-    # Only trusted sections
-    combined_text = (
-        section_content.get(SectionType.SKILLS.value, "") + " " +
-        section_content.get(SectionType.EXPERIENCE.value, "") + " " +
-        section_content.get(SectionType.PROJECTS.value, "")
-    )
-
-    extracted_skills = set(extract_skills(combined_text))
-
-    best_role = "Unknown"
-    best_score = 0
-
-    for role, required_skills in ROLE_SKILL_MAP.items():
-        matched = extracted_skills.intersection(required_skills)
-        score = len(matched)
+    # Only trusted sections (skills, experience, projects)
+    matched_counts = ROLE_MATRIX.matched_counts(parsed.skill_bits)
 
-        if score > best_score:
-            best_role = role
-            best_score = score
+    # argmax keeps the first role on ties, like the old ordered scan
+    best_index = int(matched_counts.argmax())
+    best_score = int(matched_counts[best_index])
+    best_role = ROLE_MATRIX.roles[best_index] if best_score > 0 else "Unknown"
 
     confidence = round((best_score / 10) * 100, 2) if best_score else 0.0
 
     return {
         "job_role": best_role,
         "confidence": confidence,
-        "matched_skills": sorted(extracted_skills)
+        "matched_skills": parsed.skills
     }
@@ -0,0 +1,61 @@
+"""
+Role x Skill Scoring Matrix
+
+Encodes a role -> required-skills map as a dense 0/1 NumPy matrix over the
+skill registry, so one matrix-vector product scores a resume's skill profile
+against every role at once.
+"""
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from app.ai import skill_registry
+
+
+class RoleSkillMatrix:
+    def __init__(self, role_skills: Dict[str, Iterable[str]]):
+        self.roles: List[str] = list(role_skills)
+        self.role_bits: List[int] = [
+            skill_registry.to_bits(skills, strict=True) for skills in role_skills.values()
+        ]
+
+        self.matrix = np.zeros((len(self.roles), len(skill_registry.SKILLS)), dtype=np.float32)
+        for row, bits in enumerate(self.role_bits):
+            self.matrix[row, list(skill_registry.iter_ids(bits))] = 1.0
+        self.role_sizes = self.matrix.sum(axis=1)
+
+    def skill_vector(self, bits: int) -> np.ndarray:
+        """Dense 0/1 vector of a skill registry bitset."""
+        vector = np.zeros(self.matrix.shape[1], dtype=np.float32)
+        vector[list(skill_registry.iter_ids(bits))] = 1.0
+        return vector
+
+    def matched_counts(self, bits: int) -> np.ndarray:
+        """Number of required skills matched, per role (row order)."""
+        return self.matrix @ self.skill_vector(bits)
+
+    def rank(self, bits: int) -> List[dict]:
+        """
+        Score a skill profile against every role.
+
+        Returns:
+            Roles ranked by match percentage (ties keep map order), each with
+            matched/missing counts and skill names
+        """
+        matched = self.matched_counts(bits)
+        scores = np.rint(matched / np.maximum(self.role_sizes, 1) * 100)
+        order = np.argsort(-scores, kind="stable")
+
+        ranking = []
+        for row in order:
+            role_bits = self.role_bits[row]
+            ranking.append({
+                "role": self.roles[row],
+                "score": int(scores[row]),
+                "matched_count": int(matched[row]),
+                "missing_count": int(self.role_sizes[row] - matched[row]),
+                "matched_skills": skill_registry.names(bits & role_bits),
+                "missing_skills": skill_registry.names(role_bits & ~bits),
+                "role_skills": skill_registry.names(role_bits),
+            })
+        return ranking
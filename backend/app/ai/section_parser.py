@@ -52,6 +52,51 @@ SECTION_ALIASES = {
     SectionType.REFERENCES: ["references", "professional references"]
 }
 
+_NON_ALPHA = re.compile(r"[^a-z]")
+
+
+def _normalize_header(text: str) -> str:
+    """
+    Strong text normalizer that handles broken headers and special characters.
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = text.lower()
+    
+    # Remove everything except letters
+    # "SK ILLS" -> "skills"
+    # "EDUCATIO N" -> "education"
+    return _NON_ALPHA.sub("", text)
+
+
+def _build_header_pattern() -> re.Pattern:
+    """
+    One alternation over every alias, with a named group per section type.
+    Alternatives are tried in SECTION_ALIASES order, so the first matching
+    section wins exactly as it did with one pattern per section.
+    """
+    groups = []
+    for section, aliases in SECTION_ALIASES.items():
+        alternatives = '|'.join(re.escape(alias) + r's?\b' for alias in aliases)
+        groups.append(f'(?P<{section.name}>{alternatives})')
+    return re.compile(r'^(?:' + '|'.join(groups) + r')\s*[:\\.]?\s*$', re.IGNORECASE)
+
+
+def _build_alias_index() -> Dict[str, Tuple[SectionType, str]]:
+    """Pre-normalized alias -> (section_type, alias); the first alias listed wins."""
+    index = {}
+    for section, aliases in SECTION_ALIASES.items():
+        for alias in aliases:
+            index.setdefault(_normalize_header(alias), (section, alias.lower()))
+    return index
+
+
+# Built once at import time and shared by every parser instance
+HEADER_PATTERN = _build_header_pattern()
+NORMALIZED_ALIASES = _build_alias_index()
+COMMON_HEADERS = {alias.lower() for aliases in SECTION_ALIASES.values() for alias in aliases}
+
+
 class ResumeParser:
     """
     A comprehensive resume parser that extracts and structures resume sections.
@@ -59,36 +104,15 @@ class ResumeParser:
     """
     
     def __init__(self):
-        # Compile regex patterns for section detection
-        self.section_patterns = {
-            section: re.compile(
-                r'^(?P<header>' +
-                '|'.join(re.escape(alias) + r's?\b' for alias in SECTION_ALIASES.get(section, [])) +
-                r')\s*[:\\.]?\s*$',
-                re.IGNORECASE
-            )
-            for section in SECTION_ALIASES
-        }
-        
-        # Common section headers that might be on their own line
-        self.common_headers = set()
-        for aliases in SECTION_ALIASES.values():
-            self.common_headers.update(alias.lower() for alias in aliases)
+        # Header detection structures are precomputed at import time
+        self.header_pattern = HEADER_PATTERN
+        self.common_headers = COMMON_HEADERS
     
     def normalize_text(self, text: str) -> str:
         """
         Strong text normalizer that handles broken headers and special characters.
         """
-        text = unicodedata.normalize("NFKD", text)
-        text = "".join(c for c in text if not unicodedata.combining(c))
-        text = text.lower()
-        
-        # Remove everything except letters
-        # "SK ILLS" -> "skills"
-        # "EDUCATIO N" -> "education"
-        text = re.sub(r"[^a-z]", "", text)
-        
-        return text
+        return _normalize_header(text)
     
     def is_section_header(self, line: str, next_line: Optional[str] = None) -> Optional[Tuple[SectionType, str]]:
         """
@@ -98,30 +122,17 @@ class ResumeParser:
         line = line.strip()
         if not line:
             return None
-            
-        # Check for common section headers
-        normalized_line = self.normalize_text(line)
-        
-        # Check if line matches any section header pattern
-        for section_type, pattern in self.section_patterns.items():
-            match = pattern.match(line)
-            if match:
-                return section_type, match.group('header').strip().lower()
         
-        # Check for section headers that might be followed by a line of dashes or equals
-        if next_line and (next_line.strip().startswith(('-', '=')) and len(next_line.strip()) >= len(line)):
-            for section_type, aliases in SECTION_ALIASES.items():
-                for alias in aliases:
-                    if self.normalize_text(alias) == normalized_line:
-                        return section_type, alias.lower()
+        # Check if line matches any section header pattern (single regex pass)
+        match = HEADER_PATTERN.match(line)
+        if match:
+            return SectionType[match.lastgroup], match.group(match.lastgroup).strip().lower()
         
-        # Check for all-caps section headers
-        if line.isupper() and len(line) < 30:  # Reasonable max length for section headers
-            normalized = self.normalize_text(line)
-            for section_type, aliases in SECTION_ALIASES.items():
-                for alias in aliases:
-                    if normalized == self.normalize_text(alias):
-                        return section_type, alias.lower()
+        # Headers followed by a line of dashes or equals, and all-caps headers
+        # (reasonable max length), are looked up by their normalized form
+        underlined = bool(next_line) and next_line.strip().startswith(('-', '=')) and len(next_line.strip()) >= len(line)
+        if underlined or (line.isupper() and len(line) < 30):
+            return NORMALIZED_ALIASES.get(_normalize_header(line))
         
         return None
     
@@ -143,7 +154,23 @@ class ResumeParser:
         Returns:
             Dictionary mapping section types to Section objects
         """
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        return self.parse_lines(self.split_lines(text))
+    
+    @staticmethod
+    def split_lines(text: str) -> List[str]:
+        """Split resume text into stripped, non-empty lines."""
+        return [line.strip() for line in text.splitlines() if line.strip()]
+    
+    def parse_lines(self, lines: List[str]) -> Dict[SectionType, Section]:
+        """
+        Parse pre-split resume lines (see split_lines) into structured sections.
+        
+        Args:
+            lines: Stripped, non-empty resume lines
+            
+        Returns:
+            Dictionary mapping section types to Section objects
+        """
         sections = {}
         current_section = None
         current_content = []
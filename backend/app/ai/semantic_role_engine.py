@@ -0,0 +1,171 @@
+"""
+Semantic Role Prediction
+
+Embeds the trusted resume sections (skills, experience, projects) once and
+ranks job roles by similarity in the JobFAISSIndex, optionally blended with
+the keyword-count prediction from role_engine.
+
+The embedding model is never loaded on the request path: while it is cold
+it is warmed in a background thread and the keyword result is served, and
+an encode that overruns its latency budget also falls back to keywords.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.ai.parsed_resume import ParsedResume
+from app.ai.role_engine import ROLE_MATRIX, predict_role_advanced
+
+# keyword: skill counting only; semantic: embeddings only; hybrid: weighted blend
+ROLE_MODES = ("keyword", "semantic", "hybrid")
+DEFAULT_ROLE_MODE = os.getenv("ROLE_PREDICTION_MODE", "keyword")
+
+# Share of the semantic score in hybrid mode
+SEMANTIC_WEIGHT = float(os.getenv("ROLE_SEMANTIC_WEIGHT", "0.5"))
+# Softmax temperature that turns cosine similarities into probabilities
+SEMANTIC_TEMPERATURE = float(os.getenv("ROLE_SEMANTIC_TEMPERATURE", "0.05"))
+# Latency budget for embedding + search before falling back to keywords
+SEMANTIC_BUDGET_SECONDS = float(os.getenv("ROLE_SEMANTIC_BUDGET_SECONDS", "0.5"))
+SEMANTIC_TOP_K = int(os.getenv("ROLE_SEMANTIC_TOP_K", "3"))
+
+_index = None
+_warm_lock = threading.Lock()
+_warm_thread: Optional[threading.Thread] = None
+_executor = ThreadPoolExecutor(max_workers=1)
+
+
+def _load_index():
+    global _index
+    try:
+        from app.ml.faiss_index import JobFAISSIndex
+
+        job_index = JobFAISSIndex()
+        # Load the model now so the first request does not pay for it
+        job_index.embedder.encode("warm up")
+        _index = job_index
+        print("Semantic role model ready")
+    except Exception as e:
+        print(f"Semantic role model unavailable: {str(e)}")
+
+
+def warm_up(block: bool = False) -> None:
+    """Load the job index and embedding model in a background thread (once)."""
+    global _warm_thread
+    with _warm_lock:
+        if _index is None and (_warm_thread is None or not _warm_thread.is_alive()):
+            _warm_thread = threading.Thread(target=_load_index, name="semantic-role-warmup", daemon=True)
+            _warm_thread.start()
+        thread = _warm_thread
+    if block and thread is not None:
+        thread.join()
+
+
+def is_ready() -> bool:
+    return _index is not None
+
+
+def calibrate(similarities: np.ndarray) -> np.ndarray:
+    """Temperature-scaled softmax over cosine similarities (sums to 1)."""
+    logits = similarities / SEMANTIC_TEMPERATURE
+    logits -= logits.max()
+    weights = np.exp(logits)
+    return weights / weights.sum()
+
+
+def _score_roles(role_text: str) -> List[Dict]:
+    embedding = _index.embedder.encode(role_text)
+    # Calibrate over every role so probabilities do not depend on top_k
+    results = _index.search(embedding, top_k=len(_index.job_titles))
+    probabilities = calibrate(np.array([score for _, score in results], dtype=np.float64))
+    return [
+        {"role": title, "similarity": round(score, 4), "probability": round(float(p), 4)}
+        for (title, score), p in zip(results, probabilities)
+    ]
+
+
+def semantic_role_scores(parsed: ParsedResume, budget_seconds: Optional[float] = None) -> Optional[List[Dict]]:
+    """
+    Rank job roles by embedding similarity of the role-prediction sections.
+
+    Args:
+        parsed: Parsed resume (its role_text is embedded once)
+        budget_seconds: Latency budget (defaults to ROLE_SEMANTIC_BUDGET_SECONDS)
+
+    Returns:
+        Every indexed role with similarity and calibrated probability, best
+        first, or None if the model is cold or the budget was exceeded
+    """
+    if not parsed.role_text.strip():
+        return None
+    if not is_ready():
+        warm_up()
+        return None
+
+    future = _executor.submit(_score_roles, parsed.role_text)
+    try:
+        return future.result(timeout=SEMANTIC_BUDGET_SECONDS if budget_seconds is None else budget_seconds)
+    except FutureTimeoutError:
+        print("Semantic role prediction exceeded its latency budget, using keywords")
+    except Exception as e:
+        print(f"Semantic role prediction failed, using keywords: {str(e)}")
+    return None
+
+
+def predict_role(resume_text: str, parsed: Optional[ParsedResume] = None, mode: Optional[str] = None) -> dict:
+    """
+    Predict the job role in the requested mode.
+
+    Args:
+        resume_text: Resume text
+        parsed: Already-built ParsedResume, to avoid parsing again
+        mode: "keyword", "semantic" or "hybrid" (defaults to ROLE_PREDICTION_MODE)
+
+    Returns:
+        predict_role_advanced's fields plus the mode actually used and, when
+        embeddings were used, the top semantic roles
+    """
+    if parsed is None:
+        parsed = ParsedResume.from_text(resume_text)
+    mode = mode or DEFAULT_ROLE_MODE
+    if mode not in ROLE_MODES:
+        raise ValueError(f"Unknown role mode '{mode}', expected one of {', '.join(ROLE_MODES)}")
+
+    keyword_result = predict_role_advanced(resume_text, parsed=parsed)
+    keyword_result["mode"] = "keyword"
+    if mode == "keyword":
+        return keyword_result
+
+    semantic = semantic_role_scores(parsed)
+    if not semantic:
+        keyword_result["requested_mode"] = mode
+        return keyword_result
+
+    # Keyword score on the same 0-1 scale as the confidence (10 skills = 100%)
+    counts = ROLE_MATRIX.matched_counts(parsed.skill_bits)
+    keyword_scores = {
+        role: min(float(count), 10.0) / 10
+        for role, count in zip(ROLE_MATRIX.roles, counts)
+    }
+    semantic_scores = {entry["role"]: entry["probability"] for entry in semantic}
+
+    weight = 1.0 if mode == "semantic" else SEMANTIC_WEIGHT
+    # A role without a semantic score keeps its keyword score instead of a 0
+    blended = {
+        role: (1 - weight) * keyword_scores.get(role, 0.0) + weight * semantic_scores[role]
+        for role in semantic_scores
+    }
+    if mode == "hybrid":
+        blended.update({role: score for role, score in keyword_scores.items() if role not in semantic_scores})
+    best_role = max(blended, key=blended.get)
+
+    return {
+        "job_role": best_role,
+        "confidence": round(blended[best_role] * 100, 2),
+        "matched_skills": keyword_result["matched_skills"],
+        "mode": mode,
+        "keyword_role": keyword_result["job_role"],
+        "semantic_roles": semantic[:SEMANTIC_TOP_K],
+    }
@@ -1,25 +1,30 @@
 import re
+from app.ai import skill_registry
+from app.ai.skill_matcher import SkillMatcher
+from app.ai.skill_registry import KNOWN_SKILLS
 
-KNOWN_SKILLS = {
-    "python", "java", "javascript", "react", "node.js",
-    "mongodb", "sql", "docker", "rest api",
-    "html", "css"
-}
+SKILL_MATCHER = SkillMatcher(KNOWN_SKILLS)
+
+# Registry bit for every skill the matcher can report
+_SKILL_BITS = {skill: 1 << skill_registry.skill_id(skill) for skill in SKILL_MATCHER.skills}
 
 
 def extract_skills(text: str) -> list:
     text = text.lower()
 
-    found = set()
-
-    # Word-boundary safe match
-    for skill in KNOWN_SKILLS:
-        pattern = rf"\b{re.escape(skill)}\b"
-        if re.search(pattern, text):
-            found.add(skill)
+    # Word-boundary safe match, all skills in one pass
+    found = SKILL_MATCHER.find_all(text, include_nested=True)
 
     # 🔥 HARD FIX FOR SQL IN UPPERCASE BLOCKS
     if re.search(r"\bsql\b", text):
         found.add("sql")
 
     return sorted(found)
+
+
+def extract_skill_bits(text: str) -> int:
+    """Same matches as extract_skills, returned as a skill registry bitset."""
+    bits = 0
+    for skill in SKILL_MATCHER.find_all(text, include_nested=True):
+        bits |= _SKILL_BITS[skill]
+    return bits
@@ -0,0 +1,104 @@
+"""
+Multi-pattern Skill Matcher
+
+Compiles a skill vocabulary once into a trie-shaped regular expression, so
+all word-boundary skill mentions in a text are found in a single left-to-right
+scan instead of one substring check (or one fresh regex) per skill.
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+# A skill must not be glued to other word characters ("java" in "javascript")
+_LEFT_BOUNDARY = r"(?<!\w)"
+_RIGHT_BOUNDARY = r"(?!\w)"
+
+
+def _build_trie(words: Iterable[str]) -> Dict:
+    root: Dict = {}
+    for word in words:
+        node = root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # terminal marker
+    return root
+
+
+def _trie_to_regex(node: Dict) -> str:
+    """
+    Turn a character trie into a regex with no repeated prefixes. A terminal
+    node makes the remaining suffix optional; the optional group is greedy,
+    so the longest skill is preferred and shorter ones are used on backtrack.
+    """
+    branches = [
+        re.escape(ch) + _trie_to_regex(child)
+        for ch, child in sorted(node.items())
+        if ch
+    ]
+    if not branches:
+        return ""
+
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        body = "(?:" + body + ")?"
+    return body
+
+
+class SkillMatcher:
+    """
+    Finds vocabulary skills in text in one pass.
+
+    Matches are case-insensitive and word-bounded. Overlapping candidates are
+    resolved leftmost-longest ("react native" wins over "react"), which is what
+    the old longest-first scan-and-replace loops approximated.
+    """
+
+    def __init__(self, skills: Iterable[str]):
+        self.skills: FrozenSet[str] = frozenset(
+            s.strip().lower() for s in skills if s and s.strip()
+        )
+        self.pattern = re.compile(
+            _LEFT_BOUNDARY + "(?:" + _trie_to_regex(_build_trie(self.skills)) + ")" + _RIGHT_BOUNDARY
+        )
+        self._nested: Dict[str, FrozenSet[str]] = {}
+
+    def finditer(self, text: str):
+        """Yield non-overlapping leftmost-longest skill matches."""
+        if not text:
+            return iter(())
+        # Lowercasing up front is much cheaper than a case-insensitive scan
+        return self.pattern.finditer(text.lower())
+
+    def find_all(self, text: str, include_nested: bool = False) -> Set[str]:
+        """
+        Return the set of skills mentioned in text.
+
+        Args:
+            text: Text to scan
+            include_nested: Also report skills that only occur inside a longer
+                match (e.g. "spring" within "spring boot"), matching the
+                behaviour of testing every skill independently
+        """
+        found = {m.group(0) for m in self.finditer(text)}
+        if include_nested and found:
+            for skill in list(found):
+                found |= self._nested_in(skill)
+        return found
+
+    def find_ordered(self, text: str) -> List[str]:
+        """Skills in order of first appearance, without duplicates."""
+        seen: Dict[str, None] = {}
+        for m in self.finditer(text):
+            seen.setdefault(m.group(0), None)
+        return list(seen)
+
+    def _nested_in(self, skill: str) -> FrozenSet[str]:
+        """Vocabulary skills that occur word-bounded inside a longer skill (cached)."""
+        nested = self._nested.get(skill)
+        if nested is None:
+            nested = frozenset(
+                other for other in self.skills
+                if other != skill and other in skill
+                and re.search(_LEFT_BOUNDARY + re.escape(other) + _RIGHT_BOUNDARY, skill)
+            )
+            self._nested[skill] = nested
+        return nested
@@ -0,0 +1,321 @@
+"""
+Unified Skill Registry
+
+Single source of truth for skill knowledge. Every canonical skill gets a
+stable integer ID, a category and its synonyms, built once at import time
+from the vocabularies the engines use (SKILL_SET, KNOWN_SKILLS,
+SKILL_TAXONOMY, SKILL_SYNONYMS, ...).
+
+Skill profiles are plain Python ints used as bitsets (bit N set = skill with
+ID N present), so intersections and missing-skill diffs are integer
+operations, and a profile packs into a compact array of IDs for storage.
+
+IDs come from skill_ids.json, an append-only list (position = ID): new
+skills are appended and removed skills keep their ID as retired entries, so
+bitsets stored in Mongo and the caches always decode to the same names.
+After changing the vocabularies run `python -m app.ai.skill_registry` to
+append the new skills to the file.
+"""
+import hashlib
+import json
+import os
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.ai.skill_taxonomy import SKILL_TAXONOMY
+from app.ai.skill_variants import SKILL_SYNONYMS
+
+# Master list of valid technical skills
+SKILL_SET = {
+    # Programming Languages
+    "python", "javascript", "typescript", "java", "c++", "c#", "go", "rust", "kotlin", "swift",
+    "php", "ruby", "scala", "r", "dart", "perl", "haskell", "elixir", "clojure", "bash", "powershell",
+    
+    # Web Development
+    "html", "css", "sass", "less", "bootstrap", "tailwind", "react", "angular", "vue", "next.js",
+    "nuxt.js", "svelte", "node.js", "express", "django", "flask", "spring", "laravel", "ruby on rails", 
+    "asp.net", "graphql", "rest api", "webpack", "babel", "vite", "npm", "yarn", "jquery", "redux",
+    "mobx", "jest", "mocha", "cypress", "storybook", "styled components", "material ui", "chakra ui",
+    
+    # Mobile Development
+    "react native", "flutter", "ios", "android", "xamarin", "ionic", "swiftui", "jetpack compose",
+    "kotlin multiplatform", "kmm", "flutter", "react native",
+    
+    # Databases
+    "sql", "mysql", "postgresql", "mongodb", "redis", "oracle", "sqlite", "mariadb", "cassandra", 
+    "dynamodb", "firebase", "cosmosdb", "neo4j", "elasticsearch", "bigquery", "snowflake",
+    "firestore", "realm", "couchbase", "microsoft sql server", "sql server", "postgres",
+    
+    # DevOps & Cloud
+    "docker", "kubernetes", "aws", "azure", "gcp", "terraform", "ansible", "jenkins", "github actions",
+    "gitlab ci", "circleci", "argocd", "helm", "prometheus", "grafana", "istio", "linux", "nginx",
+    "apache", "cloudformation", "serverless", "aws lambda", "aws ec2", "aws s3", "aws rds",
+    "aws dynamodb", "aws ecs", "aws eks", "aws cloudfront", "aws api gateway", "aws iam", "aws vpc",
+    "azure devops", "azure functions", "google cloud functions", "google kubernetes engine",
+    
+    # Data Science & AI/ML
+    "pandas", "numpy", "pytorch", "tensorflow", "scikit-learn", "opencv", "nltk", "spacy", "huggingface",
+    "mlflow", "kubeflow", "apache spark", "hadoop", "kafka", "airflow", "tableau", "power bi", "looker",
+    "matplotlib", "seaborn", "plotly", "d3.js", "tensorboard", "keras", "fastai", "xgboost", "lightgbm",
+    "catboost", "pytorch lightning", "transformers", "computer vision", "nlp", "natural language processing",
+    "machine learning", "deep learning", "reinforcement learning", "time series", "data analysis",
+    
+    # Other Tools & Platforms
+    "git", "github", "gitlab", "bitbucket", "jira", "confluence", "slack", "docker-compose", "kafka",
+    "rabbitmq", "redis", "nginx", "apache", "graphql", "grpc", "oauth", "jwt", "oauth2", "openid",
+    "oauth2.0", "openid connect", "jwt tokens", "restful api", "soap", "graphql api", "grpc", "protobuf",
+    "web sockets", "socket.io", "websocket", "web rtc", "webrtc", "web sockets", "webassembly", "wasm",
+    "electron", "pwa", "progressive web apps", "serverless", "microservices", "monorepo", "lerna",
+    "yarn workspaces", "pnpm", "lerna", "nx", "turborepo", "vite", "snowpack", "esbuild", "swc", "bun"
+}
+
+# Vocabulary used by the ATS / role-prediction extractor (skill_engine)
+KNOWN_SKILLS = {
+    "python", "java", "javascript", "react", "node.js",
+    "mongodb", "sql", "docker", "rest api",
+    "html", "css"
+}
+
+# Category lists (SkillCategory values), checked in this order
+CATEGORY_SKILLS = {
+    "programming_languages": [
+        'python', 'javascript', 'java', 'c#', 'c++', 'go', 'ruby', 'php', 'swift', 'kotlin',
+        'typescript', 'rust', 'scala', 'r', 'matlab', 'perl', 'haskell', 'clojure', 'elixir'
+    ],
+    "frameworks": [
+        'react', 'angular', 'vue', 'django', 'flask', 'spring', 'express', 'laravel', 'ruby on rails',
+        'asp.net', 'tensorflow', 'pytorch', 'keras', 'scikit-learn', 'pandas', 'numpy', 'node.js', 'next.js',
+        'nuxt.js', 'svelte', 'jquery'
+    ],
+    "databases": [
+        'mysql', 'postgresql', 'mongodb', 'redis', 'oracle', 'sql server', 'sqlite', 'dynamodb', 'cassandra',
+        'elasticsearch', 'firebase', 'cosmosdb', 'neo4j', 'couchbase'
+    ],
+    "tools": [
+        'git', 'docker', 'kubernetes', 'jenkins', 'ansible', 'terraform', 'aws', 'azure', 'gcp', 'heroku',
+        'github', 'gitlab', 'bitbucket', 'jira', 'confluence', 'slack', 'trello', 'asana', 'figma', 'sketch',
+        'adobe xd', 'photoshop', 'illustrator', 'tableau', 'power bi', 'excel', 'looker', 'snowflake',
+        'databricks', 'kafka', 'rabbitmq', 'nginx', 'apache'
+    ],
+}
+
+# SKILL_TAXONOMY groups folded into the categories above
+TAXONOMY_CATEGORIES = {
+    "programming_languages": "programming_languages",
+    "frontend": "frameworks",
+    "backend": "frameworks",
+    "databases": "databases",
+    "cloud": "platforms",
+    "devops": "tools",
+    "data_ai": "libraries",
+    "mobile": "platforms",
+    "testing": "tools",
+    "security": "methodologies",
+}
+
+# ATS equivalences: having the key skill also satisfies the value skill
+ATS_EQUIVALENTS = {
+    "structured query language": "sql",
+    "mysql": "sql",
+    "postgresql": "sql",
+    "postgres": "sql",
+    "sqlite": "sql",
+    "mssql": "sql",
+}
+
+# Surface forms the ATS engine folds into another canonical skill
+ATS_SYNONYMS = {
+    "node": "node.js",
+    "nodejs": "node.js",
+    "reactjs": "react",
+}
+
+# Skills only referenced by role requirement maps
+EXTRA_SKILLS = {"spark", "etl", "testing", "problem solving"}
+
+SKILL_IDS_PATH = os.path.join(os.path.dirname(__file__), "skill_ids.json")
+
+
+@dataclass(frozen=True)
+class SkillEntry:
+    id: int
+    name: str
+    category: Optional[str]
+    synonyms: Tuple[str, ...]
+    implies: Tuple[str, ...]
+    # No longer in the vocabularies; kept so stored IDs still decode
+    retired: bool = False
+
+
+def _load_id_table(path: str = SKILL_IDS_PATH) -> List[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def _category_for(name: str) -> Optional[str]:
+    for category, skills in CATEGORY_SKILLS.items():
+        if name in skills:
+            return category
+    for group, skills in SKILL_TAXONOMY.items():
+        if name in skills:
+            return TAXONOMY_CATEGORIES.get(group)
+    if name in ATS_EQUIVALENTS or name in ATS_EQUIVALENTS.values():
+        return "databases"
+    return None
+
+
+def _canonical_names() -> set:
+    canonical = set(SKILL_SET) | KNOWN_SKILLS | EXTRA_SKILLS | set(SKILL_SYNONYMS)
+    canonical |= set(ATS_EQUIVALENTS) | set(ATS_EQUIVALENTS.values())
+    for skills in list(SKILL_TAXONOMY.values()) + list(CATEGORY_SKILLS.values()):
+        canonical.update(skills)
+    return canonical
+
+
+def _build_registry(id_table: List[str]) -> Tuple[List[SkillEntry], Dict[str, int], List[str]]:
+    """
+    Entries indexed by ID, the name/synonym -> ID lookup, and the ID table
+    (id_table plus any new skills appended in sorted order).
+    """
+    canonical = _canonical_names()
+    table = list(id_table)
+    new_names = sorted(canonical - set(table))
+    table.extend(new_names)
+
+    # A surface form that is itself canonical keeps its own identity
+    # ("github" stays github even though SKILL_SYNONYMS folds it into git)
+    synonyms: Dict[str, List[str]] = {name: [] for name in canonical}
+    for name, variants in SKILL_SYNONYMS.items():
+        for variant in variants:
+            if variant not in canonical:
+                synonyms[name].append(variant)
+    for variant, name in ATS_SYNONYMS.items():
+        if variant not in canonical and variant not in synonyms[name]:
+            synonyms[name].append(variant)
+
+    # IDs are positions in the append-only table; REGISTRY_VERSION tracks it
+    entries = [
+        SkillEntry(
+            id=skill_id,
+            name=name,
+            category=_category_for(name),
+            synonyms=tuple(synonyms[name]),
+            implies=(ATS_EQUIVALENTS[name],) if name in ATS_EQUIVALENTS else ()
+        )
+        if name in canonical
+        else SkillEntry(id=skill_id, name=name, category=None, synonyms=(), implies=(), retired=True)
+        for skill_id, name in enumerate(table)
+    ]
+
+    lookup = {}
+    for entry in entries:
+        for variant in entry.synonyms:
+            lookup.setdefault(variant, entry.id)
+    for entry in entries:
+        if not entry.retired:
+            lookup[entry.name] = entry.id
+    return entries, lookup, table
+
+
+_ID_TABLE = _load_id_table()
+SKILLS, _LOOKUP, _TABLE = _build_registry(_ID_TABLE)
+if len(_TABLE) > len(_ID_TABLE):
+    print(
+        f"{len(_TABLE) - len(_ID_TABLE)} skills are missing from skill_ids.json; "
+        "run `python -m app.ai.skill_registry` to persist their IDs"
+    )
+REGISTRY_VERSION = hashlib.sha1("\n".join(_TABLE).encode("utf-8")).hexdigest()[:12]
+
+# bit of each skill -> bits of the skills it implies (for ATS matching)
+_IMPLIED_BITS = {
+    1 << entry.id: sum(1 << _LOOKUP[target] for target in entry.implies)
+    for entry in SKILLS if entry.implies
+}
+
+
+def lookup(skill: str) -> Optional[SkillEntry]:
+    """Registry entry for a canonical name or synonym (case-insensitive)."""
+    skill_id = _LOOKUP.get(skill.lower().strip())
+    return SKILLS[skill_id] if skill_id is not None else None
+
+
+def skill_id(skill: str) -> Optional[int]:
+    return _LOOKUP.get(skill.lower().strip())
+
+
+def canonical_name(skill: str) -> str:
+    """Canonical registry name, or the cleaned input when unknown."""
+    entry = lookup(skill)
+    return entry.name if entry else skill.lower().strip()
+
+
+def to_bits(skills: Iterable[str], strict: bool = False) -> int:
+    """
+    Build a skill profile bitset from skill names or synonyms.
+    Unknown names are ignored unless strict, which raises KeyError.
+    """
+    bits = 0
+    for skill in skills:
+        sid = skill_id(skill)
+        if sid is None:
+            if strict:
+                raise KeyError(f"Unknown skill: {skill}")
+            continue
+        bits |= 1 << sid
+    return bits
+
+
+def iter_ids(bits: int):
+    """Skill IDs set in a profile, ascending."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def names(bits: int) -> List[str]:
+    """Canonical skill names in a profile, in ID order."""
+    return [SKILLS[sid].name for sid in iter_ids(bits)]
+
+
+def expand_ats(bits: int) -> int:
+    """Add the skills implied for ATS purposes (e.g. mysql also counts as sql)."""
+    expanded = bits
+    for bit, implied in _IMPLIED_BITS.items():
+        if bits & bit:
+            expanded |= implied
+    return expanded
+
+
+def pack(bits: int) -> bytes:
+    """Compact storage form: little-endian uint16 array of skill IDs."""
+    ids = array("H", iter_ids(bits))
+    if sys.byteorder == "big":
+        ids.byteswap()
+    return ids.tobytes()
+
+
+def unpack(data: bytes) -> int:
+    ids = array("H")
+    ids.frombytes(data)
+    if sys.byteorder == "big":
+        ids.byteswap()
+    bits = 0
+    for sid in ids:
+        bits |= 1 << sid
+    return bits
+
+
+if __name__ == "__main__":
+    # Persist IDs for new skills: python -m app.ai.skill_registry
+    added = len(_TABLE) - len(_ID_TABLE)
+    with open(SKILL_IDS_PATH, "w", encoding="utf-8") as f:
+        json.dump(_TABLE, f, indent=2)
+        f.write("\n")
+    retired = sum(entry.retired for entry in SKILLS)
+    print(f"skill_ids.json: {len(_TABLE)} IDs ({added} added, {retired} retired)")
@@ -6,6 +6,8 @@ from typing import List, Dict, Set, Tuple, Optional, Union
 from enum import Enum
 from dataclasses import dataclass
 
+from app.ai import skill_registry
+
 class SkillLevel(Enum):
     EXPERT = "Expert"
     ADVANCED = "Advanced"
@@ -107,37 +109,16 @@ def categorize_skill(skill_name: str) -> Optional[str]:
     """
     Categorize a skill into a predefined category
     """
-    # This is a simplified version - in practice, you'd want a more comprehensive mapping
-    skill_name = skill_name.lower()
+    # Exact registry hit (canonical name or synonym)
+    entry = skill_registry.lookup(skill_name)
+    if entry and entry.category:
+        return entry.category
     
-    # Programming languages
-    programming_languages = ['python', 'javascript', 'java', 'c#', 'c++', 'go', 'ruby', 'php', 'swift', 'kotlin', 
-                            'typescript', 'rust', 'scala', 'r', 'matlab', 'perl', 'haskell', 'clojure', 'elixir']
-    
-    # Frameworks and libraries
-    frameworks = ['react', 'angular', 'vue', 'django', 'flask', 'spring', 'express', 'laravel', 'ruby on rails', 
-                 'asp.net', 'tensorflow', 'pytorch', 'keras', 'scikit-learn', 'pandas', 'numpy', 'node.js', 'next.js',
-                 'nuxt.js', 'svelte', 'jquery']
-    
-    # Databases
-    databases = ['mysql', 'postgresql', 'mongodb', 'redis', 'oracle', 'sql server', 'sqlite', 'dynamodb', 'cassandra',
-                'elasticsearch', 'firebase', 'cosmosdb', 'neo4j', 'couchbase']
-    
-    # Tools and platforms
-    tools = ['git', 'docker', 'kubernetes', 'jenkins', 'ansible', 'terraform', 'aws', 'azure', 'gcp', 'heroku',
-            'github', 'gitlab', 'bitbucket', 'jira', 'confluence', 'slack', 'trello', 'asana', 'figma', 'sketch',
-            'adobe xd', 'photoshop', 'illustrator', 'tableau', 'power bi', 'excel', 'looker', 'snowflake',
-            'databricks', 'kafka', 'rabbitmq', 'nginx', 'apache']
-    
-    # Check categories
-    if any(lang in skill_name for lang in programming_languages):
-        return SkillCategory.PROGRAMMING.value
-    elif any(framework in skill_name for framework in frameworks):
-        return SkillCategory.FRAMEWORKS.value
-    elif any(db in skill_name for db in databases):
-        return SkillCategory.DATABASES.value
-    elif any(tool in skill_name for tool in tools):
-        return SkillCategory.TOOLS.value
+    # Fall back to a loose containment check against the category lists
+    skill_name = skill_name.lower()
+    for category, skills in skill_registry.CATEGORY_SKILLS.items():
+        if any(skill in skill_name for skill in skills):
+            return category
     
     return None
 
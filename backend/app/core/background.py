@@ -1,4 +1,5 @@
 from celery import Celery
+import os
 import redis
 from redis.exceptions import ConnectionError as RedisConnectionError
 
@@ -6,6 +7,9 @@ from redis.exceptions import ConnectionError as RedisConnectionError
 REDIS_BROKER_URL = "redis://localhost:6379/0"
 REDIS_BACKEND_URL = "redis://localhost:6379/1"
 
+# How often celery beat rebuilds the resume corpus index
+RESUME_INDEX_REBUILD_SECONDS = int(os.getenv("RESUME_INDEX_REBUILD_SECONDS", str(6 * 3600)))
+
 # Test Redis connection
 def test_redis_connection():
     """Test if Redis is available"""
@@ -43,5 +47,11 @@ celery_app.conf.update(
             'timeout': 5.0
         }
     },
+    beat_schedule={
+        "rebuild-resume-index": {
+            "task": "app.tasks.resume_index_tasks.rebuild_resume_index_task",
+            "schedule": RESUME_INDEX_REBUILD_SECONDS,
+        },
+    },
 )
 
@@ -12,6 +12,15 @@ load_dotenv()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Who may use recruiter tools (e.g. searching every stored resume): users whose
+# record has one of these roles, or whose email is in RECRUITER_EMAILS
+RECRUITER_ROLES = ("recruiter", "admin")
+RECRUITER_EMAILS = {
+    email.strip().lower()
+    for email in os.getenv("RECRUITER_EMAILS", "").split(",")
+    if email.strip()
+}
+
 
 def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
     credentials_exception = HTTPException(
@@ -34,3 +43,14 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
 
     user["_id"] = str(user["_id"])
     return user
+
+
+def get_recruiter_user(current_user: dict = Depends(get_current_user)) -> dict:
+    """The current user, if they may use recruiter tools; 403 otherwise."""
+    email = (current_user.get("email") or "").lower()
+    if current_user.get("role") not in RECRUITER_ROLES and email not in RECRUITER_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Recruiter access required"
+        )
+    return current_user
@@ -0,0 +1,87 @@
+import time
+from typing import Dict, List, Optional
+
+import redis
+from redis.exceptions import RedisError
+
+from app.config import REDIS_CACHE_URL
+
+_client = None
+
+
+def get_redis() -> redis.Redis:
+    """Shared Redis client for application caches (lazy, one per process)."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            REDIS_CACHE_URL,
+            socket_connect_timeout=2,
+            socket_timeout=2
+        )
+    return _client
+
+
+class RedisLRUCache:
+    """
+    Size-bounded Redis cache with TTL and LRU eviction.
+
+    Every entry is stored under "<namespace>:<key>" with an expiry, and its
+    last access time is tracked in a sorted set so the cache can trim the
+    least recently used entries once it grows past max_entries. All
+    operations fail open: if Redis is unavailable the cache simply misses.
+    """
+
+    def __init__(self, namespace: str, ttl_seconds: int, max_entries: int):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lru_key = f"{namespace}:__lru__"
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            r = get_redis()
+            value = r.get(self._key(key))
+            if value is None:
+                r.zrem(self._lru_key, key)
+                return None
+            r.zadd(self._lru_key, {key: time.time()})
+            return value
+        except RedisError as e:
+            print(f"Cache read failed ({self.namespace}): {str(e)}")
+            return None
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """Fetch several entries in one round trip; only hits are returned."""
+        if not keys:
+            return {}
+        try:
+            r = get_redis()
+            values = r.mget([self._key(k) for k in keys])
+            hits = {k: v for k, v in zip(keys, values) if v is not None}
+            if hits:
+                r.zadd(self._lru_key, {k: time.time() for k in hits})
+            return hits
+        except RedisError as e:
+            print(f"Cache read failed ({self.namespace}): {str(e)}")
+            return {}
+
+    def set(self, key: str, value) -> None:
+        try:
+            r = get_redis()
+            pipe = r.pipeline()
+            pipe.set(self._key(key), value, ex=self.ttl_seconds)
+            pipe.zadd(self._lru_key, {key: time.time()})
+            pipe.zcard(self._lru_key)
+            size = pipe.execute()[-1]
+
+            # Evict least recently used entries beyond the size bound
+            overflow = size - self.max_entries
+            if overflow > 0:
+                evicted = r.zpopmin(self._lru_key, overflow)
+                if evicted:
+                    r.delete(*[self._key(k.decode("utf-8")) for k, _ in evicted])
+        except RedisError as e:
+            print(f"Cache write failed ({self.namespace}): {str(e)}")
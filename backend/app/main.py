@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth, resume, history, analytics, realtime, resume_status, resume_rewrite, jd_match, payments
+from app.routes import auth, resume, history, analytics, realtime, resume_status, resume_rewrite, jd_match, payments, resume_search
 
 app = FastAPI(title="ResumeIQ – Enterprise AI Resume Backend")
 
@@ -24,11 +24,37 @@ app.add_middleware(
 def root():
     return {"status": "ResumeIQ backend running 🚀"}
 
+
+@app.get("/status/llm")
+def llm_status():
+    """
+    OpenAI circuit breaker state and trip count (open = rule-based fallbacks
+    only), recent latency and hedged-request outcomes per prompt version, and
+    model routing outcomes (SLO hit rate, latency, tokens) per endpoint and model.
+    """
+    from app.ai.llm_client import openai_breaker
+    from app.ai.model_router import routing_stats
+    from app.utils.llm_latency import latency_stats
+
+    return {"openai": openai_breaker.status(), "latency": latency_stats(), "routing": routing_stats()}
+
+
+@app.get("/status/embeddings")
+def embedding_status():
+    """
+    Embedding cache hits per tier (memory, Redis) and misses, summed over all
+    processes and for the process that served this request.
+    """
+    from app.ai.embedding_cache import embedding_stats
+
+    return embedding_stats()
+
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(resume.router, prefix="/resume", tags=["Resume"])
 app.include_router(resume_status.router, prefix="/resume", tags=["Resume Status"])
 app.include_router(resume_rewrite.router, tags=["Resume Rewrite"])
 app.include_router(jd_match.router, tags=["JD Matching"])
+app.include_router(resume_search.router, tags=["Resume Search"])
 app.include_router(history.router, prefix="/history", tags=["History"])
 app.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
 app.include_router(realtime.router, prefix="/realtime", tags=["Realtime"])
@@ -0,0 +1,197 @@
+"""
+Shared Embedding Server
+
+Loads the sentence-transformer once and serves embeddings to the API and the
+Celery workers over a Unix socket, instead of every prefork worker holding
+its own copy of the model. Concurrent requests that arrive within a few
+milliseconds of each other are encoded together as one micro-batch.
+
+Run (from the backend directory):
+    python -m app.ml.embedding_server
+
+Clients set EMBEDDING_SERVER_SOCKET and use app.ai.embedding_engine.get_embedding_engine().
+
+Wire format (both directions are length-prefixed):
+    request:  !I byte length + UTF-8 JSON list of texts
+    response: !III (status, rows, dim) + rows*dim float32 values (status 0),
+              or + a UTF-8 error message of `rows` bytes (status 1)
+"""
+import asyncio
+import json
+import os
+import socket
+import struct
+import threading
+from typing import List, Tuple
+
+import numpy as np
+
+SOCKET_PATH = os.getenv("EMBEDDING_SERVER_SOCKET", "/tmp/resumeiq-embeddings.sock")
+# How long the batcher waits for more requests before encoding
+BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64"))
+CLIENT_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_CLIENT_TIMEOUT", "10"))
+
+_LENGTH = struct.Struct("!I")
+_RESPONSE_HEADER = struct.Struct("!III")
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+class EmbeddingServer:
+    def __init__(
+        self,
+        socket_path: str = SOCKET_PATH,
+        window_ms: float = BATCH_WINDOW_MS,
+        max_batch_size: int = MAX_BATCH_SIZE
+    ):
+        from app.ai.embedding_engine import create_embedding_engine
+
+        self.socket_path = socket_path
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        # The server itself honours EMBEDDING_BACKEND (e.g. onnx-int8)
+        self.engine = create_embedding_engine()
+        self.queue: "asyncio.Queue[Tuple[List[str], asyncio.Future]]" = None
+
+    async def _next_batch(self) -> List[Tuple[List[str], asyncio.Future]]:
+        """Wait for one request, then gather more until the window closes or the batch is full."""
+        batch = [await self.queue.get()]
+        size = len(batch[0][0])
+        deadline = asyncio.get_running_loop().time() + self.window
+
+        while size < self.max_batch_size:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _batcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            texts = [text for texts, _ in batch for text in texts]
+            try:
+                # Encoding runs off the event loop so new requests keep queueing
+                vectors = await loop.run_in_executor(None, self.engine.encode_many, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for request_texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                    texts = json.loads((await reader.readexactly(length)).decode("utf-8"))
+                except asyncio.IncompleteReadError:
+                    break  # client closed the connection
+
+                future = loop.create_future()
+                await self.queue.put((texts, future))
+                try:
+                    vectors = np.ascontiguousarray(await future, dtype=np.float32)
+                    rows, dim = vectors.shape
+                    writer.write(_RESPONSE_HEADER.pack(STATUS_OK, rows, dim) + vectors.tobytes())
+                except Exception as e:
+                    message = str(e).encode("utf-8")
+                    writer.write(_RESPONSE_HEADER.pack(STATUS_ERROR, len(message), 0) + message)
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            print(f"Embedding client connection dropped: {str(e)}")
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        self.queue = asyncio.Queue()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        batcher = asyncio.create_task(self._batcher())
+        print(f"Embedding server listening on {self.socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+
+class RemoteEmbeddingEngine:
+    """
+    Drop-in EmbeddingEngine backed by the embedding server. One connection
+    is kept per thread and re-opened once if the server restarted.
+    """
+
+    def __init__(self, socket_path: str = SOCKET_PATH, timeout: float = CLIENT_TIMEOUT_SECONDS):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.settimeout(self.timeout)
+            conn.connect(self.socket_path)
+            self._local.conn = conn
+        return conn
+
+    def _close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @staticmethod
+    def _recv_exactly(conn: socket.socket, size: int) -> bytes:
+        buffer = bytearray()
+        while len(buffer) < size:
+            chunk = conn.recv(size - len(buffer))
+            if not chunk:
+                raise ConnectionError("Embedding server closed the connection")
+            buffer.extend(chunk)
+        return bytes(buffer)
+
+    def _request(self, texts: List[str]) -> np.ndarray:
+        payload = json.dumps(texts).encode("utf-8")
+        conn = self._connection()
+        conn.sendall(_LENGTH.pack(len(payload)) + payload)
+
+        status, rows, dim = _RESPONSE_HEADER.unpack(self._recv_exactly(conn, _RESPONSE_HEADER.size))
+        if status != STATUS_OK:
+            raise RuntimeError(f"Embedding server error: {self._recv_exactly(conn, rows).decode('utf-8')}")
+        body = self._recv_exactly(conn, rows * dim * 4)
+        return np.frombuffer(body, dtype=np.float32).reshape(rows, dim)
+
+    def encode_many(self, texts: List[str]) -> np.ndarray:
+        """Embed several texts in one round trip (rows follow input order)."""
+        try:
+            return self._request(texts)
+        except (ConnectionError, socket.timeout, OSError):
+            # Stale connection (e.g. server restarted): retry once on a fresh one
+            self._close()
+            return self._request(texts)
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.encode_many([text])[0]
+
+
+if __name__ == "__main__":
+    asyncio.run(EmbeddingServer().serve())
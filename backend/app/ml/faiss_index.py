@@ -1,34 +1,137 @@
 import faiss
+import hashlib
 import json
 import os
+import sys
 import numpy as np
-from app.ai.embedding_engine import EmbeddingEngine
+from typing import List, Tuple
+from app.ai.embedding_engine import EmbeddingEngine, MODEL_NAME, get_embedding_engine
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 JOB_PATH = os.path.join(BASE_DIR, "ml", "job_roles.json")
 
+# Prebuilt artifacts, written next to job_roles.json by the offline build step
+INDEX_PATH = os.path.join(BASE_DIR, "ml", "job_roles.faiss")
+EMBEDDINGS_PATH = os.path.join(BASE_DIR, "ml", "job_roles.npy")
+META_PATH = os.path.join(BASE_DIR, "ml", "job_roles.meta.json")
+
+
+def job_roles_hash(path: str = JOB_PATH) -> str:
+    """Content hash of job_roles.json plus the embedding model it was built with."""
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read())
+    digest.update(MODEL_NAME.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _atomic_write(path: str, write, mode: str = "wb") -> None:
+    """Write via a temp file and rename, so readers never see a partial artifact."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, mode) as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _check_role_labels(jobs: dict) -> None:
+    """
+    The semantic scores are blended with role_engine's keyword scores, so
+    both must cover the same roles; a role missing here could never win.
+
+    Raises:
+        ValueError: if job_roles.json and ROLE_SKILL_MAP disagree
+    """
+    from app.ai.role_engine import ROLE_SKILL_MAP
+
+    missing = sorted(set(ROLE_SKILL_MAP) - set(jobs))
+    extra = sorted(set(jobs) - set(ROLE_SKILL_MAP))
+    if missing or extra:
+        raise ValueError(
+            f"job_roles.json does not match ROLE_SKILL_MAP (missing: {missing or 'none'}, "
+            f"not in ROLE_SKILL_MAP: {extra or 'none'})"
+        )
+
+
 class JobFAISSIndex:
-    def __init__(self):
-        self.embedder = EmbeddingEngine()
+    def __init__(self, rebuild: bool = False):
+        self._embedder = None
         self.index = None
         self.job_titles = []
-        self._build_index()
+        self.embeddings = None
+        if rebuild or not self._load_prebuilt():
+            self._build_index()
+
+    @property
+    def embedder(self) -> EmbeddingEngine:
+        # Only load the model (or connect to the embedding server) when needed
+        if self._embedder is None:
+            self._embedder = get_embedding_engine()
+        return self._embedder
+
+    def _load_prebuilt(self) -> bool:
+        """Load the prebuilt index if it matches the current job_roles.json."""
+        try:
+            with open(META_PATH, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("source_hash") != job_roles_hash():
+                return False
+
+            self.embeddings = np.load(EMBEDDINGS_PATH, mmap_mode="r")
+            self.index = faiss.read_index(INDEX_PATH)
+            self.job_titles = meta["job_titles"]
+            return self.index.ntotal == len(self.job_titles)
+        except (OSError, ValueError, KeyError, RuntimeError):
+            return False
 
     def _build_index(self):
         with open(JOB_PATH, "r", encoding="utf-8") as f:
             jobs = json.load(f)
+        _check_role_labels(jobs)
 
-        embeddings = []
-        for title, data in jobs.items():
-            emb = self.embedder.encode(data["description"])
-            embeddings.append(emb)
-            self.job_titles.append(title)
+        self.job_titles = list(jobs)
+        # One batched call, the same path runtime embeddings take
+        embeddings = self.embedder.encode_many([jobs[title]["description"] for title in self.job_titles])
 
-        vectors = np.array(embeddings).astype("float32")
+        vectors = np.asarray(embeddings, dtype="float32")
+        self.embeddings = vectors
         self.index = faiss.IndexFlatIP(vectors.shape[1])
         self.index.add(vectors)
 
-    def search(self, resume_embedding, top_k=1):
+        try:
+            self._save()
+        except OSError as e:
+            print(f"Could not persist job role index: {str(e)}")
+
+    def _save(self):
+        _atomic_write(EMBEDDINGS_PATH, lambda f: np.save(f, self.embeddings))
+        _atomic_write(INDEX_PATH, lambda f: f.write(faiss.serialize_index(self.index).tobytes()))
+        meta = {
+            "source_hash": job_roles_hash(),
+            "model": MODEL_NAME,
+            "dim": int(self.embeddings.shape[1]),
+            "job_titles": self.job_titles,
+        }
+        # Meta last: it is what marks the artifacts as valid
+        _atomic_write(META_PATH, lambda f: json.dump(meta, f, indent=2), mode="w")
+
+    def search(self, resume_embedding, top_k=1) -> List[Tuple[str, float]]:
+        """
+        Nearest job roles by cosine similarity.
+
+        Returns:
+            Up to top_k (title, similarity) pairs, best first
+        """
         resume_embedding = np.array([resume_embedding]).astype("float32")
+        top_k = max(1, min(top_k, self.index.ntotal))
         scores, indices = self.index.search(resume_embedding, top_k)
-        return self.job_titles[indices[0][0]], float(scores[0][0])
+        return [
+            (self.job_titles[index], float(score))
+            for index, score in zip(indices[0], scores[0])
+            if index >= 0
+        ]
+
+
+if __name__ == "__main__":
+    # Offline build step: python -m app.ml.faiss_index [--force]
+    force = "--force" in sys.argv
+    job_index = JobFAISSIndex(rebuild=force)
+    print(f"Job role index ready: {len(job_index.job_titles)} roles -> {INDEX_PATH}")
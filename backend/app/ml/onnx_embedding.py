@@ -0,0 +1,135 @@
+"""
+ONNX Runtime Embedding Backend
+
+Runs all-MiniLM-L6-v2 under onnxruntime (optionally int8-quantized) with a
+Rust `tokenizers` tokenizer, so CPU-only processes embed text without
+importing PyTorch. Output matches SentenceTransformer.encode(...,
+normalize_embeddings=True): mean pooling over the attention mask, then L2
+normalization.
+
+Export once (needs torch, sentence-transformers and onnx, e.g. at image build):
+    python -m app.ml.onnx_embedding [--output-dir DIR] [--no-quantize]
+
+Then select it with EMBEDDING_BACKEND=onnx-int8 (or onnx for fp32).
+"""
+import argparse
+import os
+from typing import List
+
+import numpy as np
+
+from app.ai.embedding_engine import MODEL_NAME
+
+BASE_DIR = os.path.dirname(__file__)
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join(BASE_DIR, "onnx", MODEL_NAME))
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 = onnxruntime default
+
+FP32_FILENAME = "model.onnx"
+INT8_FILENAME = "model.int8.onnx"
+TOKENIZER_FILENAME = "tokenizer.json"
+
+# Same truncation as the SentenceTransformer model (max_seq_length)
+MAX_SEQ_LENGTH = 256
+
+
+def export_onnx(output_dir: str = ONNX_MODEL_DIR, quantize: bool = True) -> str:
+    """
+    Export the sentence-transformer's encoder to ONNX and, optionally, a
+    dynamically int8-quantized copy next to it.
+
+    Args:
+        output_dir: Directory for the model files and tokenizer.json
+        quantize: Also write the int8 model
+
+    Returns:
+        str: output_dir
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+    model = SentenceTransformer(MODEL_NAME, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(output_dir, FP32_FILENAME)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    print(f"Exported {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(output_dir, INT8_FILENAME)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"Quantized {int8_path}")
+
+    return output_dir
+
+
+class OnnxEmbeddingEngine:
+    """Drop-in EmbeddingEngine running the exported model under onnxruntime."""
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, quantized: bool = True):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, INT8_FILENAME if quantized else FP32_FILENAME)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"ONNX model not found: {model_path} (run python -m app.ml.onnx_embedding)"
+            )
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILENAME))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode_many(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalization
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.encode_many([text])[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--output-dir", default=ONNX_MODEL_DIR)
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 model")
+    args = parser.parse_args()
+    export_onnx(args.output_dir, quantize=not args.no_quantize)
@@ -0,0 +1,454 @@
+"""
+Resume Corpus Vector Index
+
+HNSW index over the embeddings of every stored resume, so a job description
+can be matched against the whole corpus in milliseconds.
+
+Lifecycle:
+    - process_resume_task stores each resume's embedding on its Mongo record
+      (float16 bytes, see encode_vector) and appends the resume ID to a
+      Redis stream of pending resumes
+    - every API process reads that stream from its own cursor before each
+      query and adds the new vectors to its in-memory index (incremental
+      updates); reading does not consume entries, so every API process sees
+      every resume until the entry is trimmed
+    - rebuild_resume_index_task periodically rebuilds the index from the
+      resumes collection in the background, writes the index and its ID list
+      into a new build directory under RESUME_INDEX_DIR and points a version
+      key at it; API processes load that build on their next query
+    - each API process records the build it has loaded, with a heartbeat, in
+      a Redis hash; stream entries are only trimmed up to the oldest build
+      still loaded by a live process, so a process never loses resumes that
+      are missing from its build
+
+RESUME_INDEX_DIR must be storage shared by the Celery workers and every API
+host (e.g. a mounted volume). A host that cannot see the published build keeps
+its old index, which holds back trimming of the stream, and new resumes only
+reach it through the stream (capped at PENDING_MAX_LEN entries).
+"""
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from bson.binary import Binary
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+RESUME_INDEX_DIR = os.getenv("RESUME_INDEX_DIR", os.path.join(BASE_DIR, "data", "resume_index"))
+# Files inside each build directory (RESUME_INDEX_DIR/<build id>/)
+INDEX_FILE = "resumes.faiss"
+IDS_FILE = "resume_ids.json"
+
+# In-memory index: "hnsw" (float32 vectors), "hnsw-sq8" (8-bit scalar quantized,
+# 1 byte per dimension) or "ivfpq" (product quantized, PQ_M bytes per vector).
+# See benchmarks/bench_vector_compression.py for recall vs memory.
+RESUME_INDEX_TYPE = os.getenv("RESUME_INDEX_TYPE", "hnsw")
+
+# HNSW graph degree and search breadth (higher = better recall, slower)
+HNSW_M = int(os.getenv("RESUME_INDEX_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("RESUME_INDEX_EF_CONSTRUCTION", "80"))
+HNSW_EF_SEARCH = int(os.getenv("RESUME_INDEX_EF_SEARCH", "64"))
+
+# IVF-PQ: coarse lists, PQ sub-vectors (must divide the dimension) and lists probed per query
+IVF_NLIST = int(os.getenv("RESUME_INDEX_IVF_NLIST", "1024"))
+PQ_M = int(os.getenv("RESUME_INDEX_PQ_M", "48"))
+IVF_NPROBE = int(os.getenv("RESUME_INDEX_IVF_NPROBE", "16"))
+# IVF-PQ needs this many training vectors per list (FAISS warns below 39)
+IVF_MIN_TRAIN_PER_LIST = 39
+
+# Redis stream of newly indexed resume IDs (entry IDs are millisecond timestamps)
+PENDING_KEY = "resume_index:pending"
+# Build ID (milliseconds at rebuild start) of the published index
+VERSION_KEY = "resume_index:version"
+# Hash of API process -> {"build": loaded build ID, "ts": last refresh}
+CONSUMERS_KEY = "resume_index:consumers"
+# Processes that have not refreshed for this long no longer hold back trimming
+# (when they next query they load the newest build, which covers the trimmed entries)
+CONSUMER_TTL_SECONDS = int(os.getenv("RESUME_INDEX_CONSUMER_TTL", "86400"))
+# Max pending resume IDs applied per query, so one query never stalls on a backlog
+PENDING_DRAIN_LIMIT = int(os.getenv("RESUME_INDEX_DRAIN_LIMIT", "500"))
+# Safety cap on the stream length if rebuilds stop trimming it
+PENDING_MAX_LEN = int(os.getenv("RESUME_INDEX_PENDING_MAX_LEN", "100000"))
+# Queries a pending resume without a stored embedding is retried for
+PENDING_MAX_RETRIES = int(os.getenv("RESUME_INDEX_PENDING_RETRIES", "20"))
+REBUILD_BATCH_SIZE = int(os.getenv("RESUME_INDEX_REBUILD_BATCH", "256"))
+# Embed resumes during analysis and keep them searchable
+RESUME_INDEX_ENABLED = os.getenv("RESUME_INDEX_ENABLED", "true").lower() == "true"
+
+
+def resume_embedding_text(record: dict) -> str:
+    """Text embedded for a stored resume: its parsed sections, else the raw text."""
+    sections = record.get("sections") or {}
+    text = " ".join(
+        sections.get(name, "") for name in ("skills", "experience", "projects", "education")
+    )
+    return text if text.strip() else record.get("raw_text", "")
+
+
+def encode_vector(vector) -> Binary:
+    """Store an embedding as float16 bytes (half the size of float32, ~1/4 of a BSON list)."""
+    return Binary(np.asarray(vector, dtype=np.float16).tobytes())
+
+
+def decode_vector(value) -> np.ndarray:
+    """float32 vector from stored float16 bytes (or a legacy list of floats)."""
+    if isinstance(value, (bytes, Binary)):
+        return np.frombuffer(value, dtype=np.float16).astype(np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+def embed_resume(record: dict) -> Optional[Binary]:
+    """Embedding to store on a resume record, or None if embedding is unavailable."""
+    if not RESUME_INDEX_ENABLED:
+        return None
+    try:
+        from app.ai.embedding_engine import get_embedding_engine
+
+        return encode_vector(get_embedding_engine().encode(resume_embedding_text(record)))
+    except Exception as e:
+        print(f"Resume embedding failed, resume will not be searchable until backfilled: {str(e)}")
+        return None
+
+
+def _new_index(dim: int, training: Optional[np.ndarray] = None, index_type: Optional[str] = None):
+    """
+    Empty index wrapped in an IndexIDMap2, which maps FAISS rows to our
+    integer IDs (positions in resume_ids).
+
+    Quantized indexes must be trained, so they are only used when enough
+    training vectors are given; otherwise (and for incremental adds into an
+    empty process) a plain HNSW index is used.
+    """
+    import faiss
+
+    index_type = index_type or RESUME_INDEX_TYPE
+    if index_type == "hnsw-sq8" and training is not None:
+        hnsw_sq = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        hnsw_sq.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        hnsw_sq.hnsw.efSearch = HNSW_EF_SEARCH
+        hnsw_sq.train(training)
+        return faiss.IndexIDMap2(hnsw_sq)
+    if index_type == "ivfpq" and training is not None:
+        nlist = min(IVF_NLIST, len(training) // IVF_MIN_TRAIN_PER_LIST)
+        if nlist >= 1:
+            quantizer = faiss.IndexFlatIP(dim)
+            ivfpq = faiss.IndexIVFPQ(quantizer, dim, nlist, PQ_M, 8, faiss.METRIC_INNER_PRODUCT)
+            ivfpq.train(training)
+            ivfpq.nprobe = IVF_NPROBE
+            return faiss.IndexIDMap2(ivfpq)
+        print("Too few resumes to train IVF-PQ, using HNSW")
+
+    hnsw = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    hnsw.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    hnsw.hnsw.efSearch = HNSW_EF_SEARCH
+    return faiss.IndexIDMap2(hnsw)
+
+
+def _set_search_params(index) -> None:
+    """Search-time knobs are not fully persisted by write_index; reapply them."""
+    import faiss
+
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = HNSW_EF_SEARCH
+    elif isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = IVF_NPROBE
+
+
+def enqueue_resume(resume_id: str) -> None:
+    """Queue a newly stored resume for incremental indexing (fails open)."""
+    from redis.exceptions import RedisError
+    from app.core.redis_cache import get_redis
+
+    try:
+        get_redis().xadd(PENDING_KEY, {"id": resume_id}, maxlen=PENDING_MAX_LEN, approximate=True)
+    except RedisError as e:
+        print(f"Could not queue resume {resume_id} for indexing: {str(e)}")
+
+
+def _build_dir(build_id: str) -> str:
+    return os.path.join(RESUME_INDEX_DIR, build_id)
+
+
+def _latest_build() -> Optional[str]:
+    """Newest complete build directory, for when the version key is unavailable."""
+    try:
+        builds = [name for name in os.listdir(RESUME_INDEX_DIR) if name.isdigit()]
+    except OSError:
+        return None
+    return max(builds, key=int) if builds else None
+
+
+def _remove_old_builds(keep: int = 2) -> None:
+    """Delete all but the newest builds (the previous one may still be loading)."""
+    try:
+        names = os.listdir(RESUME_INDEX_DIR)
+    except OSError:
+        return
+    builds = sorted((name for name in names if name.isdigit()), key=int)
+    stale = builds[:-keep] + [name for name in names if name.endswith(".tmp")]
+    for name in stale:
+        shutil.rmtree(_build_dir(name), ignore_errors=True)
+
+
+def trim_pending(r) -> None:
+    """
+    Trim pending-stream entries that every live API process already has in
+    its loaded build. Processes that stopped refreshing are dropped first.
+
+    Args:
+        r: Redis client
+    """
+    now = time.time()
+    builds = []
+    for consumer, value in r.hgetall(CONSUMERS_KEY).items():
+        try:
+            state = json.loads(value)
+            build, seen_at = int(state["build"]), float(state["ts"])
+        except (ValueError, KeyError, TypeError):
+            r.hdel(CONSUMERS_KEY, consumer)
+            continue
+        if now - seen_at > CONSUMER_TTL_SECONDS:
+            r.hdel(CONSUMERS_KEY, consumer)
+        else:
+            builds.append(build)
+    if builds:
+        # Resumes queued before the oldest loaded build started are in every loaded build
+        r.xtrim(PENDING_KEY, minid=f"{min(builds)}-0")
+
+
+def build_index(backfill: bool = True) -> int:
+    """
+    Rebuild the index from the resumes collection and publish it.
+
+    Args:
+        backfill: Embed (and store embeddings for) resumes analysed before
+            embeddings were stored
+
+    Returns:
+        int: Number of indexed resumes
+    """
+    import faiss
+    from app.ai.embedding_engine import get_embedding_engine
+    from app.core.redis_cache import get_redis
+    from app.database.celery_db import resumes
+
+    started_at = time.time()
+    resume_ids: List[str] = []
+    vectors: List[np.ndarray] = []
+
+    if backfill:
+        engine = get_embedding_engine()
+        query = {"embedding": {"$exists": False}}
+        projection = {"sections": 1, "raw_text": 1}
+        batch: List[dict] = []
+        for record in resumes.find(query, projection):
+            batch.append(record)
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                _backfill(engine, resumes, batch)
+                batch = []
+        if batch:
+            _backfill(engine, resumes, batch)
+
+    for record in resumes.find({"embedding": {"$exists": True}}, {"embedding": 1}):
+        resume_ids.append(str(record["_id"]))
+        vectors.append(decode_vector(record["embedding"]))
+
+    if not vectors:
+        print("Resume index rebuild: no embeddings stored yet")
+        return 0
+
+    matrix = np.vstack(vectors)
+    index = _new_index(matrix.shape[1], training=matrix)
+    index.add_with_ids(matrix, np.arange(len(resume_ids), dtype=np.int64))
+
+    # Index and IDs go into one directory that is renamed into place, so a
+    # reader can never pair one build's index with another build's IDs
+    build_id = str(int(started_at * 1000))
+    tmp_dir = _build_dir(build_id) + ".tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    faiss.write_index(index, os.path.join(tmp_dir, INDEX_FILE))
+    with open(os.path.join(tmp_dir, IDS_FILE), "w", encoding="utf-8") as f:
+        json.dump(resume_ids, f)
+    os.replace(tmp_dir, _build_dir(build_id))
+
+    r = get_redis()
+    r.set(VERSION_KEY, build_id)
+    # Entries after older builds are trimmed once every API process has loaded a newer one
+    trim_pending(r)
+    _remove_old_builds()
+    print(f"Resume index rebuilt: {len(resume_ids)} resumes in {time.time() - started_at:.1f}s")
+    return len(resume_ids)
+
+
+def _backfill(engine, collection, records: List[dict]) -> None:
+    embeddings = engine.encode_many([resume_embedding_text(r) for r in records])
+    for record, embedding in zip(records, embeddings):
+        collection.update_one(
+            {"_id": record["_id"]},
+            {"$set": {"embedding": encode_vector(embedding)}}
+        )
+
+
+class ResumeIndex:
+    """In-memory resume index of one API process (see module docstring)."""
+
+    def __init__(self):
+        self.index = None
+        self.resume_ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._version: Optional[str] = None
+        # Last pending-stream entry applied by this process (None: from the start)
+        self._cursor: Optional[str] = None
+        # Pending resumes whose embedding was not stored yet -> attempts so far
+        self._retry: Dict[str, int] = {}
+        self._consumer_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+
+    def _load(self, build_id: Optional[str]) -> None:
+        """Load one published build; the pending stream is re-read from its start."""
+        import faiss
+
+        build_id = build_id or _latest_build()
+        if build_id is None or not os.path.isdir(_build_dir(build_id)):
+            return
+        index = faiss.read_index(os.path.join(_build_dir(build_id), INDEX_FILE))
+        with open(os.path.join(_build_dir(build_id), IDS_FILE), "r", encoding="utf-8") as f:
+            resume_ids = json.load(f)
+        _set_search_params(index)
+
+        self.index = index
+        self.resume_ids = resume_ids
+        self._positions = {rid: i for i, rid in enumerate(resume_ids)}
+        self._version = build_id
+        # Everything queued after the rebuild started may be missing from it
+        self._cursor = f"{int(build_id) - 1}-{2 ** 64 - 1}"
+
+    def _add(self, resume_ids: List[str]) -> None:
+        from bson import ObjectId
+        from bson.errors import InvalidId
+        from app.database.celery_db import resumes
+
+        object_ids = []
+        for rid in resume_ids:
+            try:
+                object_ids.append(ObjectId(rid))
+            except InvalidId:
+                continue
+        if not object_ids:
+            return
+
+        records = resumes.find({"_id": {"$in": object_ids}, "embedding": {"$exists": True}}, {"embedding": 1})
+        new_ids, vectors = [], []
+        found = set()
+        for record in records:
+            rid = str(record["_id"])
+            found.add(rid)
+            if rid in self._positions:
+                continue
+            self._positions[rid] = len(self.resume_ids)
+            self.resume_ids.append(rid)
+            new_ids.append(self._positions[rid])
+            vectors.append(decode_vector(record["embedding"]))
+
+        # Queued before its embedding was visible (replica lag): try again later
+        for oid in object_ids:
+            rid = str(oid)
+            if rid in found:
+                self._retry.pop(rid, None)
+            else:
+                attempts = self._retry.get(rid, 0) + 1
+                if attempts <= PENDING_MAX_RETRIES:
+                    self._retry[rid] = attempts
+                else:
+                    self._retry.pop(rid, None)
+                    print(f"Resume {rid} has no stored embedding; left for the next rebuild")
+        if not vectors:
+            return
+
+        matrix = np.vstack(vectors)
+        if self.index is None:
+            self.index = _new_index(matrix.shape[1])
+        self.index.add_with_ids(matrix, np.array(new_ids, dtype=np.int64))
+
+    def _heartbeat(self, r) -> None:
+        """Record the build this process has loaded (see trim_pending)."""
+        if self._version is not None:
+            state = json.dumps({"build": self._version, "ts": time.time()})
+            r.hset(CONSUMERS_KEY, self._consumer_id, state)
+
+    def refresh(self) -> None:
+        """Load a newer rebuilt index and apply pending incremental adds."""
+        from redis.exceptions import RedisError
+        from app.core.redis_cache import get_redis
+
+        with self._lock:
+            try:
+                r = get_redis()
+                version = r.get(VERSION_KEY)
+                version = version.decode("utf-8") if version is not None else None
+                loaded = self._version
+                if self.index is None or (version is not None and version != self._version):
+                    self._load(version)
+                self._heartbeat(r)
+                if self._version != loaded:
+                    trim_pending(r)
+                # Exclusive start: entries after this process's cursor
+                entries = r.xrange(
+                    PENDING_KEY,
+                    min=f"({self._cursor}" if self._cursor else "-",
+                    count=PENDING_DRAIN_LIMIT
+                )
+            except RedisError as e:
+                print(f"Resume index refresh skipped: {str(e)}")
+                if self.index is None:
+                    self._load(None)
+                entries = []
+
+            pending = list(self._retry)
+            for entry_id, fields in entries:
+                self._cursor = entry_id.decode("utf-8")
+                rid = fields.get(b"id")
+                if rid is not None:
+                    pending.append(rid.decode("utf-8"))
+            if pending:
+                self._add(list(dict.fromkeys(pending)))
+
+    def search(self, embedding: np.ndarray, top_n: int = 20) -> List[Tuple[str, float]]:
+        """
+        Most similar stored resumes to a query embedding.
+
+        Returns:
+            Up to top_n (resume_id, cosine similarity) pairs, best first
+        """
+        self.refresh()
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return []
+            query = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+            scores, ids = self.index.search(query, min(top_n, self.index.ntotal))
+            return [
+                (self.resume_ids[i], float(score))
+                for i, score in zip(ids[0], scores[0])
+                if i >= 0
+            ]
+
+
+_resume_index: Optional[ResumeIndex] = None
+
+
+def get_resume_index() -> ResumeIndex:
+    """Shared resume index of this process."""
+    global _resume_index
+    if _resume_index is None:
+        _resume_index = ResumeIndex()
+    return _resume_index
+
+
+if __name__ == "__main__":
+    # Synchronous rebuild: python -m app.ml.resume_index
+    build_index()
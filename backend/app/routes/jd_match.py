@@ -4,7 +4,7 @@ JD vs Resume Matching API Routes
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from app.core.deps import get_current_user
-from app.ai.jd_match_engine import compare_resume_with_jd
+from app.ai.jd_match_engine import compare_resume_with_jd_async
 from app.database.celery_db import resumes
 from bson import ObjectId
 
@@ -14,6 +14,7 @@ router = APIRouter(prefix="/jd", tags=["JD Matching"])
 class JDMatchRequest(BaseModel):
     resume_id: str
     job_description: str
+    use_cache: bool = True  # False forces a fresh LLM answer
 
 
 @router.post("/match")
@@ -55,9 +56,11 @@ async def match_resume_with_jd(
         raise HTTPException(status_code=400, detail="Resume text not available for matching. Please re-upload the resume.")
     
     try:
-        match_result = compare_resume_with_jd(
+        match_result = await compare_resume_with_jd_async(
             resume_text=resume_text,
-            job_description=request.job_description
+            job_description=request.job_description,
+            use_cache=request.use_cache,
+            plan=current_user.get("plan", "free")
         )
         
         # Remove error field if present and set fallback_used flag
@@ -1,8 +1,13 @@
 import stripe
-from fastapi import APIRouter, HTTPException, Request
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from app.core.deps import get_current_user
+from app.database.db import users
 
 router = APIRouter()
 
@@ -15,6 +20,31 @@ PRICE_IDS = {
     "pro": "price_1Oxxxxxxx",   # Replace with actual Pro price ID
     "premium": "price_1Oxxxxxxx"  # Replace with actual Premium price ID
 }
+# Stripe price ID -> plan name, for the webhook
+PLANS_BY_PRICE_ID = {price_id: plan for plan, price_id in PRICE_IDS.items()}
+
+
+def _plan_for_session(session) -> Optional[str]:
+    """Plan bought in a checkout session (metadata holds a plan name or price ID)."""
+    price_id = (session.get("metadata") or {}).get("price_id")
+    if price_id in PRICE_IDS:
+        return price_id
+    return PLANS_BY_PRICE_ID.get(price_id)
+
+
+def _user_filter(session) -> Optional[Dict[str, Any]]:
+    """
+    Users query for the buyer of a checkout session: the user ID set as
+    client_reference_id at checkout, else the email the session was opened for.
+    """
+    try:
+        if session.get("client_reference_id"):
+            return {"_id": ObjectId(session.get("client_reference_id"))}
+    except InvalidId:
+        print(f"Checkout session {session.id} has an invalid client_reference_id")
+    email = session.get("customer_email") or (session.get("metadata") or {}).get("user_email")
+    return {"email": email} if email else None
+
 
 @router.post("/process-payment")
 async def process_payment(request: Request):
@@ -58,7 +88,7 @@ async def process_payment(request: Request):
         raise HTTPException(status_code=500, detail=f"Payment processing failed: {str(e)}")
 
 @router.post("/create-checkout-session")
-async def create_checkout_session(request: Request):
+async def create_checkout_session(request: Request, current_user: dict = Depends(get_current_user)):
     try:
         data = await request.json()
         price_id = data.get("priceId")
@@ -92,8 +122,13 @@ async def create_checkout_session(request: Request):
             mode='subscription',
             success_url=f"{os.getenv('FRONTEND_URL', 'http://localhost:5173')}/payment/success?session_id={{CHECKOUT_SESSION_ID}}",
             cancel_url=f"{os.getenv('FRONTEND_URL', 'http://localhost:5173')}/payment/cancel",
+            # Ties the session to the signed-in account for the webhook,
+            # whatever email is typed in at checkout
+            client_reference_id=current_user["_id"],
+            customer_email=current_user["email"],
             metadata={
                 'price_id': price_id,
+                'user_email': current_user["email"],
             }
         )
         
@@ -149,7 +184,25 @@ async def webhook(request: Request):
             session = event['data']['object']
             # Handle successful payment
             print(f"Payment successful for session: {session.id}")
-            # TODO: Update user's subscription status in database
+            # Record the plan on the user; it selects their LLM model tier
+            plan = _plan_for_session(session)
+            user_filter = _user_filter(session)
+            if plan and user_filter:
+                users.update_one(
+                    user_filter,
+                    {"$set": {"plan": plan, "stripe_customer_id": session.get("customer")}}
+                )
+            else:
+                print(f"Checkout session {session.id} has no plan or user; user plan not updated")
+
+        elif event.type == 'customer.subscription.deleted':
+            subscription = event['data']['object']
+            print(f"Subscription cancelled: {subscription.id}")
+            if subscription.get("customer"):
+                users.update_one(
+                    {"stripe_customer_id": subscription.get("customer")},
+                    {"$set": {"plan": "free"}}
+                )
             
         elif event.type == 'invoice.payment_succeeded':
             invoice = event['data']['object']
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
 from fastapi.responses import FileResponse
 from datetime import datetime
 from app.core.deps import get_current_user
 from app.core.background import test_redis_connection
 from app.utils.file_handler import save_file
 from app.tasks.resume_tasks import process_resume_task
+from app.ai.semantic_role_engine import ROLE_MODES
+from typing import Optional
 from app.database.celery_db import user_history, resumes
 from bson import ObjectId
 import os
@@ -15,6 +17,7 @@ router = APIRouter()
 @router.post("/analyze-async")
 async def analyze_resume(
     file: UploadFile = File(...),
+    role_mode: Optional[str] = Query(None, description="Role prediction mode: keyword, semantic or hybrid"),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -22,6 +25,12 @@ async def analyze_resume(
     Returns task_id to check status later.
     Automatically saves to user history immediately.
     """
+    if role_mode is not None and role_mode not in ROLE_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid role_mode. Allowed: {', '.join(ROLE_MODES)}"
+        )
+
     # Check Redis connection first
     if not test_redis_connection():
         raise HTTPException(
@@ -74,7 +83,9 @@ async def analyze_resume(
 
     # Trigger Celery task for background processing
     try:
-        task = process_resume_task.delay(file_path, user_email, history_id)
+        task = process_resume_task.delay(
+            file_path, user_email, history_id, role_mode, current_user.get("plan", "free")
+        )
         
         # Update history with task_id
         user_history.update_one(
@@ -1,11 +1,14 @@
 """
 Resume Rewrite API Routes
 """
+import json
+from typing import Any, Dict, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from app.core.deps import get_current_user
-from app.ai.resume_rewrite_engine import generate_resume_rewrite
-from app.ai.ats_engine import ats_score
+from app.ai.resume_rewrite_engine import REWRITE_MODES, generate_resume_rewrite_async, stream_resume_rewrite
+from app.ai.ats_engine import ats_score, role_fit_for
 from app.database.celery_db import resumes
 from app.utils.role_normalizer import normalize_role
 from bson import ObjectId
@@ -17,16 +20,12 @@ class RewriteRequest(BaseModel):
     resume_id: str
     target_role: str
     candidate_level: str = "Mid"  # Fresher | Junior | Mid | Senior
+    use_cache: bool = True  # False forces a fresh LLM answer
+    mode: Optional[str] = None  # single | parallel (per-section fan-out); server default if omitted
 
 
-@router.post("/rewrite")
-async def rewrite_resume(
-    request: RewriteRequest,
-    current_user: dict = Depends(get_current_user)
-):
-    """
-    Rewrite resume content for ATS optimization and role-specific targeting
-    """
+def _load_resume_text(request: RewriteRequest, current_user: dict) -> Tuple[dict, str]:
+    """The caller's resume and its raw text, or the HTTP error explaining why not."""
     # Get resume from database
     resume = resumes.find_one({"_id": ObjectId(request.resume_id)})
     if not resume:
@@ -41,20 +40,50 @@ async def rewrite_resume(
     
     if not resume_text or not resume_text.strip():
         raise HTTPException(status_code=400, detail="Resume text not available for rewriting. Please re-upload the resume.")
+
+    return resume, resume_text
+
+
+def _rewrite_context(resume: dict, resume_text: str, target_role: str) -> Tuple[str, Dict[str, Any]]:
+    """Normalized target role and the ATS data the rewrite is based on."""
+    # Normalize the target role
+    normalized_role = normalize_role(target_role)
+
+    # Use the role fit stored with the analysis; recompute only for
+    # resumes analysed before role_fit was stored
+    ats_data = role_fit_for(resume.get("role_fit"), target_role)
+    if ats_data is None:
+        ats_data = ats_score(resume_text, normalized_role)
+    return normalized_role, ats_data
+
+
+@router.post("/rewrite")
+async def rewrite_resume(
+    request: RewriteRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Rewrite resume content for ATS optimization and role-specific targeting
+    """
+    if request.mode is not None and request.mode not in REWRITE_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid mode. Allowed: {', '.join(REWRITE_MODES)}"
+        )
+    resume, resume_text = _load_resume_text(request, current_user)
     
     try:
-        # Normalize the target role
-        normalized_role = normalize_role(request.target_role)
-        
-        # Get fresh ATS data with normalized role
-        ats_data = ats_score(resume_text, normalized_role)
+        normalized_role, ats_data = _rewrite_context(resume, resume_text, request.target_role)
         
         # Generate rewrite with fresh ATS data and normalized role
-        rewritten = generate_resume_rewrite(
+        rewritten = await generate_resume_rewrite_async(
             resume_text=resume_text,
             target_role=normalized_role,
             candidate_level=request.candidate_level,
-            ats_data=ats_data
+            ats_data=ats_data,
+            use_cache=request.use_cache,
+            mode=request.mode,
+            plan=current_user.get("plan", "free")
         )
         
         # Ensure fallback_used is set if needed
@@ -77,3 +106,58 @@ async def rewrite_resume(
             detail="An error occurred while processing your resume. Please try again later."
         )
 
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/rewrite/stream")
+async def rewrite_resume_stream(
+    request: RewriteRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Streaming /resume/rewrite (Server-Sent Events).
+
+    Sends "item" events (each experience bullet, project, keyword) and
+    "section" events (each finished field) while the LLM is still writing,
+    then one "done" event with the same payload /resume/rewrite returns.
+    If the LLM fails, an "error" event precedes "done"; when its
+    discard_partial flag is set, the items and sections already received
+    should be dropped in favour of the fallback rewrite in "done".
+
+    Always a single streamed completion: mode "parallel" is rejected.
+    """
+    if request.mode is not None and request.mode != "single":
+        raise HTTPException(
+            status_code=400,
+            detail="Streaming rewrite only supports mode 'single'"
+        )
+    resume, resume_text = _load_resume_text(request, current_user)
+    normalized_role, ats_data = _rewrite_context(resume, resume_text, request.target_role)
+
+    async def events():
+        yield _sse("start", {"resume_id": request.resume_id, "target_role": normalized_role})
+        async for event in stream_resume_rewrite(
+            resume_text=resume_text,
+            target_role=normalized_role,
+            candidate_level=request.candidate_level,
+            ats_data=ats_data,
+            use_cache=request.use_cache,
+            plan=current_user.get("plan", "free")
+        ):
+            if event["event"] == "done":
+                yield _sse("done", {
+                    "resume_id": request.resume_id,
+                    "target_role": normalized_role,
+                    "original_role": request.target_role,
+                    "rewritten": event["rewritten"]
+                })
+            else:
+                yield _sse(event["event"], {k: v for k, v in event.items() if k != "event"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,76 @@
+"""
+Resume Corpus Search API Routes
+
+Semantic "find candidates similar to this JD" search over every stored
+resume, backed by the resume vector index (app.ml.resume_index).
+
+Recruiter-only (see app.core.deps.get_recruiter_user). Uploaded filenames
+usually carry the candidate's name, so they are only returned for the
+searcher's own resumes.
+"""
+import time
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from app.core.deps import get_recruiter_user
+from app.ai.embedding_engine import get_embedding_engine
+from app.ml.resume_index import get_resume_index
+from app.database.celery_db import resumes
+from bson import ObjectId
+
+router = APIRouter(prefix="/resume", tags=["Resume Search"])
+
+
+class ResumeSearchRequest(BaseModel):
+    job_description: str
+    top_n: int = Field(20, ge=1, le=200)
+
+
+@router.post("/search")
+def search_resumes(
+    request: ResumeSearchRequest,
+    current_user: dict = Depends(get_recruiter_user)
+):
+    """
+    Return the stored resumes most similar to a job description.
+    Declared sync so embedding and search run in the threadpool.
+    """
+    if not request.job_description or not request.job_description.strip():
+        raise HTTPException(status_code=400, detail="Job description is required")
+
+    start = time.perf_counter()
+    try:
+        embedding = get_embedding_engine().encode(request.job_description)
+        # Over-fetch a little: deleted resumes stay in the index until the next rebuild
+        hits = get_resume_index().search(embedding, top_n=request.top_n * 2)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Resume search unavailable: {str(e)}")
+
+    records = {
+        str(r["_id"]): r
+        for r in resumes.find(
+            {"_id": {"$in": [ObjectId(rid) for rid, _ in hits]}},
+            {"role": 1, "ats_score": 1, "original_filename": 1, "user_email": 1}
+        )
+    }
+
+    results = [
+        {
+            "resume_id": rid,
+            "score": round(score, 4),
+            "role": records[rid].get("role"),
+            "ats_score": records[rid].get("ats_score"),
+            "filename": (
+                records[rid].get("original_filename")
+                if records[rid].get("user_email") == current_user.get("email")
+                else None
+            ),
+        }
+        for rid, score in hits
+        if rid in records
+    ][:request.top_n]
+
+    return {
+        "results": results,
+        "count": len(results),
+        "took_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
@@ -1 +1,2 @@
 from .resume_tasks import process_resume_task
+from .resume_index_tasks import rebuild_resume_index_task
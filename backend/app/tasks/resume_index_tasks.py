@@ -0,0 +1,16 @@
+from app.core.background import celery_app
+from app.ml.resume_index import build_index
+
+
+@celery_app.task(name="app.tasks.resume_index_tasks.rebuild_resume_index_task")
+def rebuild_resume_index_task(backfill: bool = True):
+    """
+    Rebuild the resume corpus index from Mongo in the background.
+    API processes pick up the new index on their next search.
+    """
+    try:
+        count = build_index(backfill=backfill)
+        return {"state": "SUCCESS", "indexed": count}
+    except Exception as e:
+        print(f"Resume index rebuild failed: {str(e)}")
+        return {"state": "FAILURE", "error": str(e)}
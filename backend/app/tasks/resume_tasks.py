@@ -5,23 +5,48 @@ from app.database.celery_db import user_history
 from app.ai.response_formatter import format_resume_response
 from app.ai.improvement_engine_llm import generate_improvements_llm
 from app.ai.improvement_engine import generate_improvements
-from app.ai.parser import extract_text, fix_broken_headers
-from app.ai.role_engine import predict_role_advanced
-from app.ai.ats_engine import ats_score
+from app.ai.parser import check_parallel_extraction, extract_resume_text
+from app.ai.semantic_role_engine import predict_role, warm_up, DEFAULT_ROLE_MODE
+from app.ai.ats_engine import ats_score, rank_roles
 from app.ai.cache import make_cache_key
-from app.ai.section_parser import ResumeParser, SectionType
+from app.ai.parsed_resume import ParsedResume
+from app.ai import skill_registry
 from app.ai.resume_quality_engine import evaluate_resume_quality
+from app.ml.resume_index import embed_resume, enqueue_resume
 
 from app.database.celery_db import resumes, resume_cache
+from celery.signals import worker_process_init
 from datetime import datetime
 import os
 
 
+@worker_process_init.connect
+def _warm_semantic_role_model(**kwargs):
+    """Load the embedding model in the background in each worker process."""
+    if DEFAULT_ROLE_MODE != "keyword":
+        warm_up()
+
+
+@worker_process_init.connect
+def _check_parallel_extraction(**kwargs):
+    """Confirm page-parallel PDF extraction works inside this worker process."""
+    check_parallel_extraction()
+
+
 @celery_app.task(bind=True, name="app.tasks.resume_tasks.process_resume_task")
-def process_resume_task(self, file_path: str, user_email: str, history_id: str = None):
+def process_resume_task(
+    self,
+    file_path: str,
+    user_email: str,
+    history_id: str = None,
+    role_mode: str = None,
+    plan: str = "free"
+):
     """
     Main background task for resume analysis
     Updates existing history entry if history_id is provided, otherwise creates new one
+    role_mode selects keyword, semantic or hybrid role prediction (None = server default)
+    plan is the user's plan, used to route the improvements LLM call
     """
     from bson import ObjectId
     
@@ -49,53 +74,36 @@ def process_resume_task(self, file_path: str, user_email: str, history_id: str =
     try:
         # ------------------ STEP 1: TEXT EXTRACTION ------------------
         self.update_state(state="PROGRESS", meta={"step": "Extracting resume text"})
-        raw_text = extract_text(file_path)
-        
-        # Fix broken headers in the extracted text
-        raw_text = fix_broken_headers(raw_text)
+        # Extract + fix broken headers; repeat uploads of the same file hit the cache
+        raw_text = extract_resume_text(file_path)
+
+        # Parse once; every stage below shares this artifact
+        parsed = ParsedResume.from_text(raw_text)
 
         # ------------------ STEP 2: ROLE PREDICTION ------------------
         self.update_state(state="PROGRESS", meta={"step": "Predicting job role"})
-        role_result = predict_role_advanced(raw_text)
+        role_result = predict_role(raw_text, parsed=parsed, mode=role_mode)
         role = role_result.get("job_role", "Unknown")
         confidence = float(role_result.get("confidence", 0))
 
         # ------------------ STEP 3: SECTION PARSING ------------------
-        sections = ResumeParser().parse_sections(raw_text)
-        
-        # Create a dictionary with section names as keys and content as values
-        sections_dict = {}
-        normalized_parts = []
-        
+        sections_dict = parsed.sections_dict
+
         # Debug: Print detected section types
-        print("DETECTED SECTIONS:", [s.value for s in sections.keys()])
-        
-        # Process each section and build both the dictionary and normalized text
-        for section_type, section in sections.items():
-            if hasattr(section, 'content'):  # Make sure it's a Section object
-                section_name = section_type.value
-                sections_dict[section_name] = section.content
-                
-                # Only include specific sections in the normalized text for ATS scoring
-                if section_type in [SectionType.SKILLS, SectionType.EXPERIENCE, 
-                                 SectionType.PROJECTS, SectionType.EDUCATION]:
-                    normalized_parts.append(section.content)
-        
-        # Join all relevant sections for ATS scoring
-        normalized_text = " ".join(normalized_parts)
+        print("DETECTED SECTIONS:", [s.value for s in parsed.sections.keys()])
 
-        # Fallback if sections are empty (edge-case PDFs)
-        if not normalized_text.strip():
-            normalized_text = raw_text
+        # Relevant sections joined for ATS scoring (raw text for edge-case PDFs)
+        normalized_text = parsed.normalized_text
+        if normalized_text is raw_text:
             print("Warning: Using raw text for ATS scoring as no sections were found")
 
-        # Debug: Log detected sections
-        print("Detected sections:", list(sections_dict.keys()))
-
         # ------------------ STEP 4: ATS SCORING ------------------
-        ats = ats_score(normalized_text, role)
+        ats = ats_score(normalized_text, role, resume_bits=parsed.ats_skill_bits)
         ats_score_value = int(ats.get("score", 0))
 
+        # Fit against every role at once, stored so role switches are instant
+        role_fit = rank_roles(parsed.ats_skill_bits)
+
         # ------------------ STEP 5: RESUME QUALITY ------------------
         resume_quality = evaluate_resume_quality(sections_dict)
         quality_score = resume_quality.get("overall_score", 0)
@@ -156,6 +164,7 @@ def process_resume_task(self, file_path: str, user_email: str, history_id: str =
                                     "resume_strength": cached_resume.get("resume_strength"),
                                     "resume_quality": cached_resume.get("resume_quality"),
                                     "improvements": cached_resume.get("improvement_tips", []),
+                                    "role_fit": cached_resume.get("role_fit", role_fit),
                                     "cached": True
                                 },
                                 "updated_at": datetime.utcnow()
@@ -182,7 +191,9 @@ def process_resume_task(self, file_path: str, user_email: str, history_id: str =
             improvements = generate_improvements_llm(
                 resume_text=raw_text,  # Use full resume text for comprehensive analysis
                 role=role,
-                ats=ats
+                ats=ats,
+                plan=plan,
+                parsed=parsed  # Reuse the parse for prompt section budgeting
             )
             # Validate improvements structure - ensure no error field
             if improvements and "error" in improvements:
@@ -208,9 +219,14 @@ def process_resume_task(self, file_path: str, user_email: str, history_id: str =
             "user_email": user_email,
             "role": role,
             "confidence": confidence,
+            "role_mode": role_result.get("mode", "keyword"),  # Prediction mode actually used
+            "semantic_roles": role_result.get("semantic_roles", []),
             "ats_score": ats_score_value,
             "matched_skills": ats.get("matched_skills", []),
             "missing_skills": ats.get("missing_skills", []),
+            "skill_ids": skill_registry.pack(parsed.ats_skill_bits),  # Compact uint16 skill IDs
+            "skill_registry_version": skill_registry.REGISTRY_VERSION,
+            "role_fit": role_fit,  # Ranked fit against every role
             "resume_quality": resume_quality,
             "resume_strength": resume_strength,
             "improvement_tips": improvements,
@@ -221,8 +237,15 @@ def process_resume_task(self, file_path: str, user_email: str, history_id: str =
             "created_at": datetime.utcnow()
         }
 
+        # Embedding for the resume corpus index (recruiter JD search)
+        embedding = embed_resume(record)
+        if embedding is not None:
+            record["embedding"] = embedding
+
         result = resumes.insert_one(record)
         resume_id_str = str(result.inserted_id)
+        if embedding is not None:
+            enqueue_resume(resume_id_str)
         
         # ------------------ STEP 10: UI FORMAT ------------------
         formatted_ui = format_resume_response(
@@ -254,6 +277,7 @@ def process_resume_task(self, file_path: str, user_email: str, history_id: str =
                         "resume_strength": resume_strength,
                         "resume_quality": resume_quality,
                         "improvements": improvements,
+                        "role_fit": role_fit,
                         "cached": False
                     },
                     "updated_at": datetime.utcnow()
@@ -277,6 +301,7 @@ def process_resume_task(self, file_path: str, user_email: str, history_id: str =
                     "resume_strength": resume_strength,
                     "resume_quality": resume_quality,
                     "improvements": improvements,
+                    "role_fit": role_fit,
                     "cached": False
                 },
                 "created_at": datetime.utcnow(),
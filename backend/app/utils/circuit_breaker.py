@@ -0,0 +1,204 @@
+"""
+Distributed Circuit Breaker
+
+Shared by every API process and Celery worker through a Redis hash, so one
+outage (quota exhausted, invalid key, provider down) is detected once and
+every caller skips the dependency until it recovers:
+
+    closed     calls go through; FAILURE_THRESHOLD failures within
+               FAILURE_WINDOW seconds open the circuit
+    open       calls are refused immediately (CircuitOpenError) for
+               RECOVERY_TIMEOUT seconds
+    half_open  one probe call is let through; success closes the circuit,
+               failure opens it again
+
+State transitions run in Lua scripts so concurrent processes agree on them.
+If Redis is unavailable the breaker stays out of the way (calls allowed).
+"""
+import os
+import time
+from typing import Any, Dict
+
+from redis.exceptions import RedisError
+
+from app.core.redis_cache import get_redis
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_FAILURE_WINDOW = float(os.getenv("CIRCUIT_FAILURE_WINDOW", "60"))
+CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT", "30"))
+# A half-open probe that never reports back frees its slot after this long
+CIRCUIT_PROBE_TIMEOUT = float(os.getenv("CIRCUIT_PROBE_TIMEOUT", "60"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_KEY_PREFIX = "circuit"
+
+# KEYS[1] = state hash; ARGV = now, recovery timeout, probe timeout
+# Returns 1 if the call may proceed, 0 if the circuit refuses it.
+_ALLOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+if state == 'closed' then
+    return 1
+end
+if state == 'open' then
+    local opened_at = tonumber(redis.call('HGET', KEYS[1], 'opened_at')) or 0
+    if now - opened_at < tonumber(ARGV[2]) then
+        return 0
+    end
+    redis.call('HSET', KEYS[1], 'state', 'half_open', 'probe_until', now + tonumber(ARGV[3]))
+    return 1
+end
+-- half_open: a single probe at a time
+local probe_until = tonumber(redis.call('HGET', KEYS[1], 'probe_until')) or 0
+if now < probe_until then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'probe_until', now + tonumber(ARGV[3]))
+return 1
+"""
+
+# KEYS[1] = state hash; ARGV = now, failure threshold, failure window
+# Returns the state after the failure.
+_FAILURE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+redis.call('HINCRBY', KEYS[1], 'total_failures', 1)
+redis.call('HSET', KEYS[1], 'last_failure_at', now)
+if state == 'open' then
+    return state
+end
+if state == 'closed' then
+    local window_start = tonumber(redis.call('HGET', KEYS[1], 'window_start')) or 0
+    local failures = tonumber(redis.call('HGET', KEYS[1], 'failures')) or 0
+    if now - window_start > tonumber(ARGV[3]) then
+        failures = 0
+        redis.call('HSET', KEYS[1], 'window_start', now)
+    end
+    failures = failures + 1
+    redis.call('HSET', KEYS[1], 'failures', failures)
+    if failures < tonumber(ARGV[2]) then
+        return state
+    end
+end
+redis.call('HSET', KEYS[1], 'state', 'open', 'opened_at', now, 'failures', 0)
+redis.call('HINCRBY', KEYS[1], 'trips', 1)
+return 'open'
+"""
+
+# KEYS[1] = state hash. Returns the state before the success.
+_SUCCESS_SCRIPT = """
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+if state == 'half_open' then
+    redis.call('HSET', KEYS[1], 'state', 'closed', 'failures', 0, 'probe_until', 0)
+elseif state == 'closed' and (tonumber(redis.call('HGET', KEYS[1], 'failures')) or 0) > 0 then
+    redis.call('HSET', KEYS[1], 'failures', 0)
+end
+return state
+"""
+
+
+class CircuitOpenError(Exception):
+    """The circuit is open: the dependency is failing, use the fallback."""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker whose state lives in Redis."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        failure_window: float = CIRCUIT_FAILURE_WINDOW,
+        recovery_timeout: float = CIRCUIT_RECOVERY_TIMEOUT,
+        probe_timeout: float = CIRCUIT_PROBE_TIMEOUT
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.recovery_timeout = recovery_timeout
+        self.probe_timeout = probe_timeout
+        self.key = f"{_KEY_PREFIX}:{name}"
+        self._scripts = {}
+
+    def _script(self, name: str, source: str):
+        if name not in self._scripts:
+            self._scripts[name] = get_redis().register_script(source)
+        return self._scripts[name]
+
+    def allow(self) -> bool:
+        """Whether a call may go to the dependency now (claims the probe when half-open)."""
+        try:
+            return bool(self._script("allow", _ALLOW_SCRIPT)(
+                keys=[self.key],
+                args=[time.time(), self.recovery_timeout, self.probe_timeout]
+            ))
+        except RedisError as e:
+            print(f"Circuit breaker '{self.name}' Redis unavailable, allowing call: {str(e)}")
+            return True
+
+    def check(self) -> None:
+        """
+        Raises:
+            CircuitOpenError: if the call should not be made
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+    def record_success(self) -> None:
+        try:
+            previous = self._script("success", _SUCCESS_SCRIPT)(keys=[self.key])
+        except RedisError as e:
+            print(f"Circuit breaker '{self.name}' success update failed: {str(e)}")
+            return
+        if _text(previous) == HALF_OPEN:
+            print(f"Circuit '{self.name}' closed: probe call succeeded")
+
+    def record_failure(self, error: Exception = None) -> None:
+        try:
+            state = self._script("failure", _FAILURE_SCRIPT)(
+                keys=[self.key],
+                args=[time.time(), self.failure_threshold, self.failure_window]
+            )
+        except RedisError as e:
+            print(f"Circuit breaker '{self.name}' failure update failed: {str(e)}")
+            return
+        if _text(state) == OPEN:
+            print(f"Circuit '{self.name}' open after failure: {str(error)}")
+
+    def status(self) -> Dict[str, Any]:
+        """Current state, trip count and failure counters."""
+        try:
+            raw = {_text(k): _text(v) for k, v in get_redis().hgetall(self.key).items()}
+        except RedisError as e:
+            return {"name": self.name, "state": "unknown", "error": str(e)}
+
+        state = raw.get("state", CLOSED)
+        opened_at = float(raw.get("opened_at", 0) or 0)
+        status = {
+            "name": self.name,
+            "state": state,
+            "trips": int(raw.get("trips", 0) or 0),
+            "failures": int(raw.get("failures", 0) or 0),
+            "total_failures": int(raw.get("total_failures", 0) or 0),
+            "last_failure_at": float(raw["last_failure_at"]) if raw.get("last_failure_at") else None,
+            "failure_threshold": self.failure_threshold,
+            "recovery_timeout": self.recovery_timeout,
+        }
+        if state == OPEN:
+            status["opened_at"] = opened_at
+            status["retry_in"] = max(0.0, round(opened_at + self.recovery_timeout - time.time(), 1))
+        return status
+
+    def reset(self) -> None:
+        """Force the circuit closed and clear its counters."""
+        try:
+            get_redis().delete(self.key)
+        except RedisError as e:
+            print(f"Circuit breaker '{self.name}' reset failed: {str(e)}")
+
+
+def _text(value) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
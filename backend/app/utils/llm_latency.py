@@ -0,0 +1,108 @@
+"""
+LLM Latency Tracking
+
+Keeps the most recent completion latencies per model and prompt version in
+Redis (shared by all processes) for the hedged-request deadline in
+app.ai.llm_client, and counts how often a hedge was sent and which attempt
+won, so the deadline can be tuned (see GET /status/llm).
+
+Everything fails open: without Redis there is simply no history.
+"""
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from app.core.redis_cache import get_redis
+
+LATENCY_SAMPLES = int(os.getenv("LLM_LATENCY_SAMPLES", "200"))
+# Percentiles are recomputed from Redis at most this often per process
+PERCENTILE_CACHE_SECONDS = 30.0
+
+_KEY_PREFIX = "llm:latency"
+_INDEX_KEY = f"{_KEY_PREFIX}:index"
+
+_percentiles: Dict[Tuple[str, str, float], Tuple[float, Optional[float]]] = {}
+
+
+def _name(model: str, prompt_version: str) -> str:
+    return f"{model}:{prompt_version}"
+
+
+def record_latency(model: str, prompt_version: str, seconds: float) -> None:
+    """Add one completion latency to the rolling window."""
+    name = _name(model, prompt_version)
+    key = f"{_KEY_PREFIX}:samples:{name}"
+    try:
+        pipe = get_redis().pipeline()
+        pipe.lpush(key, round(seconds, 3))
+        pipe.ltrim(key, 0, LATENCY_SAMPLES - 1)
+        pipe.sadd(_INDEX_KEY, name)
+        pipe.execute()
+    except RedisError as e:
+        print(f"LLM latency record failed: {str(e)}")
+
+
+def latency_percentile(model: str, prompt_version: str, q: float = 0.95, min_samples: int = 20) -> Optional[float]:
+    """
+    The q-quantile of recent latencies (seconds), or None with too little history.
+    """
+    cache_key = (model, prompt_version, q)
+    cached = _percentiles.get(cache_key)
+    if cached and time.time() - cached[0] < PERCENTILE_CACHE_SECONDS:
+        return cached[1]
+
+    value = None
+    try:
+        samples = sorted(
+            float(s) for s in get_redis().lrange(f"{_KEY_PREFIX}:samples:{_name(model, prompt_version)}", 0, -1)
+        )
+    except RedisError as e:
+        print(f"LLM latency lookup failed: {str(e)}")
+        samples = []
+    if len(samples) >= min_samples:
+        value = samples[min(len(samples) - 1, int(q * len(samples)))]
+    _percentiles[cache_key] = (time.time(), value)
+    return value
+
+
+def record_hedge(model: str, prompt_version: str, hedged: bool, winner: str) -> None:
+    """
+    Count one hedge-eligible call.
+
+    Args:
+        hedged: Whether the duplicate request was actually sent
+        winner: "primary" or "hedge"
+    """
+    try:
+        pipe = get_redis().pipeline()
+        key = f"{_KEY_PREFIX}:hedge:{_name(model, prompt_version)}"
+        pipe.hincrby(key, "calls", 1)
+        if hedged:
+            pipe.hincrby(key, "hedged", 1)
+        pipe.hincrby(key, f"won_{winner}", 1)
+        pipe.sadd(_INDEX_KEY, _name(model, prompt_version))
+        pipe.execute()
+    except RedisError as e:
+        print(f"LLM hedge record failed: {str(e)}")
+
+
+def latency_stats() -> Dict[str, Any]:
+    """p50/p95 latency and hedge counters per model:prompt_version."""
+    try:
+        redis = get_redis()
+        names = sorted(n.decode("utf-8") for n in redis.smembers(_INDEX_KEY))
+        stats = {}
+        for name in names:
+            samples = sorted(float(s) for s in redis.lrange(f"{_KEY_PREFIX}:samples:{name}", 0, -1))
+            hedge = {k.decode("utf-8"): int(v) for k, v in redis.hgetall(f"{_KEY_PREFIX}:hedge:{name}").items()}
+            stats[name] = {
+                "samples": len(samples),
+                "p50": samples[len(samples) // 2] if samples else None,
+                "p95": samples[min(len(samples) - 1, int(0.95 * len(samples)))] if samples else None,
+                "hedge": hedge,
+            }
+        return stats
+    except RedisError as e:
+        return {"error": str(e)}
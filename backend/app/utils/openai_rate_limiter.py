@@ -1,15 +1,275 @@
-import time
+"""
+Distributed OpenAI Rate Limiter
+
+A Redis token bucket shared by every API process and Celery worker, with
+one bucket for requests per minute and one for tokens per minute. Both are
+refilled continuously and consumed atomically by a Lua script.
+
+The configured limits are only a starting point: every response's
+x-ratelimit-* headers update the limits and clamp the buckets to what the
+provider reports as remaining (see update_from_headers), and actual token
+usage replaces the estimate that was reserved (see record_usage).
+
+If Redis is unavailable the limiter falls back to a per-process minimum
+interval between calls, as before.
+"""
+import asyncio
+import os
+import random
+import re
 import threading
+import time
+from typing import Mapping, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.redis_cache import get_redis
 
+# Starting limits (per model) until the provider's headers are seen
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "60"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "150000"))
+# Fraction of the provider's advertised limits we allow ourselves to use
+OPENAI_LIMIT_SAFETY = float(os.getenv("OPENAI_LIMIT_SAFETY", "0.9"))
+# Give up waiting for capacity after this long so callers can fall back
+OPENAI_ACQUIRE_TIMEOUT = float(os.getenv("OPENAI_ACQUIRE_TIMEOUT", "30"))
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Per-process fallback when Redis is down
+MIN_INTERVAL = 5.0  # seconds between calls (increased from 3.0 to prevent rate limits)
 _lock = threading.Lock()
 _last_call = 0
-MIN_INTERVAL = 5.0  # seconds between calls (increased from 3.0 to prevent rate limits)
 
-def wait_for_slot():
+_KEY_PREFIX = "ratelimit:openai"
+
+# KEYS[1] = bucket hash; ARGV = now, default rpm, default tpm, requests, tokens
+# Returns 0 when both buckets had capacity (and consumes it), otherwise the
+# number of seconds until they will (nothing is consumed). A refill time in
+# the future (set by penalize) blocks until then.
+_ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local state = redis.call('HMGET', KEYS[1], 'rpm', 'tpm', 'requests', 'tokens', 'ts')
+local rpm = tonumber(state[1]) or tonumber(ARGV[2])
+local tpm = tonumber(state[2]) or tonumber(ARGV[3])
+local requests = tonumber(state[3]) or rpm
+local tokens = tonumber(state[4]) or tpm
+local ts = tonumber(state[5]) or now
+
+-- Penalized after a 429: nothing refills until the provider's reset time
+if ts > now then
+    return tostring(ts - now)
+end
+
+local elapsed = math.max(0, now - ts)
+requests = math.min(rpm, requests + elapsed * rpm / 60)
+tokens = math.min(tpm, tokens + elapsed * tpm / 60)
+
+local need_requests = tonumber(ARGV[4])
+local need_tokens = math.min(tonumber(ARGV[5]), tpm)
+local wait = 0
+if requests < need_requests then
+    wait = math.max(wait, (need_requests - requests) * 60 / rpm)
+end
+if tokens < need_tokens then
+    wait = math.max(wait, (need_tokens - tokens) * 60 / tpm)
+end
+if wait == 0 then
+    requests = requests - need_requests
+    tokens = tokens - need_tokens
+end
+
+redis.call('HSET', KEYS[1], 'requests', requests, 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+# KEYS[1] = bucket hash; ARGV = rpm, tpm, remaining requests, remaining tokens ('' = unknown)
+_HEADERS_SCRIPT = """
+if ARGV[1] ~= '' then redis.call('HSET', KEYS[1], 'rpm', ARGV[1]) end
+if ARGV[2] ~= '' then redis.call('HSET', KEYS[1], 'tpm', ARGV[2]) end
+local state = redis.call('HMGET', KEYS[1], 'requests', 'tokens')
+if ARGV[3] ~= '' and state[1] and tonumber(state[1]) > tonumber(ARGV[3]) then
+    redis.call('HSET', KEYS[1], 'requests', ARGV[3])
+end
+if ARGV[4] ~= '' and state[2] and tonumber(state[2]) > tonumber(ARGV[4]) then
+    redis.call('HSET', KEYS[1], 'tokens', ARGV[4])
+end
+redis.call('EXPIRE', KEYS[1], 3600)
+return 1
+"""
+
+_scripts = {}
+
+
+class RateLimitTimeout(Exception):
+    """No OpenAI capacity became available within the acquire timeout."""
+
+
+def _script(name: str, source: str):
+    if name not in _scripts:
+        _scripts[name] = get_redis().register_script(source)
+    return _scripts[name]
+
+
+def _bucket_key(model: str) -> str:
+    return f"{_KEY_PREFIX}:{model}"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used to reserve TPM capacity."""
+    return max(1, len(text) // 4)
+
+
+def _try_acquire(model: str, tokens: int) -> float:
+    """Consume capacity if available; return 0, or seconds to wait."""
+    wait = _script("acquire", _ACQUIRE_SCRIPT)(
+        keys=[_bucket_key(model)],
+        args=[time.time(), OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT, 1, tokens]
+    )
+    return float(wait)
+
+
+def _local_wait() -> float:
+    """Per-process fallback: seconds until MIN_INTERVAL has passed (claims the slot)."""
     global _last_call
     with _lock:
         now = time.time()
-        elapsed = now - _last_call
-        if elapsed < MIN_INTERVAL:
-            time.sleep(MIN_INTERVAL - elapsed)
-        _last_call = time.time()
+        wait = max(0.0, MIN_INTERVAL - (now - _last_call))
+        _last_call = now + wait
+        return wait
+
+
+def acquire(tokens: int = 1000, model: str = DEFAULT_MODEL, timeout: Optional[float] = None) -> None:
+    """
+    Block until one request and `tokens` tokens are available fleet-wide.
+
+    Raises:
+        RateLimitTimeout: if capacity did not free up within the timeout
+    """
+    deadline = time.time() + (OPENAI_ACQUIRE_TIMEOUT if timeout is None else timeout)
+    while True:
+        try:
+            wait = _try_acquire(model, tokens)
+        except RedisError as e:
+            print(f"Rate limiter Redis unavailable, using local interval: {str(e)}")
+            time.sleep(_local_wait())
+            return
+        if wait <= 0:
+            return
+        if time.time() + wait > deadline:
+            raise RateLimitTimeout(f"OpenAI rate limit: no capacity for {wait:.1f}s")
+        # Jitter so waiting processes do not retry in lockstep
+        time.sleep(wait + random.uniform(0, 0.1))
+
+
+def try_acquire(tokens: int = 1000, model: str = DEFAULT_MODEL) -> bool:
+    """
+    Take capacity only if it is available right now; never waits.
+
+    Unlike acquire(), a Redis failure returns False rather than falling back
+    to the local interval, so optional extra calls (hedges) are skipped.
+    """
+    try:
+        return _try_acquire(model, tokens) <= 0
+    except RedisError as e:
+        print(f"Rate limiter Redis unavailable, refusing optional call: {str(e)}")
+        return False
+
+
+async def acquire_async(tokens: int = 1000, model: str = DEFAULT_MODEL, timeout: Optional[float] = None) -> None:
+    """
+    acquire() for async callers: the Redis script runs in a worker thread and
+    waits use asyncio.sleep, so a slow Redis never blocks the event loop.
+    """
+    deadline = time.time() + (OPENAI_ACQUIRE_TIMEOUT if timeout is None else timeout)
+    while True:
+        try:
+            wait = await asyncio.to_thread(_try_acquire, model, tokens)
+        except RedisError as e:
+            print(f"Rate limiter Redis unavailable, using local interval: {str(e)}")
+            await asyncio.sleep(_local_wait())
+            return
+        if wait <= 0:
+            return
+        if time.time() + wait > deadline:
+            raise RateLimitTimeout(f"OpenAI rate limit: no capacity for {wait:.1f}s")
+        await asyncio.sleep(wait + random.uniform(0, 0.1))
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> str:
+    value = headers.get(name)
+    return str(int(value)) if value and value.isdigit() else ""
+
+
+def update_from_headers(headers: Mapping[str, str], model: str = DEFAULT_MODEL) -> None:
+    """
+    Adapt limits and bucket levels from x-ratelimit-* response headers:
+    limits become the advertised limits (times OPENAI_LIMIT_SAFETY) and the
+    buckets never hold more than the provider says is remaining.
+    """
+    limit_requests = _header_number(headers, "x-ratelimit-limit-requests")
+    limit_tokens = _header_number(headers, "x-ratelimit-limit-tokens")
+    if not (limit_requests or limit_tokens):
+        return
+    try:
+        _script("headers", _HEADERS_SCRIPT)(
+            keys=[_bucket_key(model)],
+            args=[
+                str(int(int(limit_requests) * OPENAI_LIMIT_SAFETY)) if limit_requests else "",
+                str(int(int(limit_tokens) * OPENAI_LIMIT_SAFETY)) if limit_tokens else "",
+                _header_number(headers, "x-ratelimit-remaining-requests"),
+                _header_number(headers, "x-ratelimit-remaining-tokens"),
+            ]
+        )
+    except RedisError as e:
+        print(f"Rate limiter header update failed: {str(e)}")
+
+
+def record_usage(reserved_tokens: int, used_tokens: int, model: str = DEFAULT_MODEL) -> None:
+    """Return over-reserved tokens to the bucket, or take the shortfall."""
+    delta = reserved_tokens - used_tokens
+    if not delta:
+        return
+    try:
+        get_redis().hincrbyfloat(_bucket_key(model), "tokens", delta)
+    except RedisError as e:
+        print(f"Rate limiter usage update failed: {str(e)}")
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+
+
+def _seconds(value: Optional[str]) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def parse_reset(value: Optional[str]) -> float:
+    """Seconds from an x-ratelimit-reset-* value such as "1s", "6m0s" or "120ms"."""
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(n) * scale[unit] for n, unit in _DURATION_PART.findall(value or ""))
+
+
+def penalize(headers: Mapping[str, str], model: str = DEFAULT_MODEL) -> None:
+    """
+    After a 429, empty the buckets so every process waits for the reset the
+    provider reported (or Retry-After), instead of retrying immediately.
+    """
+    update_from_headers(headers, model)
+    reset = max(
+        parse_reset(headers.get("x-ratelimit-reset-requests")),
+        parse_reset(headers.get("x-ratelimit-reset-tokens")),
+        _seconds(headers.get("retry-after")),
+        1.0
+    )
+    try:
+        # Last refill time in the future: nothing refills until the reset
+        get_redis().hset(_bucket_key(model), mapping={"requests": 0, "tokens": 0, "ts": time.time() + reset})
+    except RedisError as e:
+        print(f"Rate limiter penalty failed: {str(e)}")
+
+
+def wait_for_slot(tokens: int = 1000, model: str = DEFAULT_MODEL) -> None:
+    """Backward-compatible blocking wait for one OpenAI call."""
+    acquire(tokens, model)
@@ -3,3 +3,12 @@ import hashlib
 def generate_resume_hash(resume_text: str, role: str) -> str:
     content = f"{resume_text}_{role}"
     return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def generate_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of the raw file bytes, used to recognise repeat uploads."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,131 @@
+"""
+Embedding Backend Benchmark
+
+Compares the in-process embedding backends (app.ai.embedding_engine
+EMBEDDING_BACKENDS: torch, onnx, onnx-int8) on import + load time, single-text
+latency, batch throughput, peak RSS and agreement with the torch embeddings.
+
+Usage (from the backend directory, after python -m app.ml.onnx_embedding):
+    python -m benchmarks.bench_embedding_backends [--texts 256] [--batch-size 32]
+
+Each backend runs in a fresh subprocess so load time and RSS are measured
+from a cold interpreter. Agreement is the mean / minimum cosine similarity of
+each backend's vectors with the torch backend's on the same texts.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.embedding_engine import EMBEDDING_BACKENDS  # noqa: E402
+
+SNIPPETS = [
+    "Built REST APIs in Python and FastAPI serving 2M requests/day",
+    "Software Engineer at Acme Corp, Jan 2021 - Present",
+    "React, TypeScript, Node.js, MongoDB, Docker, Kubernetes",
+    "Trained NLP models with PyTorch and deployed them behind a FAISS retrieval layer",
+    "Led a team of five engineers migrating a monolith to microservices on AWS",
+    "B.Tech in Computer Science, 8.7 CGPA",
+    "Designed ETL pipelines with Spark and Airflow over a 40 TB data lake",
+    "Automated regression suites with Selenium, Cypress and Postman",
+]
+
+
+def synthetic_texts(count: int, seed: int = 11) -> list:
+    """Resume-like texts of varying length (1 to 12 snippets)."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(SNIPPETS, k=rng.randint(1, 12))) for _ in range(count)]
+
+
+def _percentile(values, q):
+    return float(np.percentile(np.array(values) * 1000, q))
+
+
+def _run_backend(name: str, texts: list, batch_size: int, queue) -> None:
+    """Benchmark one backend in a child process and report its stats."""
+    start = time.perf_counter()
+    from app.ai.embedding_engine import create_embedding_engine
+
+    engine = create_embedding_engine(name)
+    engine.encode("warm up")
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    for text in texts[:64]:
+        t0 = time.perf_counter()
+        engine.encode(text)
+        latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    vectors = np.concatenate([
+        np.asarray(engine.encode_many(texts[i:i + batch_size]), dtype=np.float32)
+        for i in range(0, len(texts), batch_size)
+    ])
+    batch_seconds = time.perf_counter() - t0
+
+    queue.put({
+        "name": name,
+        "load_seconds": load_seconds,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "texts_per_sec": len(texts) / batch_seconds if batch_seconds else 0.0,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "vectors": vectors,
+    })
+
+
+def benchmark(n_texts: int, batch_size: int, backends: list) -> None:
+    texts = synthetic_texts(n_texts)
+    ctx = multiprocessing.get_context("spawn")
+
+    results = []
+    for name in backends:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_backend, args=(name, texts, batch_size, queue))
+        proc.start()
+        # Read before join: the child blocks until its (large) result is consumed
+        while proc.is_alive() or not queue.empty():
+            try:
+                results.append(queue.get(timeout=1))
+                break
+            except Exception:
+                continue
+        proc.join()
+        if not results or results[-1]["name"] != name:
+            print(f"  {name} could not run (exit code {proc.exitcode})")
+
+    reference = next((r for r in results if r["name"] == "torch"), None)
+    for result in results:
+        if reference is None:
+            result["cos_mean"] = result["cos_min"] = float("nan")
+            continue
+        # Both sides are L2-normalized, so the row-wise dot product is the cosine
+        cosines = np.sum(result["vectors"] * reference["vectors"], axis=1)
+        result["cos_mean"] = float(cosines.mean())
+        result["cos_min"] = float(cosines.min())
+
+    print(f"\n{n_texts} texts, batch size {batch_size}")
+    print(f"{'backend':<11}{'load s':>8}{'p50 ms':>9}{'p95 ms':>9}{'texts/s':>10}{'RSS MB':>9}{'cos mean':>10}{'cos min':>9}")
+    for r in results:
+        print(
+            f"{r['name']:<11}{r['load_seconds']:>8.2f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+            f"{r['texts_per_sec']:>10.1f}{r['peak_rss_mb']:>9.1f}"
+            f"{r['cos_mean']:>10.4f}{r['cos_min']:>9.4f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    args = parser.parse_args()
+    benchmark(args.texts, args.batch_size, args.backends)
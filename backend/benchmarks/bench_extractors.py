@@ -0,0 +1,154 @@
+"""
+Extractor Backend Benchmark
+
+Measures throughput, memory and agreement of every registered text
+extraction backend (app.ai.parser.EXTRACTORS) on a local corpus of resumes,
+and recommends the fastest backend that extracts correct text per format.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_extractors path/to/corpus [--repeat 3] [--timeout 600]
+
+Each backend runs in a fresh subprocess so its peak RSS is measured in
+isolation; a backend that has not reported within --timeout seconds is
+terminated and skipped. "Correct" means the backend never failed and its words agree
+with the other backends' output (mean Jaccard >= --min-agreement).
+"""
+import argparse
+import multiprocessing
+import os
+import queue as queue_module
+import re
+import resource
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.parser import EXTRACTORS, DEFAULT_EXTRACTORS  # noqa: E402
+
+
+def _words(text: str) -> set:
+    return set(re.findall(r"[a-z0-9+#.]+", text.lower()))
+
+
+def _run_backend(extension: str, name: str, files: List[str], repeat: int, queue) -> None:
+    """Benchmark one backend in a child process and report its stats."""
+    extractor = EXTRACTORS[extension][name]
+    texts, failures = {}, 0
+    total_seconds = 0.0
+    total_bytes = sum(os.path.getsize(f) for f in files)
+
+    tracemalloc.start()
+    for _ in range(repeat):
+        for path in files:
+            start = time.perf_counter()
+            try:
+                texts[path] = extractor(path, max_pages=1000, max_seconds=600).text
+            except Exception as e:
+                failures += 1
+                texts[path] = ""
+                print(f"  {name} failed on {os.path.basename(path)}: {e}", file=sys.stderr)
+            total_seconds += time.perf_counter() - start
+    _, peak_heap = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    queue.put({
+        "name": name,
+        "seconds": total_seconds / repeat,
+        "files_per_sec": len(files) * repeat / total_seconds if total_seconds else 0.0,
+        "mb_per_sec": total_bytes * repeat / total_seconds / 1e6 if total_seconds else 0.0,
+        "peak_heap_mb": peak_heap / 1e6,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "failures": failures // repeat,
+        "texts": texts,
+    })
+
+
+def _wait_for_result(proc, queue, name: str, timeout: float):
+    """The child's result, or None if it crashed or overran the wall-clock timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return queue.get(timeout=min(1.0, max(0.0, deadline - time.monotonic())))
+        except queue_module.Empty:
+            if not proc.is_alive():
+                print(f"  {name} exited without a result (exit code {proc.exitcode})")
+                return None
+    print(f"  {name} timed out after {timeout:.0f}s, terminating")
+    proc.terminate()
+    return None
+
+
+def benchmark(corpus_dir: str, repeat: int, min_agreement: float, timeout: float = 600.0) -> None:
+    files_by_ext: Dict[str, List[str]] = defaultdict(list)
+    for root, _, names in os.walk(corpus_dir):
+        for filename in sorted(names):
+            extension = os.path.splitext(filename)[1].lower()
+            if extension in EXTRACTORS:
+                files_by_ext[extension].append(os.path.join(root, filename))
+
+    if not files_by_ext:
+        print(f"No supported files found in {corpus_dir}")
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+
+    for extension, files in sorted(files_by_ext.items()):
+        print(f"\n=== {extension} ({len(files)} files, repeat={repeat}) ===")
+        results = []
+        for name in EXTRACTORS[extension]:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_backend, args=(extension, name, files, repeat, queue))
+            proc.start()
+            result = _wait_for_result(proc, queue, name, timeout)
+            if result is not None:
+                results.append(result)
+            proc.join(5)
+            if proc.is_alive():
+                proc.kill()
+                proc.join()
+
+        # Agreement: mean Jaccard similarity of each backend's words with the others
+        for result in results:
+            scores = []
+            for other in results:
+                if other is result:
+                    continue
+                for path in files:
+                    a, b = _words(result["texts"][path]), _words(other["texts"][path])
+                    if a or b:
+                        scores.append(len(a & b) / len(a | b))
+            result["agreement"] = sum(scores) / len(scores) if scores else 1.0
+            result["correct"] = result["failures"] == 0 and result["agreement"] >= min_agreement
+
+        print(f"{'backend':<14}{'files/s':>10}{'MB/s':>9}{'heap MB':>10}{'RSS MB':>9}{'agree':>8}{'fail':>6}")
+        for r in sorted(results, key=lambda r: -r["files_per_sec"]):
+            print(
+                f"{r['name']:<14}{r['files_per_sec']:>10.2f}{r['mb_per_sec']:>9.2f}"
+                f"{r['peak_heap_mb']:>10.1f}{r['peak_rss_mb']:>9.1f}"
+                f"{r['agreement']:>8.2f}{r['failures']:>6}"
+            )
+
+        correct = [r for r in results if r["correct"]]
+        if correct:
+            best = max(correct, key=lambda r: r["files_per_sec"])
+            print(
+                f"Recommended {extension} backend: {best['name']} "
+                f"(current default: {DEFAULT_EXTRACTORS.get(extension)})"
+            )
+        else:
+            print(f"No backend met the correctness bar for {extension}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark resume text extraction backends")
+    parser.add_argument("corpus", help="Directory of sample resumes (.pdf, .docx)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-agreement", type=float, default=0.75)
+    parser.add_argument("--timeout", type=float, default=600.0, help="Wall-clock limit per backend (seconds)")
+    args = parser.parse_args()
+    benchmark(args.corpus, args.repeat, args.min_agreement, args.timeout)
@@ -0,0 +1,123 @@
+"""
+Section Header Detection Microbenchmark
+
+Compares the per-line cost of ResumeParser.is_section_header (one combined
+regex + pre-normalized alias dict) against the previous implementation
+(one regex per SectionType plus normalize_text on every alias), on a
+synthetic long resume, and checks both return identical results.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_section_headers [--lines 5000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.section_parser import SECTION_ALIASES, ResumeParser, _normalize_header  # noqa: E402
+
+
+class LegacyHeaderDetector:
+    """The per-section-pattern detector this module replaced, kept for comparison."""
+
+    def __init__(self):
+        self.section_patterns = {
+            section: re.compile(
+                r'^(?P<header>' +
+                '|'.join(re.escape(alias) + r's?\b' for alias in SECTION_ALIASES.get(section, [])) +
+                r')\s*[:\\.]?\s*$',
+                re.IGNORECASE
+            )
+            for section in SECTION_ALIASES
+        }
+
+    def is_section_header(self, line, next_line=None):
+        line = line.strip()
+        if not line:
+            return None
+        normalized_line = _normalize_header(line)
+        for section_type, pattern in self.section_patterns.items():
+            match = pattern.match(line)
+            if match:
+                return section_type, match.group('header').strip().lower()
+        if next_line and (next_line.strip().startswith(('-', '=')) and len(next_line.strip()) >= len(line)):
+            for section_type, aliases in SECTION_ALIASES.items():
+                for alias in aliases:
+                    if _normalize_header(alias) == normalized_line:
+                        return section_type, alias.lower()
+        if line.isupper() and len(line) < 30:
+            normalized = _normalize_header(line)
+            for section_type, aliases in SECTION_ALIASES.items():
+                for alias in aliases:
+                    if normalized == _normalize_header(alias):
+                        return section_type, alias.lower()
+        return None
+
+
+def synthetic_resume(n_lines: int, seed: int = 7) -> list:
+    """Mostly body lines with headers in the usual spellings sprinkled in."""
+    rng = random.Random(seed)
+    aliases = [alias for group in SECTION_ALIASES.values() for alias in group]
+    body = [
+        "Built REST APIs in Python and FastAPI serving 2M requests/day",
+        "Software Engineer at Acme Corp, Jan 2021 - Present",
+        "B.Tech in Computer Science, 8.7 CGPA",
+        "React, TypeScript, Node.js, MongoDB, Docker, Kubernetes",
+        "LED A TEAM OF FIVE ENGINEERS",
+        "Résumé parsing pipeline with spaCy and FAISS",
+    ]
+    lines = []
+    for _ in range(n_lines):
+        roll = rng.random()
+        if roll < 0.05:
+            lines.append(rng.choice(aliases).title() + ":")
+        elif roll < 0.08:
+            lines.append(rng.choice(aliases).upper())
+        elif roll < 0.10:
+            lines.append(rng.choice(aliases).title())
+            lines.append("-" * 20)
+        else:
+            lines.append(rng.choice(body))
+    return lines
+
+
+def time_detector(detect, lines, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i, line in enumerate(lines):
+            detect(line, lines[i + 1] if i + 1 < len(lines) else None)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n_lines: int, repeat: int) -> None:
+    lines = synthetic_resume(n_lines)
+    current = ResumeParser()
+    legacy = LegacyHeaderDetector()
+
+    mismatches = sum(
+        1 for i, line in enumerate(lines)
+        if current.is_section_header(line, lines[i + 1] if i + 1 < len(lines) else None)
+        != legacy.is_section_header(line, lines[i + 1] if i + 1 < len(lines) else None)
+    )
+
+    legacy_s = time_detector(legacy.is_section_header, lines, repeat)
+    current_s = time_detector(current.is_section_header, lines, repeat)
+
+    print(f"lines: {len(lines)}  mismatches: {mismatches}")
+    print(f"legacy : {legacy_s * 1e6 / len(lines):8.2f} us/line")
+    print(f"current: {current_s * 1e6 / len(lines):8.2f} us/line")
+    print(f"speedup: {legacy_s / current_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark section header detection")
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.lines, args.repeat)
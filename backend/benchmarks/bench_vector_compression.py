@@ -0,0 +1,127 @@
+"""
+Resume Vector Compression Benchmark
+
+Measures what compact storage costs in search quality: recall@k against
+exact float32 search, index memory and query latency for the index types
+app.ml.resume_index can build, plus the float16 storage round trip used for
+embeddings in Mongo.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_vector_compression [--vectors embeddings.npy | --from-mongo]
+        [--base 100000] [--queries 1000] [--k 10]
+
+Without --vectors/--from-mongo a clustered synthetic set of unit vectors is
+used. Queries are a held-out split: they are never added to the index.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import faiss  # noqa: E402
+from bson import BSON  # noqa: E402
+
+from app.ml import resume_index  # noqa: E402
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_vectors(count: int, dim: int = 384, clusters: int = 200, seed: int = 3) -> np.ndarray:
+    """Unit vectors drawn around random centroids, roughly like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim))
+    labels = rng.integers(0, clusters, count)
+    return _normalize(centroids[labels] + 0.6 * rng.standard_normal((count, dim)))
+
+
+def mongo_vectors() -> np.ndarray:
+    from app.database.celery_db import resumes
+
+    return np.vstack([
+        resume_index.decode_vector(r["embedding"])
+        for r in resumes.find({"embedding": {"$exists": True}}, {"embedding": 1})
+    ])
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def evaluate(name: str, index, base: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int) -> None:
+    start = time.perf_counter()
+    index.add_with_ids(base, np.arange(len(base), dtype=np.int64))
+    build_s = time.perf_counter() - start
+    resume_index._set_search_params(index)
+
+    start = time.perf_counter()
+    _, found = index.search(queries, k)
+    query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    memory_mb = faiss.serialize_index(index).nbytes / 1e6
+    print(
+        f"{name:<22}{recall_at_k(found, truth):>9.4f}{memory_mb:>11.1f}"
+        f"{memory_mb * 1e6 / len(base):>10.0f}{query_ms:>10.3f}{build_s:>9.1f}"
+    )
+
+
+def main(vectors: np.ndarray, n_base: int, n_queries: int, k: int) -> None:
+    rng = np.random.default_rng(0)
+    vectors = vectors[rng.permutation(len(vectors))]
+    queries, base = vectors[:n_queries], vectors[n_queries:n_queries + n_base]
+    dim = base.shape[1]
+
+    exact = faiss.IndexFlatIP(dim)
+    exact.add(base)
+    _, truth = exact.search(queries, k)
+
+    # Storage: Mongo document size per embedding, list of floats vs float16 Binary
+    list_bytes = len(BSON.encode({"embedding": base[0].tolist()}))
+    binary_bytes = len(BSON.encode({"embedding": resume_index.encode_vector(base[0])}))
+    fp16 = np.vstack([resume_index.decode_vector(resume_index.encode_vector(v)) for v in base])
+    fp16_index = faiss.IndexFlatIP(dim)
+    fp16_index.add(fp16)
+    _, fp16_found = fp16_index.search(queries, k)
+    cosine = np.sum(fp16 * base, axis=1)
+
+    print(f"base {len(base)} x {dim}, held-out queries {len(queries)}, k={k}\n")
+    print("Mongo storage per embedding")
+    print(f"  list of floats : {list_bytes} bytes")
+    print(f"  float16 Binary : {binary_bytes} bytes ({list_bytes / binary_bytes:.1f}x smaller)")
+    print(f"  float16 round trip: min cosine {cosine.min():.6f}, recall@{k} {recall_at_k(fp16_found, truth):.4f}\n")
+
+    print(f"{'index':<22}{'recall':>9}{'memory MB':>11}{'B/vector':>10}{'ms/query':>10}{'build s':>9}")
+    evaluate("flat float32", faiss.IndexIDMap2(faiss.IndexFlatIP(dim)), base, queries, truth, k)
+    evaluate("hnsw", resume_index._new_index(dim, index_type="hnsw"), base, queries, truth, k)
+    evaluate("hnsw-sq8", resume_index._new_index(dim, training=base, index_type="hnsw-sq8"), base, queries, truth, k)
+    for m in (16, 32, 48, 96):
+        if dim % m:
+            continue
+        resume_index.PQ_M = m
+        index = resume_index._new_index(dim, training=base, index_type="ivfpq")
+        evaluate(f"ivfpq m={m}", index, base, queries, truth, k)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark compressed resume vector storage")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--vectors", help=".npy file of embeddings (rows = resumes)")
+    source.add_argument("--from-mongo", action="store_true", help="Use embeddings stored on resumes")
+    parser.add_argument("--base", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.vectors:
+        data = _normalize(np.load(args.vectors))
+    elif args.from_mongo:
+        data = mongo_vectors()
+    else:
+        data = synthetic_vectors(args.base + args.queries)
+    main(data, args.base, args.queries, args.k)
@@ -1,6 +1,7 @@
 import React, { createContext, useContext, useState, ReactNode } from 'react';
 import { loadStripe } from '@stripe/stripe-js';
 import type { Stripe } from '@stripe/stripe-js';
+import { getToken } from '../utils/token';
 
 interface PaymentContextType {
   stripe: Stripe | null;
@@ -66,6 +67,7 @@ export const PaymentProvider: React.FC<PaymentProviderProps> = ({ children }) =>
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          Authorization: `Bearer ${getToken()}`,
         },
         body: JSON.stringify({
           priceId,